@@ -0,0 +1,157 @@
+import re
+from typing import Dict, List, Tuple
+from backend import config
+
+# Word pieces, punctuation marks and runs of padding whitespace each cost
+# roughly one token with BPE tokenizers such as Llama's.
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s{2,}")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the number of LLM tokens in `text`"""
+    return len(_TOKEN_PATTERN.findall(text or ""))
+
+
+def compact(text) -> str:
+    """Collapse all whitespace runs into single spaces"""
+    return _WHITESPACE.sub(" ", str(text or "")).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens, marking the cut with an ellipsis"""
+    if max_tokens <= 0:
+        return ""
+    matches = list(_TOKEN_PATTERN.finditer(text))
+    if len(matches) <= max_tokens:
+        return text
+    if max_tokens == 1:
+        return "…"
+    return text[:matches[max_tokens - 2].end()] + "…"
+
+
+class ContextBuilder:
+    """Assembles LLM prompt context under a token budget.
+
+    Snippets are ranked by relevance, repeated facts are dropped and the
+    remaining ones are rendered in a compact one-line format until the
+    budget is full. Every build reports the tokens it saved compared to
+    sending the full, verbosely formatted context.
+    """
+
+    def __init__(self, token_budget: int = None, tool_token_budget: int = None):
+        self.token_budget = token_budget or config.CONTEXT_TOKEN_BUDGET
+        self.tool_token_budget = tool_token_budget or config.TOOL_RESULTS_TOKEN_BUDGET
+
+    def build(self, movies: List[Dict], snippets: List[Tuple[float, str]] = ()) -> Tuple[str, Dict]:
+        """Build the knowledge graph context from enriched movies and extra snippets.
+
+        Movies carry an optional `relevance` score; extra snippets are
+        `(relevance, text)` pairs such as graph path triples.
+        """
+        baseline = sum(count_tokens(self._verbose_movie(movie)) for movie in movies)
+        baseline += sum(count_tokens(text) for _, text in snippets)
+
+        # Drop repeated movies, keeping the most relevant occurrence
+        ranked = sorted(movies, key=lambda movie: movie.get('relevance', 0.0), reverse=True)
+        unique_movies = []
+        titles = set()
+        for movie in ranked:
+            if movie.get('title') and movie['title'] not in titles:
+                unique_movies.append(movie)
+                titles.add(movie['title'])
+
+        candidates = [
+            (movie.get('relevance', 0.0), self._compact_movie(movie, titles), compact(movie.get('overview')))
+            for movie in unique_movies
+        ]
+        candidates += [(relevance, compact(text), "") for relevance, text in snippets]
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        lines = []
+        seen = set()
+        used = 0
+        dropped = 0
+        for _, header, overview in candidates:
+            if not header or header.lower() in seen:
+                continue
+            seen.add(header.lower())
+
+            line = f"{header} Plot: {overview}" if overview else header
+            cost = count_tokens(line)
+            if used + cost > self.token_budget:
+                # Keep the facts and shorten the plot to whatever still fits
+                line = f"{header} Plot: " if overview else header
+                remaining = self.token_budget - used - count_tokens(line)
+                if remaining < 0 or (overview and remaining < 8):
+                    dropped += 1
+                    continue
+                line += truncate_to_tokens(overview, remaining)
+                cost = count_tokens(line)
+            lines.append(line)
+            used += cost
+
+        return "\n".join(lines), self._stats(baseline, used, len(lines), dropped)
+
+    def build_tool_results(self, tool_calls: List[Dict]) -> Tuple[str, Dict]:
+        """Render tool outputs, splitting the tool budget evenly between distinct calls"""
+        baseline = sum(count_tokens(f"{call['tool']}: {call['output']}") for call in tool_calls)
+
+        unique_calls = []
+        seen = set()
+        for call in tool_calls:
+            key = (call['tool'], compact(call['output']))
+            if key not in seen:
+                unique_calls.append(key)
+                seen.add(key)
+
+        lines = []
+        used = 0
+        share = self.tool_token_budget // max(len(unique_calls), 1)
+        for tool, output in unique_calls:
+            line = f"{tool}: " + truncate_to_tokens(output, share - count_tokens(f"{tool}: "))
+            lines.append(line)
+            used += count_tokens(line)
+
+        return "\n".join(lines), self._stats(baseline, used, len(lines), len(tool_calls) - len(lines))
+
+    def _compact_movie(self, movie: Dict, titles: set) -> str:
+        """One-line rendering of a movie's graph facts, without its plot"""
+        title = movie.get('title')
+        if movie.get('year'):
+            title = f"{title} ({movie['year']})"
+
+        facts = [title]
+        if movie.get('rating') is not None:
+            facts.append(f"rating {movie['rating']}")
+        for label, key in (('Genres', 'genres'), ('Director', 'directors'), ('Cast', 'actors')):
+            if movie.get(key):
+                facts.append(f"{label}: {', '.join(movie[key])}")
+
+        # Similar movies already present in the context add no information
+        similar = [s for s in movie.get('similar_movies', []) if s not in titles]
+        if similar:
+            facts.append(f"Similar: {', '.join(similar)}")
+
+        return "; ".join(facts) + "."
+
+    def _verbose_movie(self, item: Dict) -> str:
+        """The unbudgeted format the context used to be sent in"""
+        return f"""
+            Movie: {item.get('title')}
+            Overview: {item.get('overview')}
+            Rating: {item.get('rating')}
+            Genres: {', '.join(item.get('genres', []))}
+            Director: {', '.join(item.get('directors', []))}
+            Actors: {', '.join(item.get('actors', []))}
+            Similar: {', '.join(item.get('similar_movies', []))}
+            """
+
+    def _stats(self, baseline: int, used: int, kept: int, dropped: int) -> Dict:
+        return {
+            'tokens_baseline': baseline,
+            'tokens_used': used,
+            'tokens_saved': max(baseline - used, 0),
+            'snippets_kept': kept,
+            'snippets_dropped': dropped
+        }
@@ -1,34 +1,84 @@
 from langgraph.graph import StateGraph, END
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
 from backend.agents.state import AgentState
+from backend.agents.context_builder import ContextBuilder
+from backend.agents.model_router import ModelRouter
+from backend.agents.prompts import ANALYZE_QUERY_PROMPT, GENERATE_ANSWER_PROMPT, build_tool_prompt, format_history
+from backend.agents.session_store import SessionStore, is_follow_up, answerable_from_session
+from backend.agents.specialist_agents import RecommendationAgent, AnalysisAgent
 from backend.tools.graph_query_tool import GraphQueryTool
 from backend.tools.search_tool import WebSearchTool
 from backend.tools.calculator_tool import CalculatorTool
+from backend.tools.movie_stats_tool import MovieStatsTool
 from backend.graphrag.hybrid_search import HybridRetriever
 from backend.graphrag.neo4j_client import Neo4jClient
-from typing import Dict
-import os
+from backend.graphrag.path_retriever import PathRetriever, Neo4jGraphAdapter, format_path
+from backend.graphrag.cypher_templates import CypherTemplateMatcher, EntityDictionary
+from backend.graphrag.recommendations import NeighbourIndex
+from backend.graphrag.movie_columns import MovieColumns
+from typing import Dict, List, Tuple
+import re
+
+# `TOOL_NAME: input`, tolerating list bullets and markdown emphasis
+TOOL_CALL_PATTERN = re.compile(r"^[\s\-*`>]*(\w+)[\s*`]*:\s*(.*)$")
+
+# Questions that need a tool (calculator, web search, stats) rather than context alone
+TOOL_KEYWORDS_PATTERN = re.compile(
+    r"\b(?:calculate|compute|search web|current|latest|how many|count|find all|list"
+    r"|average|mean|total|roi|highest|lowest)\b",
+    re.IGNORECASE
+)
+
+# Explicit recommendation requests: "movies like X", "similar to X", "recommend something like X"
+RECOMMENDATION_PATTERN = re.compile(
+    r"\b(?:movies?|films?|something|anything|more|others?)\s+(?:like|similar to)\b"
+    r"|\bsimilar to\b"
+    r"|\b(?:recommend|suggest)\b.*\b(?:like|similar)\b",
+    re.IGNORECASE
+)
+# Fact questions and comparisons about the named movies, which need the agent
+QUESTION_PATTERN = re.compile(
+    r"^\s*(?:is|are|was|were|does|did|do)\b"
+    r"|\b(?:who|when|where|why|how (?:much|long|old|good)|compare|comparison|versus|vs|ratio|table"
+    r"|direct(?:ed|or)|cast|budget|revenue|box office)\b",
+    re.IGNORECASE
+)
+
+
+def is_recommendation_request(query: str) -> bool:
+    """Asks for movies like the ones named, and for nothing the agent would have to work out"""
+    return (bool(RECOMMENDATION_PATTERN.search(query))
+            and not TOOL_KEYWORDS_PATTERN.search(query)
+            and not QUESTION_PATTERN.search(query))
+
 
 class MovieAgentSystem:
-    def __init__(self):
-        # Initialize LLM
-        self.llm = ChatGroq(
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name=os.getenv("LLM_MODEL", "llama-3.3-70b-versatile"),
-            temperature=0.7
-        )
-        
-        # Initialize components
-        self.neo4j = Neo4jClient()
-        self.retriever = HybridRetriever()
+    def __init__(self, neo4j: Neo4jClient = None, neighbours: NeighbourIndex = None,
+                 columns: MovieColumns = None, entities: EntityDictionary = None):
+        # Initialize LLMs (fast model for planning, large model for answers)
+        self.router = ModelRouter()
+        
+        # Initialize components. One Neo4j driver (and connection pool) is
+        # shared by every component; read-only tables may be passed in already
+        # loaded, e.g. by a pre-fork server sharing them between workers.
+        self.neo4j = neo4j or Neo4jClient()
+        self.retriever = HybridRetriever(self.neo4j)
+        self.path_retriever = PathRetriever(Neo4jGraphAdapter(self.neo4j))
+        self.context_builder = ContextBuilder()
+        self.recommender = RecommendationAgent(neighbours)
+        self.sessions = SessionStore()
+        self.cypher_templates = CypherTemplateMatcher(entities or EntityDictionary.load())
         
         # Initialize tools
         self.tools = [
             GraphQueryTool(neo4j_client=self.neo4j),
             WebSearchTool(),
-            CalculatorTool()
+            CalculatorTool(),
+            MovieStatsTool(analysis_agent=AnalysisAgent(columns))
         ]
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        
+        # Compile prompts once; only their per-request suffix is formatted per call
+        self.tool_prompt = build_tool_prompt(self.tools)
         
         # Build workflow
         self.workflow = self._build_workflow()
@@ -39,13 +89,28 @@ class MovieAgentSystem:
         workflow = StateGraph(AgentState)
         
         # Add nodes
+        workflow.add_node("recommend_from_graph", self.recommend_from_graph)
         workflow.add_node("analyze_query", self.analyze_query)
         workflow.add_node("retrieve_context", self.retrieve_context)
         workflow.add_node("reason_with_tools", self.reason_with_tools)
         workflow.add_node("generate_answer", self.generate_answer)
         
         # Define edges
-        workflow.set_entry_point("analyze_query")
+        workflow.set_conditional_entry_point(
+            self.route_query,
+            {
+                "recommend": "recommend_from_graph",
+                "agent": "analyze_query"
+            }
+        )
+        workflow.add_conditional_edges(
+            "recommend_from_graph",
+            self.recommendation_served,
+            {
+                "done": END,
+                "agent": "analyze_query"
+            }
+        )
         workflow.add_edge("analyze_query", "retrieve_context")
         workflow.add_conditional_edges(
             "retrieve_context",
@@ -60,156 +125,236 @@ class MovieAgentSystem:
         
         return workflow
     
-    def analyze_query(self, state: AgentState) -> AgentState:
-        """Analyze user query and plan approach"""
-        prompt = ChatPromptTemplate.from_template("""
-        Analyze this query and determine:
-        1. Is it asking about movies in our database?
-        2. Does it require graph traversal?
-        3. Does it need external information?
-        4. Does it require calculations?
-        
-        Query: {query}
-        
-        Provide a brief analysis and reasoning.
-        """)
-        
-        response = self.llm.invoke(prompt.format(query=state["query"]))
+    def route_query(self, state: AgentState) -> str:
+        """Serve "movies like X" from the graph; everything else goes through the agent"""
+        if is_recommendation_request(state["query"]) and self.recommender.index.find_titles(state["query"]):
+            return "recommend"
+        return "agent"
+    
+    def recommendation_served(self, state: AgentState) -> str:
+        """Seeds without graph neighbours fall back to the agent"""
+        return "done" if state.get("final_answer") else "agent"
+    
+    def recommend_from_graph(self, state: AgentState) -> Dict:
+        """Answer a recommendation query from precomputed neighbours, without the LLM"""
+        index = self.recommender.index
+        seed_ids = index.find_titles(state["query"])
+        seeds = [index.movies[movie_id]['title'] for movie_id in seed_ids]
+        recommended_ids = self.recommender.recommend_ids({'query': state["query"]})
+        if not recommended_ids:
+            return {"reasoning": state["reasoning"] + ["Recommendation: no graph neighbours, asking the agent"]}
+        
+        lines = [f"If you enjoyed **{' and '.join(seeds)}**, you might like:"]
+        titles = []
+        for movie_id in recommended_ids:
+            movie = index.movies[movie_id]
+            lines.append(f"* **{movie['title']}** ({movie['year']}) rated **{movie['rating']}**")
+            titles.append(movie['title'])
+        answer = "\n".join(lines)
+        
+        # The session keeps full context documents (cast, crew, plot), seeds
+        # first, so "who directed it?" resolves against the movie asked about
+        try:
+            session_movies = self.neo4j.get_movie_contexts(seed_ids + recommended_ids)
+        except Exception:
+            # The answer itself never needed the graph
+            session_movies = []
         
-        state["reasoning"].append(f"Analysis: {response.content}")
-        state["iteration"] = 0
+        return {
+            "final_answer": answer,
+            "retrieved_movies": session_movies,
+            "messages": [{'role': 'user', 'content': state["query"]}, {'role': 'assistant', 'content': answer}],
+            "tool_calls": [{
+                'tool': 'graph_recommendations',
+                'input': ", ".join(seeds),
+                'output': titles
+            }],
+            "reasoning": state["reasoning"] + ["Recommendation: served from precomputed graph neighbours"]
+        }
+    
+    def analyze_query(self, state: AgentState) -> Dict:
+        """Analyze user query and plan approach"""
+        response = self.router.invoke(
+            "analyze_query",
+            ANALYZE_QUERY_PROMPT.format(history=format_history(state.get("history")), query=state["query"]),
+            validate=lambda content: bool(content.strip())
+        )
         
-        return state
+        return {
+            "reasoning": state["reasoning"] + [f"Analysis: {response.content}"],
+            "iteration": 0
+        }
     
-    def retrieve_context(self, state: AgentState) -> AgentState:
+    def retrieve_context(self, state: AgentState) -> Dict:
         """Retrieve relevant context from knowledge graph"""
-        results = self.retriever.retrieve(state["query"], top_k=5)
-        
-        # Format context
-        context_parts = []
-        for item in results['enriched_context']:
-            context_parts.append(f"""
-            Movie: {item.get('title')}
-            Overview: {item.get('overview')}
-            Rating: {item.get('rating')}
-            Genres: {', '.join(item.get('genres', []))}
-            Director: {', '.join(item.get('directors', []))}
-            Actors: {', '.join(item.get('actors', []))}
-            Similar: {', '.join(item.get('similar_movies', []))}
-            """)
-        
-        state["graph_context"] = "\n---\n".join(context_parts)
-        state["vector_results"] = results['vector_results']
-        
-        return state
+        query = state["query"]
+        prior = state.get("session_movies") or []
+        reasoning = []
+        
+        # A question naming another movie or person is not about the session's movies
+        about_session = bool(prior) and not self._names_new_entities(query, prior)
+        
+        if about_session and answerable_from_session(query):
+            # "Who directed it?": the movies of the previous turns already hold the answer
+            movies = [{**movie, 'relevance': 1.0 / (rank + 1)} for rank, movie in enumerate(prior)]
+            results = {'vector_results': [], 'enriched_context': movies}
+            reasoning.append(f"Retrieval: reused {len(prior)} movies from the session")
+        else:
+            if about_session and is_follow_up(query):
+                # Resolve "its sequel" against the movie the conversation is about
+                query = f"{query} {prior[0]['title']}"
+            results = self.retriever.retrieve(query, top_k=5, known={movie['id']: movie for movie in prior})
+            movies = results['enriched_context']
+            if prior:
+                # Earlier movies stay available, ranked below the new results
+                retrieved = {movie['id'] for movie in movies}
+                movies = movies + [
+                    {**movie, 'relevance': 0.2 / (rank + 1)}
+                    for rank, movie in enumerate(prior) if movie['id'] not in retrieved
+                ]
+        
+        # Connection questions also get the shortest paths between their entities,
+        # ranked ahead of the retrieved movies. The in-memory graph snapshot is
+        # traversed when the loader has published one.
+        paths = self.path_retriever.retrieve_for_query(state["query"], graph=self.neo4j.snapshots.current())
+        path_snippets = [(2.0, f"Path: {format_path(triples)}") for triples in paths]
+        
+        # Assemble compact, budgeted context
+        graph_context, stats = self.context_builder.build(movies, path_snippets)
+        
+        return {
+            "graph_context": graph_context,
+            "token_stats": {"context": stats},
+            "vector_results": results['vector_results'],
+            "retrieved_movies": results['enriched_context'],
+            "reasoning": state["reasoning"] + reasoning
+        }
+    
+    def _names_new_entities(self, query: str, movies: List[Dict]) -> bool:
+        """`query` names a catalog title or person that none of `movies` mentions"""
+        known = {
+            name.lower()
+            for movie in movies
+            for name in [movie.get('title'), *(movie.get('directors') or []), *(movie.get('actors') or [])]
+            if name
+        }
+        slots = self.cypher_templates.slots(query)
+        return any(
+            name.lower() not in known
+            for kind in ('title', 'person')
+            for name in slots.get(kind, [])
+        )
     
     def should_use_tools(self, state: AgentState) -> str:
         """Decide if tools are needed"""
-        # Simple heuristic: check if query contains keywords
-        query_lower = state["query"].lower()
-        
-        tool_keywords = [
-            'calculate', 'compute', 'search web', 'current', 'latest',
-            'how many', 'count', 'find all', 'list'
-        ]
-        
-        needs_tools = any(keyword in query_lower for keyword in tool_keywords)
-        
-        return "use_tools" if needs_tools else "skip_tools"
+        # Simple heuristic: check if query contains keywords (whole words, so
+        # "heroine" is not "roi" and "meaning" is not "mean")
+        needs_tools = bool(TOOL_KEYWORDS_PATTERN.search(state["query"]))
+        
+        # Common question shapes are answered by a Cypher template
+        if needs_tools or self.cypher_templates.match(state["query"]):
+            return "use_tools"
+        return "skip_tools"
     
-    def reason_with_tools(self, state: AgentState) -> AgentState:
+    def reason_with_tools(self, state: AgentState) -> Dict:
         """Use tools to gather additional information"""
         
-        # Create tool-using prompt
-        prompt = ChatPromptTemplate.from_template("""
-        You are an AI assistant with access to these tools:
-        {tools}
-        
-        Query: {query}
-        Context from knowledge graph: {context}
-        
-        Decide which tool to use and provide the input.
-        If no tool is needed, say "NO_TOOL_NEEDED".
-        
-        Format: TOOL_NAME: input
-        """)
-        
-        tool_descriptions = "\n".join([
-            f"- {tool.name}: {tool.description}" for tool in self.tools
-        ])
-        
-        response = self.llm.invoke(prompt.format(
-            tools=tool_descriptions,
-            query=state["query"],
-            context=state.get("graph_context", "")
-        ))
+        # Fast path: a recognized intent runs its pre-validated template, no LLM call
+        template = self.cypher_templates.match(state["query"])
+        if template:
+            rows, result = self.tools_by_name["graph_query"].execute(template['cypher'], template['params'])
+            if rows:
+                return {
+                    "tool_calls": [{
+                        'tool': 'graph_query',
+                        'input': f"template {template['intent']} {template['params']}",
+                        'output': result
+                    }],
+                    "cypher_results": rows,
+                    "reasoning": state["reasoning"] + [f"Tools: answered by the '{template['intent']}' Cypher template"]
+                }
+        
+        response = self.router.invoke(
+            "reason_with_tools",
+            self.tool_prompt.format(
+                query=state["query"],
+                context=state.get("graph_context") or ""
+            ),
+            validate=self._is_valid_tool_plan
+        )
         
-        # Parse and execute tool
+        # Parse and execute tools
         tool_output = response.content.strip()
+        tool_calls = []
+        
+        rows = state.get("cypher_results") or []
         
         if "NO_TOOL_NEEDED" not in tool_output:
-            # Simple parsing (in production, use structured output)
-            for tool in self.tools:
-                if tool.name in tool_output.lower():
-                    tool_input = tool_output.split(":", 1)[1].strip()
+            for tool_name, tool_input in self._parse_tool_calls(tool_output):
+                tool = self.tools_by_name[tool_name]
+                if tool_name == "graph_query":
+                    rows, result = tool.execute(tool_input)
+                elif tool_name == "calculator":
+                    # Lets the calculator aggregate the preceding query's columns
+                    result = tool._run(tool_input, rows=rows)
+                else:
                     result = tool._run(tool_input)
-                    state["tool_calls"].append({
-                        'tool': tool.name,
-                        'input': tool_input,
-                        'output': result
-                    })
+                tool_calls.append({
+                    'tool': tool_name,
+                    'input': tool_input,
+                    'output': result
+                })
         
-        return state
+        return {"tool_calls": tool_calls, "cypher_results": rows}
+    
+    def _parse_tool_calls(self, text: str) -> List[Tuple[str, str]]:
+        """Parse `TOOL_NAME: input` lines; other lines continue the previous input"""
+        calls = []
+        for line in text.splitlines():
+            match = TOOL_CALL_PATTERN.match(line)
+            if match and match.group(1).lower() in self.tools_by_name:
+                calls.append([match.group(1).lower(), match.group(2)])
+            elif calls and line.strip():
+                calls[-1][1] += "\n" + line.strip()
+        
+        return [
+            (tool_name, tool_input.strip().strip('`').strip())
+            for tool_name, tool_input in calls
+            if tool_input.strip().strip('`').strip()
+        ]
+    
+    def _is_valid_tool_plan(self, content: str) -> bool:
+        """A tool plan is valid if it declines tools or names at least one known tool"""
+        return "NO_TOOL_NEEDED" in content or bool(self._parse_tool_calls(content))
 
-    def generate_answer(self, state: AgentState) -> AgentState:
+    def generate_answer(self, state: AgentState) -> Dict:
         """Generate final answer using all gathered context"""
         
-        prompt = ChatPromptTemplate.from_template("""
-        You are a helpful movie recommendation assistant.
-        
-        User Query: {query}
-        
-        Knowledge Graph Context:
-        {graph_context}
-        
-        Tool Results:
-        {tool_results}
-        
-        Reformulate the gathered information into a natural, high-quality answer.
-        - Use **bold** for movie titles or ratings.
-        - Provide a concise summary (under 2-3 sentences).
-        - **ONLY** include a specific list (Director, Cast, etc.) if the user explicitly asked for those details or if the query is a formal request for movie specifications.
-        - If creating a list, use bullet points (*) on NEW LINES.
+        tool_results, stats = self.context_builder.build_tool_results(state.get("tool_calls", []))
         
-        Example (General Query):
-        The movie **Interstellar** is a sci-fi epic rated **8.6**, following a team of explorers through a wormhole to save humanity.
-        
-        Example (Specific Request):
-        **Interstellar** details:
-        * **Director**: Christopher Nolan
-        * **Cast**: Matthew McConaughey, Anne Hathaway
-        """)
-        
-        tool_results = "\n".join([
-            f"{call['tool']}: {call['output']}" 
-            for call in state.get("tool_calls", [])
-        ]) or "No tools were used."
-        
-        response = self.llm.invoke(prompt.format(
+        response = self.router.invoke("generate_answer", GENERATE_ANSWER_PROMPT.format(
+            history=format_history(state.get("history")),
             query=state["query"],
-            graph_context=state.get("graph_context", "No context available"),
-            tool_results=tool_results
+            graph_context=state.get("graph_context") or "No context available",
+            tool_results=tool_results or "No tools were used."
         ))
         
-        state["final_answer"] = response.content
-        
-        return state
+        return {
+            "final_answer": response.content,
+            "messages": [{'role': 'user', 'content': state["query"]}, {'role': 'assistant', 'content': response.content}],
+            "token_stats": {**(state.get("token_stats") or {}), "tool_results": stats}
+        }
 
-    def run(self, query: str) -> Dict:
-        """Run the agent workflow"""
+    def run(self, query: str, session_id: str = None) -> Dict:
+        """Run the agent workflow, continuing the conversation `session_id` if given"""
+        session = self.sessions.context(session_id) if session_id else None
+        
         initial_state = {
             "query": query,
-            "messages": [],
+            "messages": session['messages'] if session else [],
+            "history": session['summary'] if session else None,
+            "session_movies": session['movies'] if session else None,
+            "retrieved_movies": None,
             "tool_calls": [],
             "graph_context": None,
             "vector_results": None,
@@ -217,15 +362,20 @@ class MovieAgentSystem:
             "search_results": None,
             "calculation_results": None,
             "final_answer": None,
+            "token_stats": None,
             "iteration": 0,
             "reasoning": []
         }
         
         result = self.app.invoke(initial_state)
         
+        if session_id:
+            self.sessions.record(session_id, query, result["final_answer"], result.get("retrieved_movies") or [])
+        
         return {
             "answer": result["final_answer"],
             "tool_calls": result["tool_calls"],
             "reasoning": result["reasoning"],
-            "context_used": len(result.get("vector_results", []))
+            "context_used": len(result.get("vector_results") or []),
+            "token_stats": result.get("token_stats")
         }
@@ -0,0 +1,227 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from collections import deque
+from typing import Optional, Union
+from backend import config
+import threading
+import random
+import time
+import httpx
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Deadline of the request currently being served
+_deadline: ContextVar[Optional["Deadline"]] = ContextVar("llm_deadline", default=None)
+
+_lock = threading.Lock()
+_http_client = None
+_provider_slots = None
+_executor = None
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request deadline passed before the LLM produced a response"""
+
+
+class Deadline:
+    """Absolute monotonic deadline, which a run shared by several requests
+    pushes back to the latest of theirs (see SingleFlight)"""
+
+    def __init__(self, at: float):
+        self.at = at
+        self._lock = threading.Lock()
+
+    @classmethod
+    def after(cls, timeout_seconds: float) -> "Deadline":
+        return cls(time.monotonic() + timeout_seconds)
+
+    def extend(self, at: float):
+        with self._lock:
+            self.at = max(self.at, at)
+
+    def remaining(self) -> float:
+        return self.at - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(timeout: Union[float, Deadline]):
+    """Bound every LLM call made inside the block by a shared deadline
+    (seconds from now, or a Deadline that may still be extended)"""
+    token = _deadline.set(timeout if isinstance(timeout, Deadline) else Deadline.after(timeout))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def shared_http_client() -> httpx.Client:
+    """Process-wide keep-alive connection pool for LLM providers"""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.LLM_HTTP_MAX_CONNECTIONS
+                ),
+                timeout=config.LLM_REQUEST_TIMEOUT
+            )
+        return _http_client
+
+
+def _shared_slots() -> threading.BoundedSemaphore:
+    """Provider-wide cap on in-flight LLM calls, shared by every gateway"""
+    global _provider_slots
+    with _lock:
+        if _provider_slots is None:
+            _provider_slots = threading.BoundedSemaphore(config.LLM_MAX_CONCURRENCY)
+        return _provider_slots
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=2 * config.LLM_MAX_CONCURRENCY,
+                thread_name_prefix="llm-gateway"
+            )
+        return _executor
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and transport failures are worth retrying"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, httpx.TransportError):
+        return True
+    # Provider SDKs wrap transport failures in their own connection errors
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Resilient `invoke` wrapper around a chat model.
+
+    Each call is bounded by the request deadline (see `deadline_scope`),
+    waits for a provider-wide concurrency slot, and is retried with full
+    jitter on rate limits and transient failures. With hedging enabled,
+    a duplicate request is sent once the first one runs longer than the
+    observed latency percentile, and whichever answers first wins.
+    """
+
+    def __init__(self, llm, max_retries: int = None, backoff: float = None, backoff_max: float = None,
+                 hedging: bool = None, hedge_percentile: float = None, hedge_min_samples: int = None,
+                 slots: threading.Semaphore = None, timeout: float = None):
+        self.llm = llm
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = config.LLM_RETRY_BACKOFF if backoff is None else backoff
+        self.backoff_max = config.LLM_RETRY_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.hedging = config.LLM_HEDGING if hedging is None else hedging
+        self.hedge_percentile = hedge_percentile or config.LLM_HEDGE_PERCENTILE
+        self.hedge_min_samples = config.LLM_HEDGE_MIN_SAMPLES if hedge_min_samples is None else hedge_min_samples
+        self.timeout = timeout or config.LLM_REQUEST_TIMEOUT
+        self.slots = slots or _shared_slots()
+
+        self.latencies = deque(maxlen=200)
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0}
+        # Calls, hedges and their retries run on the shared executor's threads
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def invoke(self, prompt, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._invoke_hedged(prompt, kwargs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+                remaining = remaining_time()
+                if remaining is not None and delay >= remaining:
+                    raise DeadlineExceeded("No time left to retry LLM call") from e
+
+                self._count("retries")
+                time.sleep(delay)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency after which a duplicate request is sent, once enough calls were observed"""
+        if not self.hedging or len(self.latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * self.hedge_percentile), len(ordered) - 1)]
+
+    def _invoke_hedged(self, prompt, kwargs):
+        executor = _shared_executor()
+        # Worker threads inherit the caller's deadline
+        primary = executor.submit(copy_context().run, self._call, prompt, kwargs, True)
+        pending = {primary}
+
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is not None:
+            done, _ = wait(pending, timeout=self._bounded(hedge_delay))
+            # Only hedge when a provider slot is free; never queue behind other requests
+            if not done and self.slots.acquire(blocking=False):
+                self._count("hedges")
+                pending.add(executor.submit(copy_context().run, self._call, prompt, kwargs, False))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=self._bounded(None), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded("LLM call exceeded the request deadline")
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _call(self, prompt, kwargs, acquire: bool):
+        """One provider request; `acquire=False` means the caller already holds a slot"""
+        if acquire and not self.slots.acquire(timeout=self._bounded(None)):
+            raise DeadlineExceeded("No LLM concurrency slot before the request deadline")
+        try:
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded("Request deadline passed before the LLM call")
+
+            start = time.monotonic()
+            self._count("calls")
+            response = self.llm.invoke(prompt, timeout=self._bounded(self.timeout), **kwargs)
+            self.latencies.append(time.monotonic() - start)
+            return response
+        finally:
+            self.slots.release()
+
+    def _bounded(self, timeout: Optional[float]) -> Optional[float]:
+        """Clamp a timeout to the time left before the request deadline"""
+        remaining = remaining_time()
+        if remaining is None:
+            return timeout
+        remaining = max(remaining, 0.0)
+        return remaining if timeout is None else min(timeout, remaining)
@@ -0,0 +1,55 @@
+from langchain_groq import ChatGroq
+from typing import Callable, Dict, Optional
+from backend import config
+from backend.agents.llm_gateway import LLMGateway, shared_http_client
+import os
+
+class ModelRouter:
+    """Routes each workflow node to its configured chat model.
+
+    NODE_MODELS puts the planning nodes on the fast model and
+    `generate_answer` on the large one; nodes it does not list run on the
+    large (escalation) model. When a node's output fails its validator the
+    prompt is replayed once on the large model (escalation).
+    """
+
+    def __init__(self, node_models: Dict[str, str] = None, escalation_model: str = None,
+                 llm_factory: Callable[[str], object] = None):
+        self.node_models = node_models or config.NODE_MODELS
+        self.escalation_model = escalation_model or config.LLM_MODEL
+        self.llm_factory = llm_factory or self._create_llm
+        self.escalations = 0
+
+        # One client per distinct model, shared by every node using it
+        self._llms = {}
+
+    def _create_llm(self, model_name: str):
+        # Retries and timeouts are owned by the gateway, not the SDK
+        return LLMGateway(ChatGroq(
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            groq_api_base=os.getenv("GROQ_API_BASE"),
+            model_name=model_name,
+            temperature=config.LLM_TEMPERATURE,
+            http_client=shared_http_client(),
+            max_retries=0
+        ))
+
+    def model_for(self, node: str) -> str:
+        """Name of the model configured for a workflow node"""
+        return self.node_models.get(node, self.escalation_model)
+
+    def llm(self, model_name: str):
+        if model_name not in self._llms:
+            self._llms[model_name] = self.llm_factory(model_name)
+        return self._llms[model_name]
+
+    def invoke(self, node: str, prompt, validate: Optional[Callable[[str], bool]] = None):
+        """Invoke the node's model, escalating to the large model on invalid output"""
+        model_name = self.model_for(node)
+        response = self.llm(model_name).invoke(prompt)
+
+        if validate is None or model_name == self.escalation_model or validate(response.content):
+            return response
+
+        self.escalations += 1
+        return self.llm(self.escalation_model).invoke(prompt)
@@ -0,0 +1,79 @@
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from typing import List
+
+# Every prompt starts with the same assistant preamble followed by the
+# node's static instructions, all in the system message. Only the human
+# message varies per request, so providers and local models with prefix
+# (KV) caching can reuse the whole system prefix across calls.
+ASSISTANT_PREAMBLE = (
+    "You are a helpful movie recommendation assistant backed by a Neo4j "
+    "knowledge graph of movies, people, genres, keywords and studios."
+)
+
+
+class CompiledPrompt:
+    """A prompt compiled once into a static system prefix and a per-call suffix"""
+
+    __slots__ = ("system", "template")
+
+    def __init__(self, instructions: str, template: str):
+        self.system = SystemMessage(content=f"{ASSISTANT_PREAMBLE}\n\n{instructions}")
+        self.template = template
+
+    def format(self, **values) -> List[BaseMessage]:
+        return [self.system, HumanMessage(content=self.template.format(**values))]
+
+
+ANALYZE_QUERY_PROMPT = CompiledPrompt(
+    """Analyze the user's query and determine:
+1. Is it asking about movies in our database?
+2. Does it require graph traversal?
+3. Does it need external information?
+4. Does it require calculations?
+
+Provide a brief analysis and reasoning.""",
+    "{history}Query: {query}"
+)
+
+
+def format_history(summary: str) -> str:
+    """Running conversation summary prepended to the per-request message"""
+    return f"Conversation so far:\n{summary}\n\n" if summary else ""
+
+
+def build_tool_prompt(tools) -> CompiledPrompt:
+    """Tool selection prompt; tool descriptions are fixed for the agent's lifetime"""
+    tool_descriptions = "\n".join(
+        f"- {tool.name}: " + "\n  ".join(
+            line.strip() for line in tool.description.strip().splitlines() if line.strip()
+        )
+        for tool in tools
+    )
+    return CompiledPrompt(
+        f"""You have access to these tools:
+{tool_descriptions}
+
+Decide which tool to use and provide the input.
+If no tool is needed, say "NO_TOOL_NEEDED".
+
+Format: TOOL_NAME: input""",
+        "Query: {query}\nContext from knowledge graph:\n{context}"
+    )
+
+
+GENERATE_ANSWER_PROMPT = CompiledPrompt(
+    """Reformulate the gathered information into a natural, high-quality answer.
+- Use **bold** for movie titles or ratings.
+- Provide a concise summary (under 2-3 sentences).
+- **ONLY** include a specific list (Director, Cast, etc.) if the user explicitly asked for those details or if the query is a formal request for movie specifications.
+- If creating a list, use bullet points (*) on NEW LINES.
+
+Example (General Query):
+The movie **Interstellar** is a sci-fi epic rated **8.6**, following a team of explorers through a wormhole to save humanity.
+
+Example (Specific Request):
+**Interstellar** details:
+* **Director**: Christopher Nolan
+* **Cast**: Matthew McConaughey, Anne Hathaway""",
+    "{history}User Query: {query}\n\nKnowledge Graph Context:\n{graph_context}\n\nTool Results:\n{tool_results}"
+)
@@ -0,0 +1,148 @@
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+from backend import config
+from backend.agents.context_builder import compact, count_tokens, truncate_to_tokens
+import threading
+import time
+import re
+
+# Pronouns and elliptical openers that refer back to an earlier turn
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:and|also|what about|how about)\b"
+    r"|\b(?:it|its|it's|they|them|their|those|these|he|she|his|her"
+    r"|the (?:movie|film|sequel|prequel|director|cast|same one))\b",
+    re.IGNORECASE
+)
+# Follow-ups asking for facts the stored movie contexts already hold
+DETAIL_PATTERN = re.compile(
+    r"\b(?:who|director|directed|cast|star(?:s|red)?|actors?|rating|rated|score|year|released|genres?|plot|about)\b",
+    re.IGNORECASE
+)
+# Follow-ups that ask for movies beyond the ones already retrieved
+NEW_MOVIES_PATTERN = re.compile(
+    r"\b(?:sequels?|prequels?|other|another|else|similar|more|like|recommend|suggest)\b",
+    re.IGNORECASE
+)
+
+# Earlier answers are carried over cut to this many tokens
+ANSWER_SUMMARY_TOKENS = 40
+
+
+def is_follow_up(query: str) -> bool:
+    return bool(FOLLOW_UP_PATTERN.search(query))
+
+
+def answerable_from_session(query: str) -> bool:
+    """A follow-up about details of the movies already in the session"""
+    return is_follow_up(query) and bool(DETAIL_PATTERN.search(query)) and not NEW_MOVIES_PATTERN.search(query)
+
+
+class Session:
+    """Recent turns of one conversation and the movie contexts they retrieved"""
+
+    __slots__ = ("session_id", "turns", "movies", "max_movies", "touched")
+
+    def __init__(self, session_id: str, max_turns: int, max_movies: int):
+        self.session_id = session_id
+        self.turns = deque(maxlen=max_turns)
+        # id -> context document, most recently retrieved last
+        self.movies = OrderedDict()
+        self.max_movies = max_movies
+        self.touched = 0.0
+
+    def add_turn(self, query: str, answer: str, movies: List[Dict]):
+        # Lowest ranked first, so the turn's top movie ends up the most recent
+        for movie in reversed(movies):
+            if movie.get('id'):
+                self.movies.pop(movie['id'], None)
+                self.movies[movie['id']] = movie
+        while len(self.movies) > self.max_movies:
+            self.movies.popitem(last=False)
+        self.turns.append({
+            'query': query,
+            'answer': answer or "",
+            'titles': [movie['title'] for movie in movies if movie.get('title')]
+        })
+
+    def recent_movies(self) -> List[Dict]:
+        """Stored movie contexts, most recently retrieved first"""
+        return list(reversed(self.movies.values()))
+
+    def summary(self, token_budget: int = None) -> str:
+        """Compact running summary of the turns; the oldest are dropped first when over budget"""
+        token_budget = token_budget or config.SESSION_SUMMARY_TOKEN_BUDGET
+        lines = []
+        remaining = token_budget
+        for turn in reversed(self.turns):
+            line = f"User: {compact(turn['query'])}"
+            if turn['titles']:
+                line += f" | Movies: {', '.join(turn['titles'][:3])}"
+            line += f" | Answer: {truncate_to_tokens(compact(turn['answer']), ANSWER_SUMMARY_TOKENS)}"
+            line = truncate_to_tokens(line, remaining)
+            if not line:
+                break
+            lines.insert(0, line)
+            remaining -= count_tokens(line)
+        return "\n".join(lines)
+
+    def messages(self) -> List[Dict]:
+        """Previous turns as chat messages, with shortened answers"""
+        messages = []
+        for turn in self.turns:
+            messages.append({'role': 'user', 'content': turn['query']})
+            messages.append({'role': 'assistant', 'content': truncate_to_tokens(compact(turn['answer']), ANSWER_SUMMARY_TOKENS)})
+        return messages
+
+
+class SessionStore:
+    """Bounded in-memory sessions with idle expiry and LRU eviction"""
+
+    def __init__(self, max_sessions: int = None, ttl_seconds: float = None, max_turns: int = None,
+                 max_movies: int = None, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions or config.SESSION_MAX_SESSIONS
+        self.ttl_seconds = ttl_seconds or config.SESSION_TTL_SECONDS
+        self.max_turns = max_turns or config.SESSION_MAX_TURNS
+        self.max_movies = max_movies or config.SESSION_MAX_MOVIES
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def context(self, session_id: str) -> Optional[Dict]:
+        """Summary, messages and movies of a live session, read under the lock"""
+        with self._lock:
+            now = self.clock()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.touched > self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            session.touched = now
+            self._sessions.move_to_end(session_id)
+            return {
+                'summary': session.summary(),
+                'messages': session.messages(),
+                'movies': session.recent_movies()
+            }
+
+    def record(self, session_id: str, query: str, answer: str, movies: List[Dict]) -> Session:
+        """Append a turn, creating the session and evicting idle or least recent ones"""
+        with self._lock:
+            now = self.clock()
+            session = self._sessions.pop(session_id, None)
+            if session is None or now - session.touched > self.ttl_seconds:
+                session = Session(session_id, self.max_turns, self.max_movies)
+            session.add_turn(query, answer, movies)
+            session.touched = now
+            self._sessions[session_id] = session
+
+            # Oldest entries come first: drop the expired ones, then trim to size
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if now - oldest.touched <= self.ttl_seconds and len(self._sessions) <= self.max_sessions:
+                    break
+                self._sessions.popitem(last=False)
+            return session
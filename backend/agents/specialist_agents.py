@@ -1,19 +1,52 @@
 from typing import List, Dict
+from backend.graphrag.recommendations import NeighbourIndex
+from backend.graphrag.movie_columns import MovieColumns
 
 class RecommendationAgent:
     """Specialized in movie recommendations"""
     
+    def __init__(self, index: NeighbourIndex = None):
+        # Neighbour lists are precomputed offline by the loader
+        self.index = index or NeighbourIndex.load_or_build()
+    
     def recommend(self, preferences: Dict) -> List[str]:
-        # Implementation for recommendation logic
-        # For now, return a placeholder list based on preferences
-        return ["Inception", "Interstellar", "The Matrix"]
+        """Recommend titles from the movie graph without any LLM call.
+        
+        Preferences may name seed `movies` (titles), a `genre` and the
+        number of results `top_k`; seeds may also be mentioned in `query`.
+        """
+        return [self.index.movies[movie_id]['title'] for movie_id in self.recommend_ids(preferences)]
+    
+    def recommend_ids(self, preferences: Dict) -> List[str]:
+        """Ids of the recommended movies, which unlike titles are never ambiguous"""
+        seed_ids = [
+            self.index.by_title[title.lower()]
+            for title in preferences.get('movies', [])
+            if title.lower() in self.index.by_title
+        ]
+        genres = []
+        if preferences.get('query'):
+            seed_ids += self.index.find_titles(preferences['query'])
+            genres += self.index.find_genres(preferences['query'])
+        if preferences.get('genre'):
+            genres += self.index.find_genres(preferences['genre']) or [preferences['genre']]
+        
+        recommendations = self.index.recommend(seed_ids, k=preferences.get('top_k', 5), genres=genres)
+        return [movie_id for movie_id, _ in recommendations]
 
 class AnalysisAgent:
     """Specialized in data analysis"""
     
+    def __init__(self, columns: MovieColumns = None):
+        # Columnar snapshot exported by the loader
+        self.columns = columns or MovieColumns.load_or_build()
+    
     def analyze(self, query: str) -> Dict:
-        # Implementation for data analysis logic
-        return {"sentiment": "positive", "key_topics": ["sci-fi", "space"]}
+        """Answer a numeric question such as `mean(rating) where director = Christopher Nolan`"""
+        try:
+            return self.columns.query(query)
+        except ValueError as e:
+            return {"query": query, "error": str(e)}
 
 class OrchestratorAgent:
     """Coordinates multiple agents"""
@@ -7,6 +7,10 @@ class AgentState(TypedDict):
     # Input
     query: str
     
+    # Conversation (previous turns of the session, if any)
+    history: Optional[str]
+    session_movies: Optional[List[dict]]
+    
     # Processing
     messages: Annotated[List[dict], add]
     tool_calls: Annotated[List[dict], add]
@@ -14,6 +18,7 @@ class AgentState(TypedDict):
     # Graph retrieval
     graph_context: Optional[str]
     vector_results: Optional[List[dict]]
+    retrieved_movies: Optional[List[dict]]
     cypher_results: Optional[List[dict]]
     
     # Tool results
@@ -24,5 +29,6 @@ class AgentState(TypedDict):
     final_answer: Optional[str]
     
     # Metadata
+    token_stats: Optional[dict]
     iteration: int
     reasoning: List[str]
@@ -0,0 +1,84 @@
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, Type
+from backend.agents.llm_gateway import Deadline
+import asyncio
+import re
+import time
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the answer"""
+    return _WHITESPACE.sub(" ", query).strip().rstrip("?!. ").lower()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one shared computation.
+
+    The first caller starts the computation as its own task; every caller,
+    including the first, awaits it through `asyncio.shield`, so one client
+    disconnecting or timing out never cancels the work the others wait on.
+    Each caller waits at most its own `timeout`, while the computation runs
+    under `deadline(key)`, pushed back to the latest deadline of its
+    callers. Keys are released as soon as the computation finishes:
+    results are shared, not cached.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, Tuple[asyncio.Task, Deadline]] = {}
+        self.stats = {'requests': 0, 'executions': 0, 'coalesced': 0}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def deadline(self, key: Hashable) -> Optional[Deadline]:
+        """Deadline of the computation in flight for `key`, the latest of its callers'"""
+        flight = self._in_flight.get(key)
+        return flight[1] if flight else None
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable], timeout: Optional[float] = None,
+                 retry_on: Tuple[Type[BaseException], ...] = ()):
+        """Result of `fn()`, shared with every concurrent caller using `key`.
+
+        A caller that joined another's computation starts or joins a new one
+        when it fails with one of `retry_on` (e.g. the first caller was shed),
+        as long as its own timeout allows.
+        """
+        self.stats['requests'] += 1
+        at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            task, started = self._join(key, fn, at)
+            try:
+                if at is None:
+                    return await asyncio.shield(task)
+                return await asyncio.wait_for(asyncio.shield(task), max(at - time.monotonic(), 0))
+            except retry_on:
+                if started:
+                    raise
+
+    def _join(self, key: Hashable, fn: Callable[[], Awaitable], at: Optional[float]) -> Tuple[asyncio.Task, bool]:
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.stats['coalesced'] += 1
+            task, deadline = flight
+            if at is not None:
+                deadline.extend(at)
+            return task, False
+
+        self.stats['executions'] += 1
+        # Without a caller timeout the computation is unbounded
+        deadline = Deadline(float('inf') if at is None else at)
+        # fn() only starts running once registered, so it can read deadline(key)
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = (task, deadline)
+        task.add_done_callback(lambda done: self._release(key, done))
+        return task, True
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        flight = self._in_flight.get(key)
+        if flight and flight[0] is task:
+            del self._in_flight[key]
+        # Retrieve the exception so abandoned failures are not logged as unhandled
+        if not task.cancelled():
+            task.exception()
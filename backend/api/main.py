@@ -1,10 +1,19 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from backend.models.schemas import (
     QueryRequest, QueryResponse, GraphStatsResponse, HealthResponse
 )
-from backend.agents.graph_agent import MovieAgentSystem
-from backend.graphrag.neo4j_client import Neo4jClient
+from backend.agents.llm_gateway import Deadline, DeadlineExceeded, deadline_scope
+from backend.api.coalescing import SingleFlight, normalize_query
+from backend.api.scheduler import AdmissionScheduler, Overloaded
+from backend.api.warmup import Warmup
+from backend.profiling import PROFILE_DIR, exclusive_profiler
+from backend import config
+from typing import Optional
+import asyncio
+import secrets
 import time
 from dotenv import load_dotenv
 import os
@@ -42,25 +51,119 @@ app.add_middleware(
 # Initialize components
 agent_system = None
 neo4j_client = None
+# Read-only tables shared by every request (and, under backend.serve, every worker)
+shared_tables = {}
+
+# Identical /ask requests in flight at the same time share one agent run
+ask_flights = SingleFlight()
+# Bounded concurrency per endpoint class; lookups are admitted before agent runs
+scheduler = AdmissionScheduler()
+
+def overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def check_profile_token(token: str):
+    """Profiling is admin-only: the header must carry the configured PROFILE_TOKEN"""
+    # Headers are decoded as latin-1, and compare_digest only takes ASCII strings
+    if not (config.PROFILE_TOKEN
+            and secrets.compare_digest(token.encode('latin-1'), config.PROFILE_TOKEN.encode())):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+# Heavy modules (torch, langgraph, langchain_groq, neo4j) are imported by
+# these steps, in a background thread, so the server starts serving at once
+def load_embedder():
+    from backend.graphrag.embeddings import embedding_mismatch, get_embedder
+    mismatch = embedding_mismatch()
+    if mismatch:
+        print(f"❌ Embedding mismatch: {mismatch}")
+    get_embedder().encode("warmup")
+
+def load_tables():
+    if shared_tables:
+        return
+    from backend.graphrag.cypher_templates import EntityDictionary
+    from backend.graphrag.graph_snapshot import shared_snapshots
+    from backend.graphrag.movie_columns import MovieColumns
+    from backend.graphrag.recommendations import NeighbourIndex
+    shared_snapshots().current()
+    shared_tables.update(
+        neighbours=NeighbourIndex.load_or_build(),
+        columns=MovieColumns.load_or_build(),
+        entities=EntityDictionary.load()
+    )
+
+def preload():
+    """Load what can be shared across forked workers, without opening connections or threads.
+
+    Run by backend.serve in the master process before forking: the agent
+    modules, the embedding model weights and the read-only tables are then
+    shared copy-on-write. The model's warmup encode is left to each worker,
+    since torch's thread pool does not survive a fork.
+    """
+    import backend.agents.graph_agent  # noqa: F401 (langgraph, langchain, neo4j)
+    load_tables()
+    # An onnxruntime session starts its thread pool as soon as it is created,
+    # so with the ONNX backends each worker loads its own (small) session
+    if config.EMBEDDING_BACKEND == "torch":
+        from backend.graphrag.embeddings import get_embedder
+        get_embedder()
+
+def connect_neo4j():
+    global neo4j_client
+    from backend.graphrag.neo4j_client import Neo4jClient
+    client = Neo4jClient()
+    try:
+        client.execute_cypher("RETURN 1")
+    except Exception:
+        client.close()
+        raise
+    neo4j_client = client
+
+def check_indexes():
+    online = {
+        row['name'] for row in neo4j_client.execute_cypher(
+            "SHOW INDEXES YIELD name, state WHERE state = 'ONLINE' RETURN name"
+        )
+    }
+    missing = {'movie_embeddings', 'movie_text'} - online
+    if missing:
+        raise RuntimeError(f"indexes not online: {', '.join(sorted(missing))}")
+
+def build_agent():
+    global agent_system
+    from backend.agents.graph_agent import MovieAgentSystem
+    agent_system = MovieAgentSystem(neo4j=neo4j_client, **shared_tables)
+
+warmup = Warmup([
+    ("embedder", load_embedder),
+    ("tables", load_tables),
+    ("neo4j", connect_neo4j),
+    ("indexes", check_indexes),
+    ("agent", build_agent),
+])
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize components on startup"""
-    global agent_system, neo4j_client
-    
-    try:
-        agent_system = MovieAgentSystem()
-        neo4j_client = Neo4jClient()
-        print("✅ Agent system initialized")
-    except Exception as e:
-        print(f"❌ Initialization error: {e}")
+    """Start warming up in the background; /readyz reports when it is done"""
+    warmup.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    warmup.stop()
     if neo4j_client:
         neo4j_client.close()
 
+@app.get("/healthz")
+async def liveness():
+    """Liveness: the process is up and serving, whatever the warmup state"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: 200 once every warmup step succeeded, 503 with their state until then"""
+    return JSONResponse(warmup.report(), status_code=200 if warmup.ready else 503)
+
 @app.get("/", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -87,30 +190,108 @@ async def health_check():
     )
 
 @app.post("/ask", response_model=QueryResponse)
-async def ask_question(request: QueryRequest):
+async def ask_question(request: QueryRequest, x_request_timeout: Optional[float] = Header(None, gt=0),
+                       x_profile_token: Optional[str] = Header(None)):
     """Main query endpoint"""
+    if x_profile_token is not None:
+        check_profile_token(x_profile_token)
+    
     if not agent_system:
-        raise HTTPException(status_code=503, detail="Agent system not initialized")
+        raise HTTPException(
+            status_code=503,
+            detail="Agent system is warming up",
+            headers={"Retry-After": str(int(config.WARMUP_RETRY_SECONDS))}
+        )
     
-    try:
-        start_time = time.time()
-        
-        # Run agent
-        result = agent_system.run(request.query)
-        
-        execution_time = time.time() - start_time
-        
+    # Clients may ask for a tighter deadline than the server default
+    timeout = min(x_request_timeout or config.REQUEST_TIMEOUT_SECONDS, config.REQUEST_TIMEOUT_SECONDS)
+    
+    def run_agent(deadline: Deadline):
+        # Every LLM call shares the run's deadline, which counts the time spent
+        # waiting for admission and is the latest of the requests sharing the run
+        with deadline_scope(deadline):
+            return agent_system.run(request.query, session_id=request.session_id)
+    
+    def to_response(result) -> QueryResponse:
         return QueryResponse(
             answer=result["answer"],
             tool_calls=result["tool_calls"],
             reasoning=result["reasoning"],
             context_used=result["context_used"],
-            execution_time=round(execution_time, 2)
+            execution_time=round(time.time() - start_time, 2),
+            token_stats=result.get("token_stats"),
+            session_id=request.session_id
         )
     
+    def profile_agent(deadline: Deadline):
+        # The response is built inside the profile so its validation is measured too
+        with exclusive_profiler() as profiler:
+            if profiler is None:
+                raise HTTPException(status_code=409, detail="Another request is being profiled")
+            with profiler.profile():
+                response = to_response(run_agent(deadline))
+            response.profile = profiler.report(profiler.save(f"ask-{time.time_ns()}"))
+            return response
+    
+    async def admitted_run(fn, deadline: Deadline):
+        # Only the run itself takes an agent slot; coalesced duplicates wait for free
+        async with scheduler.slot("agent", max(deadline.remaining(), 0)):
+            return await run_in_threadpool(fn, deadline)
+    
+    key = (normalize_query(request.query), request.top_k, request.session_id)
+    
+    async def shared_run():
+        # Runs once the flight is registered: its deadline is extended by every
+        # request joining it, and each request still waits only its own timeout
+        return await admitted_run(run_agent, ask_flights.deadline(key))
+    
+    try:
+        start_time = time.time()
+        
+        if x_profile_token is not None:
+            # Profiled runs are never shared with other requests. The run is
+            # shielded like a shared one, so a timed out request does not give
+            # its agent slot back while the thread is still running
+            deadline = Deadline.after(timeout)
+            run = asyncio.ensure_future(admitted_run(profile_agent, deadline))
+            run.add_done_callback(lambda done: done.cancelled() or done.exception())
+            return await asyncio.wait_for(asyncio.shield(run), timeout)
+        
+        # Run agent off the event loop, joining an identical run already in flight.
+        # Requests that joined a run which was then shed try again on their own.
+        result = await ask_flights.do(key, shared_run, timeout=timeout, retry_on=(Overloaded,))
+        
+        return to_response(result)
+    
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise overloaded(e)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Request exceeded its {timeout:.1f}s deadline")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def get_metrics():
+    """Request coalescing and admission counters; each coalesced request skipped a full agent run"""
+    return {
+        'ask': {**ask_flights.stats, 'in_flight': ask_flights.in_flight},
+        'scheduler': scheduler.metrics()
+    }
+
+@app.get("/profiles/{name}", response_class=PlainTextResponse)
+async def get_profile(name: str, x_profile_token: str = Header(...)):
+    """Collapsed stacks of a profiled request, for flamegraph.pl, speedscope or inferno"""
+    check_profile_token(x_profile_token)
+    path = os.path.join(PROFILE_DIR, f"{os.path.basename(name)}.folded")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    with open(path, 'r') as f:
+        return f.read()
+
 @app.get("/graph-info", response_model=GraphStatsResponse)
 async def get_graph_info():
     """Get knowledge graph statistics"""
@@ -118,7 +299,8 @@ async def get_graph_info():
         raise HTTPException(status_code=503, detail="Neo4j not connected")
     
     try:
-        stats = neo4j_client.get_graph_stats()
+        async with scheduler.slot("lookup", config.LOOKUP_TIMEOUT_SECONDS):
+            stats = await run_in_threadpool(neo4j_client.get_graph_stats)
         
         return GraphStatsResponse(
             total_movies=stats['movies'],
@@ -127,6 +309,8 @@ async def get_graph_info():
             total_relationships=stats['relationships']
         )
     
+    except Overloaded as e:
+        raise overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -137,7 +321,8 @@ async def get_movie(title: str):
         raise HTTPException(status_code=503, detail="Neo4j not connected")
     
     try:
-        context = neo4j_client.get_movie_context(title)
+        async with scheduler.slot("lookup", config.LOOKUP_TIMEOUT_SECONDS):
+            context = await run_in_threadpool(neo4j_client.get_movie_context, title)
         
         if not context:
             raise HTTPException(status_code=404, detail="Movie not found")
@@ -146,6 +331,8 @@ async def get_movie(title: str):
     
     except HTTPException:
         raise
+    except Overloaded as e:
+        raise overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
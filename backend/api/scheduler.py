@@ -0,0 +1,159 @@
+from contextlib import asynccontextmanager
+from typing import Dict, List
+from backend import config
+import itertools
+import asyncio
+import bisect
+import math
+import time
+
+
+class Overloaded(Exception):
+    """The request cannot start within its deadline; the client should retry later"""
+
+    def __init__(self, lane: str, retry_after: float):
+        super().__init__(f"Server busy: '{lane}' requests would not start within their deadline")
+        self.lane = lane
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Lane:
+    """One endpoint class: its priority, concurrency cap, queue bound and observed service time"""
+
+    def __init__(self, name: str, priority: int, limit: int, max_queue: int, service_time: float):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.max_queue = max_queue
+        self.service_time = service_time
+        self.active = 0
+        self.queued = 0
+        self.stats = {'admitted': 0, 'queued': 0, 'shed': 0, 'expired': 0}
+
+    def observe(self, duration: float, alpha: float = 0.2):
+        self.service_time += alpha * (duration - self.service_time)
+
+
+class AdmissionScheduler:
+    """Deadline-aware admission control shared by the API endpoints.
+
+    At most `capacity` requests run at once, and each lane is further
+    capped by its own limit (agent runs get a small share so lookups keep
+    flowing during a spike). When a slot frees up, waiters are served by
+    lane priority, then earliest deadline. A request whose expected wait
+    exceeds its deadline, or whose lane queue is full, is rejected at once
+    with `Overloaded` instead of queueing for nothing.
+    """
+
+    def __init__(self, capacity: int = None, lanes: List[Lane] = None):
+        self.capacity = capacity or config.SCHEDULER_MAX_CONCURRENCY
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in (lanes or default_lanes())}
+        self.active = 0
+        # Sorted (priority, deadline, sequence, lane, future) entries
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    def _has_room(self, lane: Lane) -> bool:
+        return self.active < self.capacity and lane.active < lane.limit
+
+    def expected_wait(self, lane: Lane) -> float:
+        """Rough wait for a new request: the queue ahead of it drained at the lane's service rate"""
+        ahead = sum(1 for entry in self._waiters if entry[0] <= lane.priority)
+        slots = max(min(lane.limit, self.capacity), 1)
+        return math.ceil((ahead + 1) / slots) * lane.service_time
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str, timeout: float):
+        """Hold a slot of `lane_name` for the body, waiting at most `timeout` seconds"""
+        lane = self.lanes[lane_name]
+        deadline = time.monotonic() + timeout
+
+        if self._has_room(lane) and not any(entry[0] <= lane.priority for entry in self._waiters):
+            self._grant(lane)
+        else:
+            wait = self.expected_wait(lane)
+            if lane.queued >= lane.max_queue or wait > timeout:
+                lane.stats['shed'] += 1
+                raise Overloaded(lane.name, wait)
+            await self._enqueue(lane, deadline)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            lane.observe(time.monotonic() - started)
+            lane.active -= 1
+            self.active -= 1
+            self._dispatch()
+
+    async def _enqueue(self, lane: Lane, deadline: float):
+        future = asyncio.get_running_loop().create_future()
+        entry = (lane.priority, deadline, next(self._sequence), lane, future)
+        # The sequence number is unique, so entries never compare beyond it
+        bisect.insort(self._waiters, entry)
+        lane.queued += 1
+        lane.stats['queued'] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self._abandon(lane, entry)
+            lane.stats['expired'] += 1
+            raise Overloaded(lane.name, lane.service_time)
+        except asyncio.CancelledError:
+            self._abandon(lane, entry)
+            raise
+
+    def _abandon(self, lane: Lane, entry):
+        future = entry[4]
+        if future.done():
+            # Granted just as the waiter gave up: hand the slot back
+            lane.active -= 1
+            self.active -= 1
+            self._dispatch()
+        else:
+            future.cancel()
+            self._waiters.remove(entry)
+            lane.queued -= 1
+
+    def _grant(self, lane: Lane):
+        lane.active += 1
+        self.active += 1
+        lane.stats['admitted'] += 1
+
+    def _dispatch(self):
+        """Start waiters in priority order while their lanes have room"""
+        for entry in list(self._waiters):
+            if self.active >= self.capacity:
+                break
+            lane, future = entry[3], entry[4]
+            if self._has_room(lane):
+                self._waiters.remove(entry)
+                lane.queued -= 1
+                self._grant(lane)
+                future.set_result(None)
+
+    def metrics(self) -> Dict:
+        return {
+            'active': self.active,
+            'capacity': self.capacity,
+            'lanes': {
+                name: {
+                    **lane.stats,
+                    'active': lane.active,
+                    'waiting': lane.queued,
+                    'limit': lane.limit,
+                    'service_time': round(lane.service_time, 3)
+                }
+                for name, lane in self.lanes.items()
+            }
+        }
+
+
+def default_lanes() -> List[Lane]:
+    """Cheap graph lookups first, agent runs second"""
+    return [
+        Lane('lookup', priority=0, limit=config.SCHEDULER_MAX_CONCURRENCY,
+             max_queue=config.LOOKUP_MAX_QUEUE, service_time=0.05),
+        Lane('agent', priority=1, limit=config.AGENT_MAX_CONCURRENCY,
+             max_queue=config.AGENT_MAX_QUEUE, service_time=5.0),
+    ]
@@ -0,0 +1,74 @@
+from typing import Callable, Dict, List, Tuple
+from backend import config
+import threading
+import time
+
+
+class Warmup:
+    """Runs startup steps in a background thread and reports their state.
+
+    Steps run in order; a failing step is retried every `retry_seconds`
+    (e.g. while Neo4j is still starting) and the steps after it wait.
+    The API is ready once every step has succeeded.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], None]]], retry_seconds: float = None):
+        self.steps = steps
+        self.retry_seconds = retry_seconds if retry_seconds is not None else config.WARMUP_RETRY_SECONDS
+        self.state: Dict[str, Dict] = {name: {'status': 'pending'} for name, _ in steps}
+        self.started_at = None
+        self.ready_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until warmup finished (tests, pre-fork servers); True if ready"""
+        if self._thread:
+            self._thread.join(timeout)
+        return self.ready
+
+    def run(self):
+        self.started_at = self.started_at or time.monotonic()
+        for name, step in self.steps:
+            attempts = 0
+            while not self._stop.is_set():
+                attempts += 1
+                self.state[name] = {'status': 'running', 'attempts': attempts}
+                started = time.monotonic()
+                try:
+                    step()
+                except Exception as e:
+                    self.state[name] = {'status': 'failed', 'attempts': attempts, 'error': str(e)}
+                    print(f"❌ Warmup step '{name}' failed (attempt {attempts}): {e}")
+                    self._stop.wait(self.retry_seconds)
+                    continue
+                self.state[name] = {
+                    'status': 'ok',
+                    'attempts': attempts,
+                    'seconds': round(time.monotonic() - started, 3)
+                }
+                break
+            if self._stop.is_set():
+                return
+        self.ready_at = time.monotonic()
+        print(f"✅ Warmup completed in {self.ready_at - self.started_at:.1f}s")
+
+    def report(self) -> Dict:
+        return {
+            'status': 'ready' if self.ready else 'warming_up',
+            'uptime': round(time.monotonic() - self.started_at, 3) if self.started_at else 0.0,
+            'warmup_seconds': round(self.ready_at - self.started_at, 3) if self.ready else None,
+            'steps': self.state
+        }
@@ -1,7 +1,10 @@
 import click
+import json
 import os
+import time
 from dotenv import load_dotenv
 from backend.agents.graph_agent import MovieAgentSystem
+from backend.profiling import Profiler
 
 # Load environment variables
 load_dotenv(dotenv_path='backend/.env')
@@ -9,7 +12,8 @@ load_dotenv(dotenv_path='backend/.env')
 @click.command()
 @click.option('--query', '-q', help='Query to ask')
 @click.option('--interactive', '-i', is_flag=True, help='Interactive mode')
-def cli(query, interactive):
+@click.option('--profile', is_flag=True, help='Profile the --query run (collapsed stacks and allocations)')
+def cli(query, interactive, profile):
     """CLI interface for the movie agent system"""
     agent = MovieAgentSystem()
     
@@ -26,6 +30,17 @@ def cli(query, interactive):
             except Exception as e:
                 click.echo(f" Error: {e}")
     
+    elif query and profile:
+        profiler = Profiler()
+        try:
+            with profiler.profile():
+                result = agent.run(query)
+            click.echo(result.get('answer', 'No answer generated.'))
+        except Exception as e:
+            click.echo(f" Error: {e}")
+        report = profiler.report(profiler.save(f"cli-{time.time_ns()}"))
+        click.echo(json.dumps(report, indent=2), err=True)
+    
     elif query:
         try:
             result = agent.run(query)
@@ -0,0 +1,88 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path='backend/.env')
+
+# API worker processes on this node (python -m backend.serve). Connection and
+# concurrency budgets marked "per node" are split evenly between them.
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+
+def per_worker(budget: int) -> int:
+    return max(budget // WEB_CONCURRENCY, 1)
+
+# Context assembly (approximate LLM tokens)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+TOOL_RESULTS_TOKEN_BUDGET = int(os.getenv("TOOL_RESULTS_TOKEN_BUDGET", "800"))
+
+# Query embeddings (must match the model used by scripts/prepare_data.py)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch" (sentence-transformers), or the ONNX export of EMBEDDING_MODEL run
+# through onnxruntime: "onnx" (fp32) or "onnx-int8" (dynamically quantized).
+# Export it with scripts/export_onnx_embedder.py. Catalog embeddings must
+# come from the same model and backend: re-run scripts/prepare_data.py after
+# changing either (the API warns at warmup when they differ).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Derived from EMBEDDING_MODEL, so changing the model never picks up a stale export
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", f"data/models/{EMBEDDING_MODEL.rsplit('/', 1)[-1]}-onnx")
+
+# Neo4j driver connection pool, per node
+NEO4J_MAX_CONNECTIONS = per_worker(int(os.getenv("NEO4J_MAX_CONNECTIONS", "100")))
+
+# Vector search: "neo4j" (vector index) or an in-process index exported by the
+# loader, scanned as "int8" or "binary" codes then reranked in float32 ("float32": exact scan)
+VECTOR_SEARCH_BACKEND = os.getenv("VECTOR_SEARCH_BACKEND", "neo4j")
+VECTOR_RERANK_OVERSAMPLE = int(os.getenv("VECTOR_RERANK_OVERSAMPLE", "10"))
+
+# LLM models. Cheap planning steps run on the fast model; the large model
+# writes the final answer and takes over when fast output fails validation.
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant")
+LLM_TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
+NODE_MODELS = {
+    "analyze_query": os.getenv("LLM_MODEL_ANALYZE_QUERY", LLM_FAST_MODEL),
+    "reason_with_tools": os.getenv("LLM_MODEL_REASON_WITH_TOOLS", LLM_FAST_MODEL),
+    "generate_answer": os.getenv("LLM_MODEL_GENERATE_ANSWER", LLM_MODEL),
+}
+
+# LLM gateway
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8"))
+# Per node
+LLM_MAX_CONCURRENCY = per_worker(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+LLM_HTTP_MAX_CONNECTIONS = per_worker(int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20")))
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# API
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "60"))
+LOOKUP_TIMEOUT_SECONDS = float(os.getenv("LOOKUP_TIMEOUT_SECONDS", "5"))
+# Profiling: requests sent with `X-Profile-Token: <PROFILE_TOKEN>` run under
+# the sampling profiler (disabled while unset)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Seconds between attempts of a failed warmup step (e.g. Neo4j still starting)
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+# Admission control: requests running at once (all endpoints), the share
+# agent runs may take, and how many requests may wait per endpoint class.
+# Per node: each worker schedules its own requests
+SCHEDULER_MAX_CONCURRENCY = per_worker(int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "16")))
+AGENT_MAX_CONCURRENCY = per_worker(int(os.getenv("AGENT_MAX_CONCURRENCY", "4")))
+AGENT_MAX_QUEUE = per_worker(int(os.getenv("AGENT_MAX_QUEUE", "32")))
+LOOKUP_MAX_QUEUE = per_worker(int(os.getenv("LOOKUP_MAX_QUEUE", "128")))
+
+# Conversation sessions (in-memory, per API process)
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "6"))
+SESSION_MAX_MOVIES = int(os.getenv("SESSION_MAX_MOVIES", "10"))
+SESSION_SUMMARY_TOKEN_BUDGET = int(os.getenv("SESSION_SUMMARY_TOKEN_BUDGET", "200"))
+
+# Connection questions (bounded path search)
+PATH_MAX_HOPS = int(os.getenv("PATH_MAX_HOPS", "4"))
+PATH_MAX_DEGREE = int(os.getenv("PATH_MAX_DEGREE", "50"))
+PATH_EXPANSION_BUDGET = int(os.getenv("PATH_EXPANSION_BUDGET", "500"))
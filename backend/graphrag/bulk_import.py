@@ -0,0 +1,125 @@
+from typing import Dict, Iterable, List
+import csv
+import os
+import shutil
+import uuid
+
+IMPORT_DIR = 'data/processed/import'
+
+# file -> header, in neo4j-admin import format. Genres and keywords are keyed
+# by name, like the MERGE keys of the transactional loader.
+NODE_FILES = {
+    'Movie': ('movies.csv', ['id:ID(Movie)', 'title', 'year:int', 'rating:double', 'budget:long',
+                             'revenue:long', 'overview', 'embedding:double[]']),
+    'Person': ('people.csv', ['id:ID(Person)', 'name', 'birth_year:int']),
+    'Genre': ('genres.csv', ['name:ID(Genre)', 'id']),
+    'Keyword': ('keywords.csv', ['term:ID(Keyword)', 'id']),
+    'Studio': ('studios.csv', ['id:ID(Studio)', 'name', 'country', 'founded_year:int']),
+}
+RELATIONSHIP_FILES = {
+    'DIRECTED': ('directed.csv', [':START_ID(Person)', ':END_ID(Movie)', 'year:int']),
+    'ACTED_IN': ('acted_in.csv', [':START_ID(Person)', ':END_ID(Movie)', 'role', 'order:int']),
+    'HAS_GENRE': ('has_genre.csv', [':START_ID(Movie)', ':END_ID(Genre)', 'relevance:double']),
+    'HAS_KEYWORD': ('has_keyword.csv', [':START_ID(Movie)', ':END_ID(Keyword)']),
+    'PRODUCED_BY': ('produced_by.csv', [':START_ID(Movie)', ':END_ID(Studio)', 'year:int']),
+}
+ARRAY_DELIMITER = ';'
+
+
+def _value(value) -> str:
+    # Empty fields leave the property unset, like a null parameter in SET
+    return '' if value is None else value
+
+
+def write_import_csvs(movies: Iterable[Dict], directory: str = IMPORT_DIR) -> Dict[str, int]:
+    """Write node and relationship CSVs for `neo4j-admin database import full`.
+
+    Movies and relationships are streamed to disk as they are read; only
+    the smaller Person/Genre/Keyword/Studio tables are held until the end,
+    since a person's properties may be completed by a later movie (actors
+    have no birth year). Duplicates are dropped the way the transactional
+    loader's MERGE would. Returns the row count of every file.
+    """
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    files, writers = [], {}
+    for name, (filename, header) in {**NODE_FILES, **RELATIONSHIP_FILES}.items():
+        f = open(os.path.join(tmp_dir, filename), 'w', newline='')
+        files.append(f)
+        writers[name] = csv.writer(f)
+        writers[name].writerow(header)
+    counts = {filename: 0 for filename, _ in {**NODE_FILES, **RELATIONSHIP_FILES}.values()}
+
+    def write(name, row):
+        writers[name].writerow([_value(value) for value in row])
+        counts[NODE_FILES.get(name, RELATIONSHIP_FILES.get(name))[0]] += 1
+
+    movie_ids = set()
+    people, genres, keywords, studios = {}, {}, {}, {}
+    acted = set()
+    try:
+        for movie in movies:
+            if movie['id'] in movie_ids:
+                continue
+            movie_ids.add(movie['id'])
+            embedding = movie.get('embedding')
+            write('Movie', [
+                movie['id'], movie.get('title'), movie.get('year'), movie.get('rating'), movie.get('budget'),
+                movie.get('revenue'), movie.get('overview'),
+                ARRAY_DELIMITER.join(map(repr, embedding)) if embedding else None
+            ])
+
+            for genre in dict.fromkeys(movie.get('genres', [])):
+                genres.setdefault(genre, str(uuid.uuid4()))
+                write('HAS_GENRE', [movie['id'], genre, 1.0])
+            for keyword in dict.fromkeys(movie.get('keywords', [])):
+                keywords.setdefault(keyword, str(uuid.uuid4()))
+                write('HAS_KEYWORD', [movie['id'], keyword])
+
+            director = movie.get('director')
+            if director:
+                person = people.setdefault(director['id'], {})
+                person.update(name=director['name'], birth_year=director.get('birth_year'))
+                write('DIRECTED', [director['id'], movie['id'], movie.get('year')])
+
+            for actor in movie.get('actors', []):
+                people.setdefault(actor['id'], {})['name'] = actor['name']
+                key = (actor['id'], movie['id'], actor.get('role'), actor.get('order'))
+                if key not in acted:
+                    acted.add(key)
+                    write('ACTED_IN', [actor['id'], movie['id'], actor.get('role'), actor.get('order')])
+
+            studio = movie.get('studio')
+            if studio:
+                studios[studio['id']] = studio
+                write('PRODUCED_BY', [movie['id'], studio['id'], movie.get('year')])
+
+        for person_id, person in people.items():
+            write('Person', [person_id, person.get('name'), person.get('birth_year')])
+        for name, genre_id in genres.items():
+            write('Genre', [name, genre_id])
+        for term, keyword_id in keywords.items():
+            write('Keyword', [term, keyword_id])
+        for studio_id, studio in studios.items():
+            write('Studio', [studio_id, studio.get('name'), studio.get('country'), studio.get('founded_year')])
+    finally:
+        for f in files:
+            f.close()
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(tmp_dir, directory)
+    return counts
+
+
+def import_command(directory: str = IMPORT_DIR, database: str = 'neo4j') -> List[str]:
+    """neo4j-admin arguments importing the CSVs in `directory` (as seen by neo4j-admin) into `database`"""
+    return [
+        'neo4j-admin', 'database', 'import', 'full', database,
+        '--overwrite-destination',
+        f'--array-delimiter={ARRAY_DELIMITER}',
+        *(f'--nodes={label}={directory}/{filename}' for label, (filename, _) in NODE_FILES.items()),
+        *(f'--relationships={rel_type}={directory}/{filename}'
+          for rel_type, (filename, _) in RELATIONSHIP_FILES.items()),
+    ]
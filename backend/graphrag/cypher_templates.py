@@ -0,0 +1,177 @@
+from typing import Dict, List, Optional, Tuple
+from backend.graphrag.recommendations import GENRE_ALIASES
+import json
+import re
+
+MOVIES_PATH = 'data/processed/movies_with_embeddings.json'
+
+# Pre-validated, parameterized Cypher for the most common question shapes.
+# intent -> (trigger, required slots, excluded slots, query)
+TEMPLATES = {
+    'director_of': (
+        re.compile(r"\b(?:direct(?:ed|or|s)?|helmed)\b", re.IGNORECASE),
+        ('title',), ('person',),
+        """
+        MATCH (d:Person)-[:DIRECTED]->(m:Movie {title: $title})
+        RETURN m.title as title, d.name as director
+        """
+    ),
+    'cast_of': (
+        re.compile(r"\b(?:cast|actors?|actress(?:es)?|star(?:s|red|ring)?|acted|plays?|played)\b", re.IGNORECASE),
+        ('title',), ('person',),
+        """
+        MATCH (p:Person)-[r:ACTED_IN]->(m:Movie {title: $title})
+        RETURN m.title as title, p.name as actor, r.role as role
+        ORDER BY r.order
+        """
+    ),
+    'rating_of': (
+        re.compile(r"\b(?:rating|rated|score|how good)\b", re.IGNORECASE),
+        ('title',), ('person', 'min_rating'),
+        """
+        MATCH (m:Movie {title: $title})
+        RETURN m.title as title, m.year as year, m.rating as rating
+        """
+    ),
+    'movies_by_person': (
+        re.compile(r"\b(?:movies?|films?|filmography|direct(?:ed)?|star(?:red)?|acted|appear(?:ed)?)\b", re.IGNORECASE),
+        ('person',), ('title', 'genre'),
+        """
+        MATCH (p:Person {name: $person})-[r:ACTED_IN|DIRECTED]->(m:Movie)
+        RETURN m.title as title, m.year as year, m.rating as rating, type(r) as credit
+        ORDER BY m.year
+        """
+    ),
+    'genre_above_rating': (
+        re.compile(r"\b(?:movies?|films?)\b", re.IGNORECASE),
+        ('genre', 'min_rating'), ('title', 'person'),
+        """
+        MATCH (m:Movie)-[:HAS_GENRE]->(:Genre {name: $genre})
+        WHERE m.rating > $min_rating
+        RETURN m.title as title, m.year as year, m.rating as rating
+        ORDER BY m.rating DESC
+        LIMIT 20
+        """
+    ),
+}
+
+# "above 8", "rated over 7.5", "higher than 8", "> 8"
+RATING_PATTERN = re.compile(
+    r"(?:above|over|more than|higher than|better than|greater than|at least|>=?)\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE
+)
+
+# Questions that aggregate or compare need the LLM's tool plan, not one template
+AGGREGATE_PATTERN = re.compile(
+    r"\b(?:calculate|compute|average|mean|median|sum|total|ratio|percent(?:age)?|roi|compare|comparison"
+    r"|versus|vs|difference|how many|count|highest|lowest)\b",
+    re.IGNORECASE
+)
+
+
+def _alternation(names: List[str]) -> Optional[re.Pattern]:
+    """Longest names first, so "The Matrix Reloaded" wins over "The Matrix" """
+    names = sorted(names, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(name) for name in names) + r")\b") if names else None
+
+
+class EntityDictionary:
+    """In-memory dictionary of catalog titles, people and genres, for slot filling"""
+
+    def __init__(self, titles: List[str], people: List[str], genres: List[str]):
+        self.titles = {title.lower(): title for title in titles}
+        self.people = {name.lower(): name for name in people}
+        self.genres = {genre.lower(): genre for genre in genres}
+        for alias, genre in GENRE_ALIASES.items():
+            if genre in self.genres:
+                self.genres.setdefault(alias, self.genres[genre])
+        self._tables = {'title': self.titles, 'person': self.people, 'genre': self.genres}
+        self._patterns = {kind: _alternation(list(table)) for kind, table in self._tables.items()}
+
+    @classmethod
+    def from_movies(cls, movies: List[Dict]) -> "EntityDictionary":
+        people = set()
+        for movie in movies:
+            if (movie.get('director') or {}).get('name'):
+                people.add(movie['director']['name'])
+            people.update(actor['name'] for actor in movie.get('actors', []) if actor.get('name'))
+        return cls(
+            [movie['title'] for movie in movies],
+            sorted(people),
+            sorted({genre for movie in movies for genre in movie.get('genres', [])})
+        )
+
+    @classmethod
+    def load(cls, movies_path: str = MOVIES_PATH) -> "EntityDictionary":
+        with open(movies_path, 'r') as f:
+            return cls.from_movies(json.load(f))
+
+    def find(self, kind: str, text: str) -> List[Tuple[str, Tuple[int, int]]]:
+        """(canonical name, span) of every `kind` entity mentioned in `text`"""
+        pattern = self._patterns[kind]
+        if not pattern:
+            return []
+        table = self._tables[kind]
+        found = []
+        for match in pattern.finditer(text.lower()):
+            name = table[match.group(1)]
+            # Short titles such as "Up" or "Her" only count when written as titles
+            if kind == 'title' and len(name) <= 4 and name not in text:
+                continue
+            found.append((name, match.span()))
+        return found
+
+
+class CypherTemplateMatcher:
+    """Maps a question onto a Cypher template by filling its slots from the entity dictionary"""
+
+    def __init__(self, entities: EntityDictionary):
+        self.entities = entities
+
+    def slots(self, query: str) -> Dict[str, List]:
+        """Every distinct entity of each slot kind mentioned in `query`"""
+        titles = self.entities.find('title', query)
+
+        def outside_titles(found):
+            # A name inside a matched title ("Jackie Brown", "Last Action Hero") is part of the title
+            return [
+                (name, span) for name, span in found
+                if not any(span[0] < end and start < span[1] for _, (start, end) in titles)
+            ]
+
+        found = {
+            'title': titles,
+            'person': outside_titles(self.entities.find('person', query)),
+            'genre': outside_titles(self.entities.find('genre', query)),
+        }
+        slots = {
+            kind: list(dict.fromkeys(name for name, _ in entities))
+            for kind, entities in found.items() if entities
+        }
+        ratings = RATING_PATTERN.findall(query)
+        if ratings:
+            slots['min_rating'] = list(dict.fromkeys(float(rating) for rating in ratings))
+        return slots
+
+    def match(self, query: str) -> Optional[Dict]:
+        """The first template whose trigger and slots fit `query`, with its parameters.
+
+        Questions naming several entities for one slot ("Who directed
+        Inception and Interstellar?") or asking for an aggregate are left to
+        the LLM rather than answered for only part of the question.
+        """
+        if AGGREGATE_PATTERN.search(query):
+            return None
+        slots = self.slots(query)
+        for intent, (trigger, required, excluded, cypher) in TEMPLATES.items():
+            if (trigger.search(query)
+                    and all(slot in slots for slot in required)
+                    and not any(slot in slots for slot in excluded)):
+                if any(len(slots[slot]) > 1 for slot in required):
+                    return None
+                return {
+                    'intent': intent,
+                    'cypher': " ".join(cypher.split()),
+                    'params': {slot: slots[slot][0] for slot in required}
+                }
+        return None
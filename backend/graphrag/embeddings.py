@@ -0,0 +1,132 @@
+from typing import List, Optional, Union
+from backend import config
+import numpy as np
+import json
+import os
+import threading
+
+# EMBEDDING_BACKEND -> ONNX file, relative to ONNX_MODEL_DIR
+# (written by scripts/export_onnx_embedder.py)
+ONNX_FILES = {
+    'onnx': 'onnx/model.onnx',
+    'onnx-int8': 'onnx/model_qint8.onnx',
+}
+EMBEDDING_BACKENDS = ('torch', *ONNX_FILES)
+
+# Model and backend that embedded the catalog, written by scripts/prepare_data.py
+EMBEDDING_INFO_PATH = 'data/processed/embedding_info.json'
+
+_lock = threading.Lock()
+_embedder = None
+
+
+def mean_pool(hidden_states: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average of the token embeddings, ignoring padding (the model's pooling layer)"""
+    mask = attention_mask[..., None].astype(hidden_states.dtype)
+    return (hidden_states * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+class OnnxEmbedder:
+    """Sentence embeddings from an exported ONNX model, without torch.
+
+    Tokenizes with `tokenizers` and runs the transformer through
+    onnxruntime, then applies the model's mean pooling and normalization in
+    NumPy. `encode` mirrors SentenceTransformer.encode for the arguments
+    used in this repo.
+    """
+
+    def __init__(self, model_dir: str, file_name: str, threads: int = None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, 'sentence_bert_config.json'), 'r') as f:
+            max_length = json.load(f).get('max_seq_length', 256)
+        with open(os.path.join(model_dir, 'modules.json'), 'r') as f:
+            self.normalize = any(module['type'].endswith('Normalize') for module in json.load(f))
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        # One worker's share of the cores (see WEB_CONCURRENCY)
+        options.intra_op_num_threads = threads or max((os.cpu_count() or 1) // config.WEB_CONCURRENCY, 1)
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, file_name), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **_) -> np.ndarray:
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[start:start + batch_size])
+            inputs = {
+                'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden_states = self.session.run(
+                None, {name: value for name, value in inputs.items() if name in self.input_names}
+            )[0]
+            batches.append(mean_pool(hidden_states, inputs['attention_mask']))
+
+        embeddings = np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+        if self.normalize:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedder(backend: str = None):
+    """A new sentence embedding model on `backend` (default: EMBEDDING_BACKEND)"""
+    backend = backend or config.EMBEDDING_BACKEND
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(config.EMBEDDING_MODEL)
+    if backend in ONNX_FILES:
+        return OnnxEmbedder(config.ONNX_MODEL_DIR, ONNX_FILES[backend])
+    raise ValueError(f"Unknown embedding backend '{backend}'. Use one of: {', '.join(EMBEDDING_BACKENDS)}")
+
+
+def write_embedding_info(path: str = EMBEDDING_INFO_PATH):
+    """Record EMBEDDING_MODEL and EMBEDDING_BACKEND next to the catalog embeddings"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'model': config.EMBEDDING_MODEL, 'backend': config.EMBEDDING_BACKEND}, f)
+    os.replace(tmp_path, path)
+
+
+def embedding_mismatch(path: str = EMBEDDING_INFO_PATH) -> Optional[str]:
+    """Why query embeddings would not be comparable to the catalog's, if they would not be.
+
+    Catalogs prepared before the info file existed are not checked.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        info = json.load(f)
+    expected = {'model': config.EMBEDDING_MODEL, 'backend': config.EMBEDDING_BACKEND}
+    if info == expected:
+        return None
+    return (
+        f"catalog embedded with {info.get('model')} ({info.get('backend')}), queries use "
+        f"{expected['model']} ({expected['backend']}); re-run scripts/prepare_data.py and reload the graph"
+    )
+
+
+def get_embedder():
+    """Process-wide sentence embedding model, loaded on first use.
+
+    sentence_transformers pulls in torch and takes seconds to import, so it
+    is only imported here, by the API warmup or the first retrieval. The
+    ONNX backends do not import torch at all.
+    """
+    global _embedder
+    if _embedder is None:
+        with _lock:
+            if _embedder is None:
+                _embedder = load_embedder()
+    return _embedder
@@ -0,0 +1,270 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import threading
+import json
+import time
+import os
+import shutil
+
+# Every node with its display name and the Movie properties served from the snapshot
+SNAPSHOT_NODES_QUERY = """
+MATCH (n)
+RETURN elementId(n) as key, labels(n)[0] as label, n.id as id,
+       coalesce(n.name, n.title, n.term) as name,
+       n.rating as rating, n.year as year, n.overview as overview
+"""
+
+# Relationships with the value that orders each node's neighbour list:
+# billing order for cast, descending similarity for similar movies
+SNAPSHOT_RELATIONSHIPS_QUERY = """
+MATCH (a)-[r]->(b)
+RETURN elementId(a) as source, type(r) as type, elementId(b) as target,
+       coalesce(r.order, -r.similarity_score, 0.0) as sort
+"""
+
+SNAPSHOT_ROOT = 'data/processed/graph_snapshot'
+POINTER_FILE = 'CURRENT'
+
+
+def _write_strings(directory: str, name: str, values: List[Optional[str]]):
+    """Store strings as one UTF-8 blob plus int64 offsets, so they can be memory-mapped"""
+    encoded = [(value or "").encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    with open(os.path.join(directory, f"{name}.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+
+
+class StringTable:
+    """Memory-mapped string column written by `_write_strings`"""
+
+    def __init__(self, directory: str, name: str):
+        self.offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+        path = os.path.join(directory, f"{name}.bin")
+        self.blob = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+
+def write_snapshot(nodes: List[Dict], relationships: List[Dict], directory: str):
+    """Write nodes and relationships as CSR arrays (per type, both directions) into `directory`"""
+    os.makedirs(directory, exist_ok=True)
+    index = {node['key']: i for i, node in enumerate(nodes)}
+    labels = sorted({node['label'] or '' for node in nodes})
+    label_codes = {label: code for code, label in enumerate(labels)}
+    count = len(nodes)
+
+    np.save(os.path.join(directory, "labels.npy"),
+            np.array([label_codes[node['label'] or ''] for node in nodes], dtype=np.int16))
+    np.save(os.path.join(directory, "rating.npy"),
+            np.array([np.nan if node.get('rating') is None else node['rating'] for node in nodes], dtype=np.float64))
+    np.save(os.path.join(directory, "year.npy"),
+            np.array([node.get('year') or 0 for node in nodes], dtype=np.int32))
+    _write_strings(directory, "names", [node['name'] for node in nodes])
+    _write_strings(directory, "ids", [node.get('id') for node in nodes])
+    _write_strings(directory, "overviews", [node.get('overview') for node in nodes])
+
+    by_type = {}
+    for rel in relationships:
+        if rel['source'] in index and rel['target'] in index:
+            by_type.setdefault(rel['type'], []).append((index[rel['source']], index[rel['target']], rel['sort'] or 0.0))
+
+    for rel_type, edges in by_type.items():
+        sources = np.array([edge[0] for edge in edges], dtype=np.int32)
+        targets = np.array([edge[1] for edge in edges], dtype=np.int32)
+        sort = np.array([edge[2] for edge in edges], dtype=np.float64)
+        for direction, (start, end) in (("out", (sources, targets)), ("in", (targets, sources))):
+            order = np.lexsort((sort, start))
+            offsets = np.zeros(count + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(start, minlength=count))
+            np.save(os.path.join(directory, f"{rel_type}.{direction}.offsets.npy"), offsets)
+            np.save(os.path.join(directory, f"{rel_type}.{direction}.targets.npy"), end[order].astype(np.int32))
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump({
+            'nodes': count,
+            'relationships': {rel_type: len(edges) for rel_type, edges in by_type.items()},
+            'labels': labels,
+            'created_at': time.time()
+        }, f)
+
+
+def publish_snapshot(nodes: List[Dict], relationships: List[Dict], root: str = None, keep: int = 2) -> str:
+    """Write a new snapshot next to the live one and atomically repoint CURRENT at it"""
+    root = root or SNAPSHOT_ROOT
+    name = f"snapshot-{time.time_ns()}"
+    write_snapshot(nodes, relationships, os.path.join(root, name))
+
+    tmp_pointer = os.path.join(root, f"{POINTER_FILE}.tmp")
+    with open(tmp_pointer, "w") as f:
+        f.write(name)
+    os.replace(tmp_pointer, os.path.join(root, POINTER_FILE))
+
+    # Old snapshots may still be mapped by running workers; keep the most recent ones
+    previous = sorted(d for d in os.listdir(root) if d.startswith("snapshot-") and d != name)
+    for stale in previous[:max(len(previous) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(root, stale), ignore_errors=True)
+    return name
+
+
+class GraphSnapshot:
+    """Read-only, memory-mapped CSR view of the movie graph"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.version = os.path.basename(os.path.normpath(directory))
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self.labels = load("labels.npy")
+        self.rating = load("rating.npy")
+        self.year = load("year.npy")
+        self.names = StringTable(directory, "names")
+        self.ids = StringTable(directory, "ids")
+        self.overviews = StringTable(directory, "overviews")
+        self.label_names = self.manifest['labels']
+
+        self.csr = {}
+        for rel_type in self.manifest['relationships']:
+            for direction in ("out", "in"):
+                self.csr[rel_type, direction] = (
+                    load(f"{rel_type}.{direction}.offsets.npy"),
+                    load(f"{rel_type}.{direction}.targets.npy")
+                )
+
+        self.degree = np.zeros(self.manifest['nodes'], dtype=np.int64)
+        for offsets, _ in self.csr.values():
+            self.degree += np.diff(offsets)
+
+        # Entry points: external ids, movie titles and Person/Movie names
+        movie_label = self.label_names.index('Movie') if 'Movie' in self.label_names else -1
+        person_label = self.label_names.index('Person') if 'Person' in self.label_names else -1
+        self.by_id, self.by_title, self.by_name = {}, {}, {}
+        for node in range(len(self.names)):
+            if self.ids[node]:
+                self.by_id[self.ids[node]] = node
+            name = self.names[node].lower()
+            if self.labels[node] == movie_label:
+                self.by_title[name] = node
+                self.by_name[name] = node
+            elif self.labels[node] == person_label:
+                self.by_name.setdefault(name, node)
+
+    def neighbours(self, node: int, rel_type: str, direction: str = "out") -> np.ndarray:
+        """Neighbour node indices over one relationship type, in snapshot order"""
+        if (rel_type, direction) not in self.csr:
+            return np.zeros(0, dtype=np.int32)
+        offsets, targets = self.csr[rel_type, direction]
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def find_movie(self, title: str) -> Optional[str]:
+        """Id of the movie titled `title`, else of the shortest title containing it"""
+        title = title.lower()
+        node = self.by_title.get(title)
+        if node is None:
+            matches = [key for key in self.by_title if title in key]
+            if not matches:
+                return None
+            node = self.by_title[min(matches, key=len)]
+        return self.ids[node]
+
+    def movie_context(self, movie_id: str) -> Dict:
+        """Same shape as `Neo4jClient.get_movie_contexts`, from 1-hop CSR lookups"""
+        node = self.by_id.get(movie_id)
+        if node is None:
+            return {}
+        rating = float(self.rating[node])
+        return {
+            'id': movie_id,
+            'title': self.names[node],
+            'year': int(self.year[node]) or None,
+            'overview': self.overviews[node],
+            'rating': None if np.isnan(rating) else rating,
+            'genres': [self.names[n] for n in self.neighbours(node, "HAS_GENRE")],
+            'directors': [self.names[n] for n in self.neighbours(node, "DIRECTED", "in")],
+            'actors': [self.names[n] for n in self.neighbours(node, "ACTED_IN", "in")[:5]],
+            # A pair can be linked by both the embedding and the metadata method
+            'similar_movies': list(dict.fromkeys(self.names[n] for n in self.neighbours(node, "SIMILAR_TO")))[:3],
+        }
+
+    def resolve(self, name: str) -> Optional[Tuple[int, str]]:
+        """Path search adapter: the Person or Movie named `name`, else the shortest partial match"""
+        name = name.lower()
+        node = self.by_name.get(name)
+        if node is None:
+            matches = [key for key in self.by_name if name in key]
+            if not matches:
+                return None
+            node = self.by_name[min(matches, key=len)]
+        return node, self.names[node]
+
+    def expand(self, keys: List[int], max_degree: int):
+        """Path search adapter: neighbours of `keys`, skipping hubs above `max_degree`"""
+        edges, labels = {}, {}
+        for key in keys:
+            for (rel_type, direction), (offsets, targets) in self.csr.items():
+                for neighbour in targets[offsets[key]:offsets[key + 1]]:
+                    neighbour = int(neighbour)
+                    if self.degree[neighbour] <= max_degree:
+                        edges.setdefault(key, []).append((neighbour, rel_type, direction == "out"))
+                        labels[neighbour] = self.names[neighbour]
+        return edges, labels
+
+
+class SnapshotHolder:
+    """Serves the live snapshot and hot-swaps it when the loader publishes a new one"""
+
+    def __init__(self, root: str = None, check_interval: float = 5.0):
+        self.root = root or SNAPSHOT_ROOT
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._pointer = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[GraphSnapshot]:
+        """The current snapshot, or None if none was published"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._snapshot
+
+    def current(self) -> Optional[GraphSnapshot]:
+        """Like `get`, but a snapshot that fails to load (corrupt, half written)
+        is logged and treated as absent, so callers fall back to Cypher"""
+        try:
+            return self.get()
+        except Exception as e:
+            print(f"❌ Graph snapshot unavailable, falling back to Cypher: {e}")
+            return None
+
+    def refresh(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                with open(os.path.join(self.root, POINTER_FILE)) as f:
+                    pointer = f.read().strip()
+            except FileNotFoundError:
+                return
+            if pointer != self._pointer:
+                # Build the new view completely before swapping the reference
+                self._snapshot = GraphSnapshot(os.path.join(self.root, pointer))
+                self._pointer = pointer
+
+
+_shared_snapshots = None
+
+
+def shared_snapshots() -> SnapshotHolder:
+    """Process-wide holder, so every client maps the same snapshot once"""
+    global _shared_snapshots
+    if _shared_snapshots is None:
+        _shared_snapshots = SnapshotHolder()
+    return _shared_snapshots
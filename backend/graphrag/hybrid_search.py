@@ -1,18 +1,41 @@
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional
+from backend import config
+from backend.graphrag.embeddings import get_embedder
 from backend.graphrag.neo4j_client import Neo4jClient
+from backend.graphrag.vector_index import QuantizedVectorIndex, VECTOR_INDEX_DIR
+import os
 
 class HybridRetriever:
-    def __init__(self):
-        self.neo4j = Neo4jClient()
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, neo4j: Neo4jClient = None):
+        self.neo4j = neo4j or Neo4jClient()
+        self.vector_index = None
+        if config.VECTOR_SEARCH_BACKEND != "neo4j":
+            if os.path.exists(VECTOR_INDEX_DIR):
+                self.vector_index = QuantizedVectorIndex.load(
+                    VECTOR_INDEX_DIR, config.VECTOR_SEARCH_BACKEND, config.VECTOR_RERANK_OVERSAMPLE
+                )
+            else:
+                print(f"⚠️ {VECTOR_INDEX_DIR} not found, using the Neo4j vector index")
     
-    def retrieve(self, query: str, top_k: int = 5) -> Dict:
-        """Hybrid retrieval: vector + full-text + graph traversal"""
+    @property
+    def embedder(self):
+        # Loaded on first use (or by the API warmup), shared across retrievers
+        return get_embedder()
+    
+    def retrieve(self, query: str, top_k: int = 5, known: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Hybrid retrieval: vector + full-text + graph traversal
+        
+        `known` maps movie ids to context documents retrieved earlier in the
+        conversation; only the contexts of new movies are fetched.
+        """
+        known = known or {}
         
         # 1. Vector search
-        query_embedding = self.embedder.encode(query).tolist()
-        vector_results = self.neo4j.vector_search(query_embedding, top_k)
+        query_embedding = self.embedder.encode(query)
+        if self.vector_index:
+            vector_results = self.vector_index.search(query_embedding, top_k)
+        else:
+            vector_results = self.neo4j.vector_search(query_embedding.tolist(), top_k)
         
         # 2. Full-text search
         fulltext_results = self.neo4j.fulltext_search(query, top_k)
@@ -20,11 +43,13 @@ class HybridRetriever:
         # 3. Merge and deduplicate
         combined_results = self._merge_results(vector_results, fulltext_results)
         
-        # 4. Expand context with graph traversal
-        enriched_results = []
-        for result in combined_results[:3]:  # Top 3
-            context = self.neo4j.get_movie_context(result['title'])
-            enriched_results.append(context)
+        # 4. Expand context with precomputed graph documents
+        top_ids = [result['id'] for result in combined_results[:3]]  # Top 3
+        fetched = self.neo4j.get_movie_contexts([movie_id for movie_id in top_ids if movie_id not in known])
+        contexts = {**known, **{context['id']: context for context in fetched}}
+        enriched_results = [dict(contexts[movie_id]) for movie_id in top_ids if movie_id in contexts]
+        for rank, context in enumerate(enriched_results):
+            context['relevance'] = 1.0 / (rank + 1)
         
         return {
             'vector_results': vector_results,
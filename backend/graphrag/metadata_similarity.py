@@ -0,0 +1,89 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+from backend.graphrag.recommendations import FEATURE_WEIGHTS, movie_features
+import numpy as np
+import hashlib
+import heapq
+
+# Mersenne prime for the universal hashes (a * x + b) mod p; with 32-bit
+# a, b and x the product stays below 2**64
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def metadata_set(movie: Dict) -> Dict[str, float]:
+    """Sparse weighted set of a movie's genres, keywords, director and cast"""
+    return {f"{kind}:{key}": FEATURE_WEIGHTS[kind] for kind, key in movie_features(movie)}
+
+
+def weighted_jaccard(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Sum of min weights over sum of max weights across both sets"""
+    intersection = sum(min(weight, b[feature]) for feature, weight in a.items() if feature in b)
+    union = sum(a.values()) + sum(b.values()) - intersection
+    return intersection / union if union else 0.0
+
+
+def _feature_hash(feature: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=4).digest(), 'little')
+
+
+class MinHashLSH:
+    """MinHash signatures banded into LSH buckets.
+
+    Two sets with Jaccard similarity s share at least one band bucket with
+    probability 1 - (1 - s**rows)**bands, so only likely-similar pairs are
+    ever compared. The default 40 bands of 3 rows cross 50% near s = 0.29.
+    """
+
+    def __init__(self, bands: int = 40, rows: int = 3, max_bucket: int = 500, seed: int = 42):
+        self.bands = bands
+        self.rows = rows
+        # Buckets larger than this (e.g. movies sharing only a popular genre)
+        # are skipped so the candidate count stays near-linear
+        self.max_bucket = max_bucket
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=(bands * rows, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(bands * rows, 1), dtype=np.uint64)
+
+    def signature(self, features: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter((_feature_hash(feature) for feature in features), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.bands * self.rows, np.iinfo(np.uint64).max, dtype=np.uint64)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def candidate_pairs(self, signatures: List[np.ndarray]) -> set:
+        """Index pairs (i < j) sharing at least one band bucket"""
+        pairs = set()
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            start = band * self.rows
+            for i, signature in enumerate(signatures):
+                buckets[signature[start:start + self.rows].tobytes()].append(i)
+            for members in buckets.values():
+                if 1 < len(members) <= self.max_bucket:
+                    pairs.update(
+                        (members[x], members[y])
+                        for x in range(len(members)) for y in range(x + 1, len(members))
+                    )
+        return pairs
+
+
+def metadata_similarity_edges(movies: List[Dict], threshold: float = 0.25, top_n: int = 10,
+                              lsh: MinHashLSH = None) -> List[Tuple[str, str, float]]:
+    """(source id, target id, score) of each movie's top-N metadata neighbours above `threshold`"""
+    lsh = lsh or MinHashLSH()
+    sets = [metadata_set(movie) for movie in movies]
+    signatures = [lsh.signature(features) for features in sets]
+
+    neighbours = defaultdict(list)
+    for i, j in lsh.candidate_pairs(signatures):
+        score = weighted_jaccard(sets[i], sets[j])
+        if score > threshold:
+            neighbours[i].append((score, j))
+            neighbours[j].append((score, i))
+
+    return [
+        (movies[i]['id'], movies[j]['id'], round(score, 4))
+        for i, scored in neighbours.items()
+        for score, j in heapq.nlargest(top_n, scored)
+    ]
@@ -0,0 +1,273 @@
+from typing import Dict, List, Tuple
+import numpy as np
+import json
+import os
+import re
+
+COLUMNS_PATH = 'data/processed/movie_columns.npz'
+MOVIES_PATH = 'data/processed/movies_with_embeddings.json'
+
+AGGREGATES = {
+    'mean': np.nanmean,
+    'avg': np.nanmean,
+    'average': np.nanmean,
+    'sum': np.nansum,
+    'min': np.nanmin,
+    'max': np.nanmax,
+    'median': np.nanmedian,
+    'count': lambda values: int(np.count_nonzero(~np.isnan(values))),
+}
+NUMERIC_COLUMNS = ('rating', 'budget', 'revenue', 'year', 'roi', 'profit')
+
+# agg(column) [where <conditions>] [by <key>]
+QUERY_PATTERN = re.compile(
+    r"^\s*(?P<agg>\w+)\s*\(\s*(?P<column>\w+|\*)\s*\)"
+    r"(?:\s+where\s+(?P<where>.+?))?"
+    r"(?:\s+(?:group\s+)?by\s+(?P<by>\w+))?\s*$",
+    re.IGNORECASE
+)
+CONDITION_PATTERN = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|>|<|\bin\b)\s*(.+?)\s*$", re.IGNORECASE)
+# Conditions are joined by `and`, except inside quoted values ("Pride and Prejudice")
+CONDITION_SEPARATOR = re.compile(r"('[^']*'|\"[^\"]*\")|\s+and\s+", re.IGNORECASE)
+GROUP_KEYS = ('title', 'director', 'studio', 'genre', 'year')
+
+
+def split_conditions(where: str) -> List[str]:
+    conditions, start = [], 0
+    for match in CONDITION_SEPARATOR.finditer(where):
+        if match.group(1) is None:
+            conditions.append(where[start:match.start()])
+            start = match.end()
+    conditions.append(where[start:])
+    return conditions
+
+
+def _encode(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Dictionary-encode strings into int32 codes and a name table"""
+    names, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return codes.astype(np.int32), names
+
+
+def build_columns(movies: List[Dict]) -> Dict[str, np.ndarray]:
+    """Movie numerics plus dictionary-encoded director/studio keys and a genre matrix"""
+    genres = sorted({genre for movie in movies for genre in movie.get('genres', [])})
+    genre_index = {genre: i for i, genre in enumerate(genres)}
+    genre_matrix = np.zeros((len(movies), len(genres)), dtype=bool)
+    for row, movie in enumerate(movies):
+        for genre in movie.get('genres', []):
+            genre_matrix[row, genre_index[genre]] = True
+
+    director_codes, director_names = _encode([(m.get('director') or {}).get('name', '') for m in movies])
+    studio_codes, studio_names = _encode([(m.get('studio') or {}).get('name', '') for m in movies])
+
+    def numeric(key):
+        return np.array([m.get(key) if m.get(key) is not None else np.nan for m in movies], dtype=np.float64)
+
+    return dict(
+        id=np.array([m['id'] for m in movies], dtype=str),
+        title=np.array([m['title'] for m in movies], dtype=str),
+        rating=numeric('rating'),
+        budget=numeric('budget'),
+        revenue=numeric('revenue'),
+        year=numeric('year'),
+        director_code=director_codes,
+        director_names=director_names,
+        studio_code=studio_codes,
+        studio_names=studio_names,
+        genre_matrix=genre_matrix,
+        genre_names=np.array(genres, dtype=str)
+    )
+
+
+def export_columnar_snapshot(movies: List[Dict], path: str = COLUMNS_PATH):
+    """Write the movie columns as a compact NumPy snapshot, replacing any previous one atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **build_columns(movies))
+    os.replace(tmp_path, path)
+
+
+class MovieColumns:
+    """Columnar movie snapshot answering filter/group-by/aggregate queries with NumPy"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.ids = arrays['id']
+        self.titles = arrays['title']
+        self.genre_matrix = arrays['genre_matrix']
+        self.genre_names = arrays['genre_names']
+
+        budget = arrays['budget']
+        revenue = arrays['revenue']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(budget > 0, revenue / budget, np.nan)
+        self.numeric = {
+            'rating': arrays['rating'],
+            'budget': budget,
+            'revenue': revenue,
+            'year': arrays['year'],
+            'roi': roi,
+            'profit': revenue - budget,
+        }
+        self.keys = {
+            'title': (np.arange(len(self.titles), dtype=np.int32), self.titles),
+            'director': (arrays['director_code'], arrays['director_names']),
+            'studio': (arrays['studio_code'], arrays['studio_names']),
+        }
+        self._lower_names = {
+            key: np.char.lower(names) for key, (_, names) in self.keys.items()
+        }
+        self._lower_names['genre'] = np.char.lower(self.genre_names)
+
+    @classmethod
+    def load(cls, path: str = COLUMNS_PATH) -> "MovieColumns":
+        with np.load(path) as snapshot:
+            return cls({name: snapshot[name] for name in snapshot.files})
+
+    @classmethod
+    def load_or_build(cls, path: str = COLUMNS_PATH, movies_path: str = MOVIES_PATH) -> "MovieColumns":
+        """Load the loader's snapshot, or build the columns from the processed movies"""
+        if os.path.exists(path):
+            return cls.load(path)
+        with open(movies_path, 'r') as f:
+            return cls(build_columns(json.load(f)))
+
+    def __len__(self):
+        return len(self.titles)
+
+    def query(self, expression: str) -> Dict:
+        """Evaluate e.g. `mean(rating) where director = Christopher Nolan by genre`"""
+        match = QUERY_PATTERN.match(expression)
+        if not match:
+            raise ValueError(
+                f"Unsupported query '{expression}'. Expected: agg(column) [where key = value [and ...]] [by key]"
+            )
+
+        agg = match.group('agg').lower()
+        column = match.group('column').lower()
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{agg}'. Use one of: {', '.join(AGGREGATES)}")
+        if column == '*':
+            if agg != 'count':
+                raise ValueError("Only count(*) may aggregate every column")
+            values = np.zeros(len(self))
+        elif column in self.numeric:
+            values = self.numeric[column]
+        else:
+            raise ValueError(f"Unknown column '{column}'. Use one of: {', '.join(NUMERIC_COLUMNS)}")
+
+        mask = np.ones(len(self), dtype=bool)
+        if match.group('where'):
+            for condition in split_conditions(match.group('where')):
+                mask &= self._condition_mask(condition)
+
+        result = {'query': expression.strip(), 'matched': int(mask.sum())}
+        group_by = (match.group('by') or '').lower()
+        if group_by and group_by not in GROUP_KEYS:
+            # Most likely an unquoted value such as `title = Stand by Me`
+            raise ValueError(
+                f"Cannot group by '{group_by}'. Use one of: {', '.join(GROUP_KEYS)} "
+                f"(quote values containing 'by' or 'and')"
+            )
+        if not group_by:
+            result['value'] = self._aggregate(agg, values[mask])
+        else:
+            result['groups'] = self._grouped(agg, values, mask, group_by)
+        return result
+
+    def _aggregate(self, agg: str, values: np.ndarray):
+        if agg == 'count':
+            return AGGREGATES[agg](values)
+        if np.isnan(values).all():
+            return None
+        return round(float(AGGREGATES[agg](values)), 4)
+
+    def _grouped(self, agg: str, values: np.ndarray, mask: np.ndarray, key: str) -> Dict:
+        """Aggregate per group, sorting only the rows that pass the `where` mask"""
+        if key == 'genre':
+            # Movies have several genres: one column test per (few) genre
+            rows, selected = self.genre_matrix[mask], values[mask]
+            return {
+                str(name): self._aggregate(agg, selected[rows[:, index]])
+                for index, name in enumerate(self.genre_names)
+                if rows[:, index].any()
+            }
+
+        if key == 'year':
+            years = self.numeric['year']
+            mask = mask & ~np.isnan(years)
+            keys = years[mask]
+        else:
+            codes, names = self.keys[key]
+            keys = codes[mask]
+        groups, inverse = np.unique(keys, return_inverse=True)
+        labels = [str(int(year)) for year in groups] if key == 'year' else [str(names[code]) for code in groups]
+        return dict(zip(labels, self._reduce_groups(agg, values[mask], inverse, len(groups))))
+
+    def _reduce_groups(self, agg: str, values: np.ndarray, inverse: np.ndarray, size: int) -> List:
+        """`agg` of each group of `values` (labelled 0..size-1 by `inverse`) in one vectorized pass"""
+        valid = ~np.isnan(values)
+        counts = np.bincount(inverse, weights=valid, minlength=size)
+        if agg == 'count':
+            return [int(count) for count in counts]
+
+        if agg in ('min', 'max', 'median'):
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.cumsum(np.bincount(inverse, minlength=size))
+            ordered = values[order]
+            if agg == 'median':
+                # No reduction for medians: one small slice per group
+                return [self._aggregate(agg, part) for part in np.split(ordered, bounds[:-1])]
+            # fmin/fmax skip NaNs, like nanmin/nanmax
+            reduced = (np.fmin if agg == 'min' else np.fmax).reduceat(ordered, np.concatenate(([0], bounds[:-1])))
+        else:
+            sums = np.bincount(inverse, weights=np.where(valid, values, 0.0), minlength=size)
+            reduced = sums if agg == 'sum' else sums / np.maximum(counts, 1)
+        return [None if count == 0 else round(float(value), 4) for value, count in zip(reduced, counts)]
+
+    def _condition_mask(self, condition: str) -> np.ndarray:
+        match = CONDITION_PATTERN.match(condition)
+        if not match:
+            raise ValueError(
+                f"Unsupported condition '{condition.strip()}'. Quote values containing 'and' or 'by'"
+            )
+        key, op, raw_value = match.group(1).lower(), match.group(2).lower(), match.group(3)
+
+        if op == 'in':
+            values = [self._unquote(v) for v in raw_value.strip('()[] ').split(',')]
+        else:
+            values = [self._unquote(raw_value)]
+
+        if key in self.numeric:
+            column = self.numeric[key]
+            try:
+                numbers = [float(v) for v in values]
+            except ValueError:
+                raise ValueError(f"'{key}' compares against numbers, got '{raw_value}'")
+            if op == 'in':
+                return np.isin(column, numbers)
+            return {
+                '=': column == numbers[0], '!=': column != numbers[0],
+                '>': column > numbers[0], '>=': column >= numbers[0],
+                '<': column < numbers[0], '<=': column <= numbers[0],
+            }[op]
+
+        if key not in self._lower_names:
+            raise ValueError(f"Unknown filter '{key}'")
+        if op not in ('=', '!=', 'in'):
+            raise ValueError(f"'{key}' only supports =, != and in")
+
+        # Case-insensitive partial match against the (small) name table
+        names = self._lower_names[key]
+        matching = np.zeros(len(names), dtype=bool)
+        for value in values:
+            matching |= np.char.find(names, value.lower()) >= 0
+
+        if key == 'genre':
+            mask = self.genre_matrix[:, matching].any(axis=1)
+        else:
+            mask = matching[self.keys[key][0]]
+        return ~mask if op == '!=' else mask
+
+    @staticmethod
+    def _unquote(value: str) -> str:
+        return value.strip().strip('\'"').strip()
@@ -1,17 +1,45 @@
 from neo4j import GraphDatabase
+import json
 import os
 from typing import List, Dict, Any
 from dotenv import load_dotenv
+from backend import config
+from backend.graphrag.graph_snapshot import shared_snapshots
 
 # Load environment variables
 load_dotenv(dotenv_path='backend/.env')
 
+# Aggregates the retrieval context for a batch of movies. Each expansion is
+# collected before the next one starts, so the rows never multiply into a
+# cartesian product. Shared with the loader, which materializes the result
+# as the `context` property of every Movie node.
+MOVIE_CONTEXT_QUERY = """
+MATCH (m:Movie)
+WHERE m.id IN $ids
+OPTIONAL MATCH (m)-[:HAS_GENRE]->(g:Genre)
+WITH m, collect(g.name) as genres
+OPTIONAL MATCH (d:Person)-[:DIRECTED]->(m)
+WITH m, genres, collect(d.name) as directors
+OPTIONAL MATCH (a:Person)-[r:ACTED_IN]->(m)
+WITH m, genres, directors, a, r ORDER BY r.order
+WITH m, genres, directors, collect(a.name)[0..5] as actors
+OPTIONAL MATCH (m)-[s:SIMILAR_TO]->(similar:Movie)
+WITH m, genres, directors, actors, similar, s ORDER BY s.similarity_score DESC
+RETURN m.id as id, m.title as title, m.year as year,
+       m.overview as overview, m.rating as rating,
+       genres, directors, actors,
+       collect(DISTINCT similar.title)[0..3] as similar_movies
+"""
+
 class Neo4jClient:
-    def __init__(self):
+    def __init__(self, snapshots=None):
         self.driver = GraphDatabase.driver(
             os.getenv("NEO4J_URI", "bolt://localhost:7687"),
-            auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "MahdiToumi"))
+            auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "MahdiToumi")),
+            max_connection_pool_size=config.NEO4J_MAX_CONNECTIONS
         )
+        # In-memory CSR copy of the graph published by the loader, if any
+        self.snapshots = snapshots or shared_snapshots()
     
     def close(self):
         self.driver.close()
@@ -27,7 +55,7 @@ class Neo4jClient:
         query = """
         CALL db.index.vector.queryNodes('movie_embeddings', $top_k, $embedding)
         YIELD node, score
-        RETURN node.title as title, node.overview as overview, 
+        RETURN node.id as id, node.title as title, node.overview as overview, 
                node.rating as rating, score
         ORDER BY score DESC
         """
@@ -41,7 +69,7 @@ class Neo4jClient:
         query = """
         CALL db.index.fulltext.queryNodes('movie_text', $text)
         YIELD node, score
-        RETURN node.title as title, node.overview as overview, 
+        RETURN node.id as id, node.title as title, node.overview as overview, 
                node.rating as rating, score
         ORDER BY score DESC
         LIMIT $top_k
@@ -50,23 +78,53 @@ class Neo4jClient:
     
     def get_movie_context(self, movie_title: str) -> Dict:
         """Get comprehensive context for a movie"""
+        snapshot = self.snapshots.current()
+        movie_id = snapshot.find_movie(movie_title) if snapshot else None
+        if movie_id:
+            return snapshot.movie_context(movie_id)
+        
         query = """
         MATCH (m:Movie)
         WHERE m.title =~ $title_regex
-        OPTIONAL MATCH (m)-[:HAS_GENRE]->(g:Genre)
-        OPTIONAL MATCH (p:Person)-[:DIRECTED]->(m)
-        OPTIONAL MATCH (a:Person)-[:ACTED_IN]->(m)
-        OPTIONAL MATCH (m)-[:SIMILAR_TO]->(similar:Movie)
-        RETURN m.title as title, m.overview as overview, m.rating as rating,
-               collect(DISTINCT g.name) as genres,
-               collect(DISTINCT p.name) as directors,
-               collect(DISTINCT a.name)[0..5] as actors,
-               collect(DISTINCT similar.title)[0..3] as similar_movies
+        RETURN m.id as id
+        LIMIT 1
         """
         # Using case-insensitive partial match for robustness
         title_regex = f"(?i).*{movie_title}.*"
         results = self.execute_cypher(query, {'title_regex': title_regex})
-        return results[0] if results else {}
+        if not results:
+            return {}
+        contexts = self.get_movie_contexts([results[0]['id']])
+        return contexts[0] if contexts else {}
+    
+    def get_movie_contexts(self, movie_ids: List[str]) -> List[Dict]:
+        """Get context documents for movies by id, in the given order.
+        
+        Served from the graph snapshot when one is loaded. Otherwise reads
+        the document materialized by the loader through the unique `id`
+        index; movies loaded without one are aggregated live.
+        """
+        snapshot = self.snapshots.current()
+        if snapshot and all(movie_id in snapshot.by_id for movie_id in movie_ids):
+            return [snapshot.movie_context(movie_id) for movie_id in movie_ids]
+        
+        query = """
+        MATCH (m:Movie)
+        WHERE m.id IN $ids
+        RETURN m.id as id, m.context as context
+        """
+        stored = {
+            row['id']: json.loads(row['context'])
+            for row in self.execute_cypher(query, {'ids': movie_ids})
+            if row['context']
+        }
+        
+        missing = [movie_id for movie_id in movie_ids if movie_id not in stored]
+        if missing:
+            for row in self.execute_cypher(MOVIE_CONTEXT_QUERY, {'ids': missing}):
+                stored[row['id']] = row
+        
+        return [stored[movie_id] for movie_id in movie_ids if movie_id in stored]
     
     def get_graph_stats(self) -> Dict:
         """Get graph statistics"""
@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from backend import config
+import re
+import threading
+
+# (subject, relationship type, object), following the relationship direction
+Triple = Tuple[str, str, str]
+# neighbour key, relationship type, True if the relationship points at the neighbour
+Edge = Tuple[str, str, bool]
+
+CONNECTION_PATTERNS = [
+    re.compile(r"how (?:is|are|was|were) (.+?) (?:connected|linked|related) (?:to|with) (.+?)[?.!]*$", re.IGNORECASE),
+    re.compile(r"(?:connection|link|path|relationship)s? between (.+?) and (.+?)[?.!]*$", re.IGNORECASE),
+]
+
+
+class Neo4jGraphAdapter:
+    """Resolves names and expands frontiers against Neo4j, one query per BFS level"""
+
+    def __init__(self, neo4j_client):
+        self.neo4j = neo4j_client
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version of the latest published graph snapshot, so cached paths expire on reload"""
+        snapshot = self.neo4j.snapshots.current()
+        return snapshot.version if snapshot else None
+
+    def resolve(self, name: str) -> Optional[Tuple[str, str]]:
+        """(node key, display label) of the Person or Movie best matching `name`"""
+        query = """
+        MATCH (n)
+        WHERE (n:Person AND toLower(n.name) CONTAINS toLower($name))
+           OR (n:Movie AND toLower(n.title) CONTAINS toLower($name))
+        RETURN elementId(n) as key, coalesce(n.name, n.title) as label
+        ORDER BY toLower(label) = toLower($name) DESC, size(label)
+        LIMIT 1
+        """
+        results = self.neo4j.execute_cypher(query, {'name': name})
+        return (results[0]['key'], results[0]['label']) if results else None
+
+    def expand(self, keys: List[str], max_degree: int) -> Tuple[Dict[str, List[Edge]], Dict[str, str]]:
+        """Neighbours of `keys`, skipping hub nodes with more than `max_degree` relationships"""
+        query = """
+        UNWIND $keys as key
+        MATCH (n)-[r]-(m)
+        WHERE elementId(n) = key AND COUNT { (m)--() } <= $max_degree
+        RETURN key, elementId(m) as neighbour, type(r) as rel,
+               startNode(r) = n as outgoing,
+               coalesce(m.name, m.title, m.term) as label
+        """
+        edges, labels = {}, {}
+        for row in self.neo4j.execute_cypher(query, {'keys': keys, 'max_degree': max_degree}):
+            edges.setdefault(row['key'], []).append((row['neighbour'], row['rel'], row['outgoing']))
+            labels[row['neighbour']] = row['label']
+        return edges, labels
+
+
+class PathRetriever:
+    """Bounded bidirectional BFS between two entities of the movie graph.
+
+    Search stops at `max_hops`, never walks through nodes with more than
+    `max_degree` relationships (e.g. popular genres) and expands at most
+    `expansion_budget` nodes per query. Resolved paths are LRU-cached.
+    """
+
+    def __init__(self, graph, max_hops: int = None, max_degree: int = None,
+                 expansion_budget: int = None, cache_size: int = 256):
+        self.graph = graph
+        self.max_hops = max_hops or config.PATH_MAX_HOPS
+        self.max_degree = max_degree or config.PATH_MAX_DEGREE
+        self.expansion_budget = expansion_budget or config.PATH_EXPANSION_BUDGET
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # Agent runs share the retriever across threadpool threads
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def extract_endpoints(query: str) -> Optional[Tuple[str, str]]:
+        """The two entities of a connection question, if `query` is one"""
+        for pattern in CONNECTION_PATTERNS:
+            match = pattern.search(query.strip())
+            if match:
+                return match.group(1).strip(), match.group(2).strip()
+        return None
+
+    def retrieve_for_query(self, query: str, graph=None) -> List[List[Triple]]:
+        endpoints = self.extract_endpoints(query)
+        return self.find_paths(*endpoints, graph=graph) if endpoints else []
+
+    def find_paths(self, source: str, target: str, max_paths: int = 3, graph=None) -> List[List[Triple]]:
+        """Shortest paths between two named entities, as relationship triples.
+
+        `graph` overrides the adapter for this search, e.g. to pin one
+        graph snapshot for the whole traversal.
+        """
+        graph = graph or self.graph
+        cache_key = (getattr(graph, 'version', None), source.lower(), target.lower(), self.max_hops, max_paths)
+        with self._cache_lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+
+        paths = []
+        start, goal = graph.resolve(source), graph.resolve(target)
+        if start and goal:
+            paths = self._search(graph, start, goal, max_paths)
+
+        with self._cache_lock:
+            self._cache[cache_key] = paths
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return paths
+
+    def _search(self, graph, start: Tuple[str, str], goal: Tuple[str, str], max_paths: int) -> List[List[Triple]]:
+        labels = {start[0]: start[1], goal[0]: goal[1]}
+        if start[0] == goal[0]:
+            return []
+
+        # Per side: node -> (parent, relationship, outgoing from parent)
+        parents = ({start[0]: None}, {goal[0]: None})
+        frontiers = ([start[0]], [goal[0]])
+        depths = [0, 0]
+        expanded = 0
+
+        while frontiers[0] and frontiers[1] and sum(depths) < self.max_hops:
+            # Expand the smaller frontier to keep the search balanced
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            frontier = frontiers[side][:max(self.expansion_budget - expanded, 0)]
+            if not frontier:
+                break
+            expanded += len(frontier)
+
+            edges, new_labels = graph.expand(frontier, self.max_degree)
+            labels.update(new_labels)
+
+            next_frontier, meetings = [], []
+            for node in frontier:
+                for neighbour, rel, outgoing in edges.get(node, []):
+                    if neighbour in parents[side]:
+                        continue
+                    parents[side][neighbour] = (node, rel, outgoing)
+                    next_frontier.append(neighbour)
+                    if neighbour in parents[1 - side]:
+                        meetings.append(neighbour)
+
+            depths[side] += 1
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+            if meetings:
+                return [self._triples(node, parents, labels) for node in meetings[:max_paths]]
+
+        return []
+
+    def _triples(self, meeting: str, parents, labels) -> List[Triple]:
+        """Walk both parent chains out from the meeting node"""
+        triples = []
+        node = meeting
+        while parents[0][node]:
+            parent, rel, outgoing = parents[0][node]
+            triples.insert(0, (labels[parent], rel, labels[node]) if outgoing else (labels[node], rel, labels[parent]))
+            node = parent
+        node = meeting
+        while parents[1][node]:
+            parent, rel, outgoing = parents[1][node]
+            triples.append((labels[parent], rel, labels[node]) if outgoing else (labels[node], rel, labels[parent]))
+            node = parent
+        return triples
+
+
+def format_path(triples: List[Triple]) -> str:
+    """Compact triple notation, e.g. `(Keanu Reeves)-[ACTED_IN]->(The Matrix)`"""
+    return "; ".join(f"({subject})-[{rel}]->({obj})" for subject, rel, obj in triples)
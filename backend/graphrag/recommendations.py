@@ -0,0 +1,181 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+import json
+import math
+import os
+import re
+
+NEIGHBOURS_PATH = 'data/processed/movie_neighbours.json'
+MOVIES_PATH = 'data/processed/movies_with_embeddings.json'
+
+# Weight of one shared feature of each kind, before hub down-weighting
+FEATURE_WEIGHTS = {
+    'director': 3.0,
+    'actor': 2.0,
+    'keyword': 1.5,
+    'genre': 1.0,
+}
+# Weight of a SIMILAR_TO edge, multiplied by its similarity score
+SIMILAR_WEIGHT = 4.0
+
+GENRE_ALIASES = {
+    'sci-fi': 'science fiction',
+    'scifi': 'science fiction',
+    'sf': 'science fiction',
+}
+
+
+def movie_features(movie: Dict) -> Iterable[Tuple[str, str]]:
+    """(kind, key) pairs describing a movie from the processed JSON"""
+    for genre in movie.get('genres', []):
+        yield 'genre', genre.lower()
+    for keyword in movie.get('keywords', []):
+        yield 'keyword', keyword.lower()
+    if movie.get('director'):
+        yield 'director', movie['director']['id']
+    for actor in movie.get('actors', []):
+        yield 'actor', actor['id']
+
+
+def build_neighbour_table(movies: List[Dict], similar_edges: Iterable[Tuple[str, str, float]] = (),
+                          top_n: int = 20, max_feature_share: float = 0.2,
+                          max_feature_df: int = 500) -> Dict[str, List[Tuple[str, float]]]:
+    """Score movie pairs by weighted co-occurrence and keep each movie's top-N neighbours.
+
+    A shared feature contributes its kind's weight divided by log2(1 + df),
+    so hubs such as popular genres count less than a shared director.
+    Features held by more than `max_feature_share` of the catalog or by more
+    than `max_feature_df` movies are skipped. Each movie's candidates are
+    scored and pruned to its top N before the next movie, so time grows with
+    n x features per movie x max_feature_df and memory with n x top_n:
+    linear in the catalog size, never the n^2 of expanding every posting
+    list into pairs.
+    """
+    features = {}
+    postings = defaultdict(list)
+    for movie in movies:
+        features[movie['id']] = set(movie_features(movie))
+        for feature in features[movie['id']]:
+            postings[feature].append(movie['id'])
+
+    max_df = max(2, min(max_feature_df, int(len(movies) * max_feature_share)))
+    weights = {
+        feature: FEATURE_WEIGHTS[feature[0]] / math.log2(1 + len(movie_ids))
+        for feature, movie_ids in postings.items()
+        if len(movie_ids) >= 2 and (len(movie_ids) <= max_df or len(movies) <= 10)
+    }
+
+    similar = defaultdict(list)
+    for source, target, similarity in similar_edges:
+        similar[source].append((target, SIMILAR_WEIGHT * similarity))
+        similar[target].append((source, SIMILAR_WEIGHT * similarity))
+
+    table = {}
+    for movie_id in list(features) + [movie_id for movie_id in similar if movie_id not in features]:
+        scores = defaultdict(float)
+        for feature in features.get(movie_id, ()):
+            weight = weights.get(feature)
+            if weight is None:
+                continue
+            for other in postings[feature]:
+                if other != movie_id:
+                    scores[other] += weight
+        for other, score in similar.get(movie_id, ()):
+            scores[other] += score
+        if scores:
+            table[movie_id] = [
+                (neighbour, round(score, 4))
+                for neighbour, score in heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
+            ]
+    return table
+
+
+class NeighbourIndex:
+    """Precomputed top-N neighbour lists with the metadata needed to serve them"""
+
+    def __init__(self, movies: Dict[str, Dict], neighbours: Dict[str, List[Tuple[str, float]]]):
+        self.movies = movies
+        self.neighbours = neighbours
+        self.by_title = {movie['title'].lower(): movie_id for movie_id, movie in movies.items()}
+        self.genres = {genre.lower() for movie in movies.values() for genre in movie['genres']}
+
+        # Longest titles first, so "The Dark Knight Rises" wins over "The Dark Knight"
+        titles = sorted(self.by_title, key=len, reverse=True)
+        self._title_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(title) for title in titles) + r")\b"
+        ) if titles else None
+
+    @classmethod
+    def from_movies(cls, movies: List[Dict], similar_edges: Iterable[Tuple[str, str, float]] = (),
+                    top_n: int = 20) -> "NeighbourIndex":
+        metadata = {
+            movie['id']: {
+                'title': movie['title'],
+                'year': movie.get('year'),
+                'rating': movie.get('rating'),
+                'genres': movie.get('genres', [])
+            }
+            for movie in movies
+        }
+        return cls(metadata, build_neighbour_table(movies, similar_edges, top_n))
+
+    @classmethod
+    def load(cls, path: str = NEIGHBOURS_PATH) -> "NeighbourIndex":
+        with open(path, 'r') as f:
+            data = json.load(f)
+        neighbours = {
+            movie_id: [tuple(pair) for pair in pairs]
+            for movie_id, pairs in data['neighbours'].items()
+        }
+        return cls(data['movies'], neighbours)
+
+    @classmethod
+    def load_or_build(cls, path: str = NEIGHBOURS_PATH, movies_path: str = MOVIES_PATH) -> "NeighbourIndex":
+        """Load the offline table, or build one from the processed movies without SIMILAR_TO edges"""
+        if os.path.exists(path):
+            return cls.load(path)
+        with open(movies_path, 'r') as f:
+            return cls.from_movies(json.load(f))
+
+    def save(self, path: str = NEIGHBOURS_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'movies': self.movies, 'neighbours': self.neighbours}, f)
+        os.replace(tmp_path, path)
+
+    def find_titles(self, text: str) -> List[str]:
+        """Ids of catalog movies whose titles appear in `text`, each once, in order of mention"""
+        if not self._title_pattern:
+            return []
+        return list(dict.fromkeys(self.by_title[match] for match in self._title_pattern.findall(text.lower())))
+
+    def find_genres(self, text: str) -> List[str]:
+        """Catalog genres mentioned in `text`, resolving common aliases"""
+        text = text.lower()
+        found = {genre for genre in self.genres if re.search(rf"\b{re.escape(genre)}\b", text)}
+        found.update(
+            genre for alias, genre in GENRE_ALIASES.items()
+            if genre in self.genres and re.search(rf"\b{re.escape(alias)}\b", text)
+        )
+        return sorted(found)
+
+    def recommend(self, seed_ids: List[str], k: int = 5, genres: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Merge the seeds' neighbour lists, optionally keeping only movies in `genres`"""
+        genres = {genre.lower() for genre in genres or []}
+        merged = defaultdict(float)
+        for seed_id in seed_ids:
+            for neighbour, score in self.neighbours.get(seed_id, []):
+                merged[neighbour] += score
+
+        if not seed_ids:
+            # No seed movie: fall back to the best rated movies
+            merged = {movie_id: movie.get('rating') or 0.0 for movie_id, movie in self.movies.items()}
+
+        candidates = (
+            (movie_id, score) for movie_id, score in merged.items()
+            if movie_id not in seed_ids
+            and (not genres or genres & {g.lower() for g in self.movies[movie_id]['genres']})
+        )
+        return heapq.nlargest(k, candidates, key=lambda item: item[1])
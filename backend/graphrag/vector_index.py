@@ -0,0 +1,164 @@
+from typing import Dict, List
+import numpy as np
+import json
+import os
+import shutil
+
+VECTOR_INDEX_DIR = 'data/processed/vector_index'
+QUANTIZATION_MODES = ('int8', 'binary', 'float32')
+
+# Rows converted to float32 at a time when scoring int8 codes, so the
+# converted block stays in cache and the dot product runs through BLAS
+_INT8_BLOCK = 4096
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return _BYTE_POPCOUNT[values.view(np.uint8)]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows, so dot products are cosine similarities"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def quantize_int8(vectors: np.ndarray):
+    """Symmetric per-dimension int8 codes and the scales restoring them"""
+    scale = np.abs(vectors).max(axis=0) / 127
+    scale[scale == 0] = 1
+    codes = np.clip(np.round(vectors / scale), -127, 127).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed into uint64 words"""
+    bits = np.packbits(vectors > 0, axis=-1)
+    padding = -bits.shape[-1] % 8
+    if padding:
+        bits = np.pad(bits, [(0, 0)] * (bits.ndim - 1) + [(0, padding)])
+    return np.ascontiguousarray(bits).view(np.uint64)
+
+
+def export_vector_index(movies: List[Dict], directory: str = VECTOR_INDEX_DIR):
+    """Write float32 vectors plus their int8 and binary codes, replacing any previous index"""
+    vectors = normalize([movie['embedding'] for movie in movies])
+    codes, scale = quantize_int8(vectors)
+
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'float32.npy'), vectors)
+    np.save(os.path.join(tmp_dir, 'int8.npy'), codes)
+    np.save(os.path.join(tmp_dir, 'int8_scale.npy'), scale)
+    np.save(os.path.join(tmp_dir, 'binary.npy'), quantize_binary(vectors))
+    with open(os.path.join(tmp_dir, 'movies.json'), 'w') as f:
+        json.dump([
+            {key: movie.get(key) for key in ('id', 'title', 'overview', 'rating')}
+            for movie in movies
+        ], f)
+
+    # Swap the directory in with two renames; readers reopen it on restart
+    old_dir = f"{directory}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_dir)
+    os.rename(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class QuantizedVectorIndex:
+    """Two-stage cosine search: quantized candidate scan, exact float32 rerank.
+
+    Only the quantized codes are scanned per query (int8 uses a quarter of
+    the float32 memory, binary a thirty-second). The float32 vectors are
+    memory-mapped and only the candidates' rows are read for the rerank.
+    """
+
+    def __init__(self, movies: List[Dict], vectors: np.ndarray, mode: str = 'int8', oversample: int = 10,
+                 codes: np.ndarray = None, scale: np.ndarray = None, bits: np.ndarray = None):
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{mode}'. Use one of: {', '.join(QUANTIZATION_MODES)}")
+        self.movies = movies
+        self.vectors = vectors
+        self.mode = mode
+        self.oversample = oversample
+        if mode == 'int8':
+            self.codes, self.scale = (codes, scale) if codes is not None else quantize_int8(np.asarray(vectors))
+        elif mode == 'binary':
+            self.bits = bits if bits is not None else quantize_binary(np.asarray(vectors))
+
+    @classmethod
+    def from_movies(cls, movies: List[Dict], mode: str = 'int8', oversample: int = 10) -> "QuantizedVectorIndex":
+        metadata = [{key: movie.get(key) for key in ('id', 'title', 'overview', 'rating')} for movie in movies]
+        return cls(metadata, normalize([movie['embedding'] for movie in movies]), mode, oversample)
+
+    @classmethod
+    def load(cls, directory: str = VECTOR_INDEX_DIR, mode: str = 'int8', oversample: int = 10) -> "QuantizedVectorIndex":
+        def load(name):
+            return np.load(os.path.join(directory, name), mmap_mode='r')
+
+        with open(os.path.join(directory, 'movies.json'), 'r') as f:
+            movies = json.load(f)
+        return cls(
+            movies, load('float32.npy'), mode, oversample,
+            # Memory-mapped too: the page cache keeps the scanned codes hot and
+            # API worker processes share a single copy of them
+            codes=load('int8.npy') if mode == 'int8' else None,
+            scale=load('int8_scale.npy') if mode == 'int8' else None,
+            bits=load('binary.npy') if mode == 'binary' else None,
+        )
+
+    def __len__(self):
+        return len(self.movies)
+
+    def memory_bytes(self) -> int:
+        """Bytes scanned per query by the first stage"""
+        if self.mode == 'int8':
+            return self.codes.nbytes + self.scale.nbytes
+        if self.mode == 'binary':
+            return self.bits.nbytes
+        return self.vectors.nbytes
+
+    def candidate_scores(self, query: np.ndarray) -> np.ndarray:
+        """First-stage scores of every movie (higher is closer)"""
+        if self.mode == 'int8':
+            weights = query * self.scale
+            scores = np.empty(len(self), dtype=np.float32)
+            block = np.empty((min(_INT8_BLOCK, len(self)), self.codes.shape[1]), dtype=np.float32)
+            for start in range(0, len(self), _INT8_BLOCK):
+                rows = self.codes[start:start + _INT8_BLOCK]
+                np.copyto(block[:len(rows)], rows, casting='unsafe')
+                scores[start:start + len(rows)] = block[:len(rows)] @ weights
+            return scores
+        if self.mode == 'binary':
+            distances = _popcount(self.bits ^ quantize_binary(query[None, :])).sum(axis=1)
+            return -distances.astype(np.float32)
+        return np.asarray(self.vectors) @ query
+
+    def search(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
+        """Top-k movies by cosine similarity, in the shape of `Neo4jClient.vector_search`"""
+        if not len(self):
+            return []
+        query = normalize(embedding)
+        scores = self.candidate_scores(query)
+
+        candidates = min(max(top_k * self.oversample, top_k), len(self))
+        if self.mode != 'float32':
+            shortlist = np.argpartition(-scores, candidates - 1)[:candidates]
+            shortlist.sort()  # sequential reads from the memory-mapped vectors
+            scores = np.asarray(self.vectors[shortlist]) @ query
+        else:
+            shortlist = np.arange(len(self))
+
+        best = np.argsort(-scores)[:top_k]
+        # Scaled to [0, 1] like the scores of Neo4j's cosine vector index
+        return [
+            {**self.movies[shortlist[i]], 'score': float((scores[i] + 1) / 2)}
+            for i in best
+        ]
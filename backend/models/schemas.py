@@ -5,6 +5,7 @@ class QueryRequest(BaseModel):
     """Request model for /ask endpoint"""
     query: str = Field(..., description="User query")
     top_k: int = Field(5, description="Number of results to retrieve")
+    session_id: Optional[str] = Field(None, description="Conversation id; follow-up questions reuse its earlier turns")
 
 class QueryResponse(BaseModel):
     """Response model for /ask endpoint"""
@@ -13,6 +14,9 @@ class QueryResponse(BaseModel):
     reasoning: List[str]
     context_used: int
     execution_time: float
+    token_stats: Optional[Dict[str, Dict[str, int]]] = None
+    session_id: Optional[str] = None
+    profile: Optional[Dict[str, Any]] = Field(None, description="Profiler report, for requests sent with a valid X-Profile-Token")
 
 class GraphStatsResponse(BaseModel):
     """Response model for /graph-info endpoint"""
@@ -0,0 +1,133 @@
+"""Opt-in profiling of a single request or CLI query.
+
+A sampling thread records the stack of the profiled thread every few
+milliseconds into collapsed stacks ("frame;frame;frame count" lines, the
+input of flamegraph.pl, speedscope and inferno), while tracemalloc records
+the allocations made meanwhile. Nothing runs unless a profile is asked for.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List
+from backend import config
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = 'data/profiles'
+
+# tracemalloc is process-wide, so one profile runs at a time
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+
+
+class Profiler:
+    """Samples the thread that started it until stopped"""
+
+    def __init__(self, interval: float = None, trace_allocations: bool = True, allocation_frames: int = 10):
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL
+        self.trace_allocations = trace_allocations
+        self.allocation_frames = allocation_frames
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self.allocations: List[Dict] = []
+        self.peak_bytes = None
+        self._stop = threading.Event()
+
+    def _sample(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    @contextmanager
+    def profile(self):
+        sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), name="profiler", daemon=True
+        )
+        tracing = self.trace_allocations and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start(self.allocation_frames)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            yield self
+        finally:
+            self._stop.set()
+            sampler.join()
+            self.duration = time.perf_counter() - started
+            if tracing:
+                self._record_allocations(tracemalloc.take_snapshot())
+                self.peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def _record_allocations(self, snapshot, top_n: int = 20):
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        self.allocations = [
+            {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             'bytes': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:top_n]
+        ]
+
+    def collapsed(self) -> str:
+        """Flamegraph-compatible collapsed stacks"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, top_n: int = 10) -> List[Dict]:
+        """Functions by samples on top of the stack (self time)"""
+        self_samples = Counter()
+        for stack, count in self.stacks.items():
+            self_samples[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {'function': function, 'samples': count, 'seconds': round(count * self.interval, 4)}
+            for function, count in self_samples.most_common(top_n)
+        ]
+
+    def save(self, name: str, directory: str = None) -> str:
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.folded")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.collapsed())
+        os.replace(tmp_path, path)
+        return path
+
+    def report(self, path: str = None) -> Dict:
+        """Summary of the run; `name` is what GET /profiles/{name} serves"""
+        return {
+            'file': path,
+            'name': os.path.basename(path)[:-len(".folded")] if path else None,
+            'duration': round(self.duration, 4),
+            'samples': self.samples,
+            'interval': self.interval,
+            'top_functions': self.top_functions(),
+            'allocations': self.allocations,
+            'peak_bytes': self.peak_bytes,
+        }
+
+
+@contextmanager
+def exclusive_profiler(**kwargs):
+    """A Profiler, or None while another profile is running"""
+    if not _profile_lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        yield Profiler(**kwargs)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,128 @@
+"""Pre-fork multi-process API server.
+
+    python -m backend.serve --workers 4
+
+The master process imports the API, loads the embedding model and the
+read-only tables once, freezes them out of the garbage collector and binds
+the listening socket, then forks the workers. Workers share those pages
+copy-on-write (the memory-mapped snapshots are shared through the page
+cache anyway) and only build their own connections, sessions and agent
+(and, with an ONNX EMBEDDING_BACKEND, their own onnxruntime session).
+Per-node connection, concurrency and admission budgets are split between them (see WEB_CONCURRENCY in
+backend/config.py). Workers that die are replaced.
+"""
+import gc
+import os
+import signal
+import socket
+import time
+import click
+
+# Workers started faster than this after the previous one died are a crash loop
+MIN_WORKER_LIFETIME = 5.0
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, workers: int, log_level: str):
+    import uvicorn
+    from backend import config
+    from backend.api.main import app
+
+    # Each worker gets its share of the cores for the embedding model
+    # (OnnxEmbedder sizes its own session the same way)
+    if config.EMBEDDING_BACKEND == "torch":
+        import torch
+        torch.set_num_threads(max((os.cpu_count() or 1) // workers, 1))
+
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+
+
+@click.command()
+@click.option('--host', default=lambda: os.getenv("API_HOST", "0.0.0.0"), show_default="API_HOST or 0.0.0.0")
+@click.option('--port', type=int, default=lambda: int(os.getenv("API_PORT", "8000")), show_default="API_PORT or 8000")
+@click.option('--workers', '-w', type=int, default=None, help='Worker processes (default: WEB_CONCURRENCY)')
+@click.option('--log-level', default='info')
+def serve(host, port, workers, log_level):
+    """Serve the API from pre-forked workers sharing the loaded model and tables"""
+    if workers:
+        # Before backend.config is imported, so budgets are split between these workers
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+    from backend import config
+    from backend.api import main
+
+    workers = config.WEB_CONCURRENCY
+    # Torch's thread pool does not survive a fork: keep the master to one
+    # thread and size each worker's pool once forked
+    if config.EMBEDDING_BACKEND == "torch":
+        import torch
+        torch.set_num_threads(1)
+
+    started = time.monotonic()
+    try:
+        main.preload()
+        print(f"✅ Preloaded shared resources in {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        # Each worker's warmup loads (and retries) whatever is missing
+        print(f"❌ Preload failed, workers will load their own copies: {e}")
+    # Objects loaded so far live until exit: keep the collector from touching
+    # (and so copying) their pages in every worker
+    gc.freeze()
+
+    sock = bind(host, port)
+    print(f"📡 Serving on {host}:{port} with {workers} workers")
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(sock, workers, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        lifetime = time.monotonic() - children.pop(pid)
+        if stopping:
+            continue
+        print(f"❌ Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, replacing it")
+        if lifetime < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME - lifetime)
+        if not stopping:
+            spawn()
+
+    sock.close()
+
+
+if __name__ == '__main__':
+    serve()
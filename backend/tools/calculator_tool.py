@@ -1,7 +1,7 @@
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type
-import math
+from typing import Type, List, Dict, Optional
+from backend.tools.expressions import evaluate, format_result, rows_to_columns
 
 class CalculatorInput(BaseModel):
     """Input for calculator tool"""
@@ -12,19 +12,19 @@ class CalculatorTool(BaseTool):
     description: str = """
     Perform mathematical calculations.
     Use this for arithmetic, comparisons, or computing metrics.
+    Numeric columns returned by a graph_query earlier in the same plan are available as variables
+    (e.g. `m.rating` or just `rating`), so aggregate them instead of copying numbers.
+    Functions: mean, median, std, sum, count, min, max, abs, round, sqrt, log.
     Example: "125000000 / 50000000" for ROI calculations
+    Example: "mean(rating)" or "sum(revenue) / sum(budget)" after a graph_query returning those columns
     """
     args_schema: Type[BaseModel] = CalculatorInput
     
-    def _run(self, expression: str) -> str:
-        """Evaluate mathematical expression"""
+    def _run(self, expression: str, rows: Optional[List[Dict]] = None) -> str:
+        """Evaluate mathematical expression, vectorized over columns of previous query rows"""
         try:
-            # Safe evaluation with limited scope
-            safe_dict = {
-                'abs': abs, 'round': round, 'min': min, 'max': max,
-                'sum': sum, 'pow': pow, 'sqrt': math.sqrt
-            }
-            result = eval(expression, {"__builtins__": {}}, safe_dict)
-            return f"Result: {result}"
+            # Whitelisted, cached AST evaluation with exponent, size and time limits
+            result = evaluate(expression, rows_to_columns(rows or []))
+            return f"Result: {format_result(result)}"
         except Exception as e:
             return f"Calculation error: {str(e)}"
@@ -0,0 +1,186 @@
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+import operator
+import time
+import ast
+
+MAX_EXPONENT = 1000
+MAX_ARRAY_SIZE = 1_000_000
+MAX_EXPRESSION_LENGTH = 2000
+TIME_LIMIT_SECONDS = 0.5
+
+
+class ExpressionError(ValueError):
+    """The expression is invalid, unsafe or exceeded its evaluation limits"""
+
+
+def _reduce(nan_fn, elementwise_fn):
+    """One argument reduces an array; several combine elementwise (e.g. max(a, b))"""
+    def fn(*args):
+        if not args:
+            raise ExpressionError("function needs at least one argument")
+        if len(args) == 1:
+            return nan_fn(args[0])
+        result = args[0]
+        for arg in args[1:]:
+            result = elementwise_fn(result, arg)
+        return result
+    return fn
+
+
+FUNCTIONS = {
+    'mean': np.nanmean,
+    'avg': np.nanmean,
+    'median': np.nanmedian,
+    'std': np.nanstd,
+    'sum': np.nansum,
+    'count': lambda values: np.count_nonzero(~np.isnan(values)),
+    'min': _reduce(np.nanmin, np.minimum),
+    'max': _reduce(np.nanmax, np.maximum),
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'log': np.log,
+    'round': lambda values, digits=0: np.round(values, int(digits)),
+}
+
+
+def _checked_pow(base, exponent):
+    if np.max(np.abs(exponent)) > MAX_EXPONENT:
+        raise ExpressionError(f"exponent larger than {MAX_EXPONENT}")
+    return np.power(base, exponent)
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _checked_pow,
+}
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+Evaluator = Callable[[Dict[str, np.ndarray], float], np.ndarray]
+
+
+def _check(value, deadline: float):
+    if time.perf_counter() > deadline:
+        raise ExpressionError(f"evaluation exceeded {TIME_LIMIT_SECONDS}s")
+    if np.size(value) > MAX_ARRAY_SIZE:
+        raise ExpressionError(f"intermediate result larger than {MAX_ARRAY_SIZE} values")
+    return value
+
+
+def _variable_name(node: ast.AST) -> str:
+    """`rating` or `m.rating` (a dotted column name returned by Cypher)"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{_variable_name(node.value)}.{node.attr}"
+    raise ExpressionError(f"unsupported syntax: {type(node).__name__}")
+
+
+def _compile_node(node: ast.AST, names: set) -> Evaluator:
+    """Translate a whitelisted AST node into a closure evaluating it"""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = np.float64(node.value)
+        return lambda env, deadline: value
+
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        name = _variable_name(node)
+        names.add(name)
+
+        def load(env, deadline):
+            if name not in env:
+                raise ExpressionError(f"unknown variable '{name}'. Available: {', '.join(sorted(env)) or 'none'}")
+            return env[name]
+        return load
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        op = BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left, names), _compile_node(node.right, names)
+        return lambda env, deadline: _check(op(left(env, deadline), right(env, deadline)), deadline)
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        op = UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, names)
+        return lambda env, deadline: op(operand(env, deadline))
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_compile_node(item, names) for item in node.elts]
+        return lambda env, deadline: _check(
+            np.concatenate([np.atleast_1d(item(env, deadline)) for item in items]) if items else np.array([]),
+            deadline
+        )
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in FUNCTIONS:
+            raise ExpressionError(f"unknown function '{node.func.id}'. Available: {', '.join(FUNCTIONS)}")
+        fn = FUNCTIONS[node.func.id]
+        args = [_compile_node(arg, names) for arg in node.args]
+        return lambda env, deadline: _check(fn(*[arg(env, deadline) for arg in args]), deadline)
+
+    raise ExpressionError(f"unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Tuple[Evaluator, frozenset]:
+    """Parse and validate an expression once; returns the evaluator and its variable names"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"invalid syntax: {e.msg}")
+    names = set()
+    evaluator = _compile_node(tree.body, names)
+    return evaluator, frozenset(names)
+
+
+def evaluate(expression: str, variables: Dict[str, np.ndarray] = None):
+    """Evaluate an arithmetic expression, vectorized over named arrays"""
+    evaluator, _ = compile_expression(expression)
+    env = {name: np.asarray(values, dtype=np.float64) for name, values in (variables or {}).items()}
+    deadline = time.perf_counter() + TIME_LIMIT_SECONDS
+    with np.errstate(all='ignore'):
+        result = evaluator(env, deadline)
+    if np.size(result) == 1 and not np.isfinite(result):
+        raise ExpressionError("result is undefined (division by zero or overflow)")
+    return result
+
+
+def rows_to_columns(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    """Numeric columns of Cypher result rows as float arrays.
+
+    `m.rating` is also exposed as `rating` when that short name is unambiguous.
+    Missing values become NaN and are skipped by the aggregates; columns
+    holding non-numeric values are left out.
+    """
+    keys = {key for row in rows for key in row}
+    columns = {}
+    for key in keys:
+        values = [row.get(key) for row in rows]
+        numeric = [v for v in values if v is not None]
+        if not numeric or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in numeric):
+            continue
+        columns[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    short_names = {}
+    for key in columns:
+        short_names.setdefault(key.rsplit('.', 1)[-1], []).append(key)
+    for short, full in short_names.items():
+        if len(full) == 1 and short not in columns:
+            columns[short] = columns[full[0]]
+    return columns
+
+
+def format_result(result) -> str:
+    if np.ndim(result) == 0:
+        value = float(result)
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else f"{value:.6g}"
+    return "[" + ", ".join(format_result(value) for value in np.asarray(result).ravel()) + "]"
@@ -1,6 +1,6 @@
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type
+from typing import Type, List, Dict, Tuple
 from backend.graphrag.neo4j_client import Neo4jClient
 
 class GraphQueryInput(BaseModel):
@@ -15,15 +15,20 @@ class GraphQueryTool(BaseTool):
     
     Example queries:
     - Find movies by actor: MATCH (p:Person {name: 'Keanu Reeves'})-[:ACTED_IN]->(m:Movie) RETURN m.title
-    - Find similar movies: MATCH (m1:Movie {title: 'The Matrix'})-[:SIMILAR_TO]->(m2:Movie) RETURN m2.title, m2.rating
+    - Find similar movies: MATCH (m1:Movie {title: 'The Matrix'})-[:SIMILAR_TO]->(m2:Movie) RETURN DISTINCT m2.title, m2.rating
+      (SIMILAR_TO.method is 'embedding' for similar plots, 'metadata' for shared cast, crew and keywords)
     """
     args_schema: Type[BaseModel] = GraphQueryInput
     neo4j_client: Neo4jClient = Field(exclude=True)
     
     def _run(self, cypher_query: str) -> str:
         """Execute the Cypher query"""
+        return self.execute(cypher_query)[1]
+    
+    def execute(self, cypher_query: str, params: Dict = None) -> Tuple[List[Dict], str]:
+        """Execute the Cypher query, returning the raw rows and the tool output"""
         try:
-            results = self.neo4j_client.execute_cypher(cypher_query)
-            return f"Query results: {results}"
+            results = self.neo4j_client.execute_cypher(cypher_query, params)
+            return results, f"Query results: {results}"
         except Exception as e:
-            return f"Error executing query: {str(e)}"
+            return [], f"Error executing query: {str(e)}"
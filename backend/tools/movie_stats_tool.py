@@ -0,0 +1,34 @@
+from langchain.tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import Type
+from backend.agents.specialist_agents import AnalysisAgent
+
+class MovieStatsInput(BaseModel):
+    """Input for movie statistics tool"""
+    query: str = Field(description="Aggregate query: agg(column) [where key = value [and ...]] [by key]")
+
+class MovieStatsTool(BaseTool):
+    name: str = "movie_stats"
+    description: str = """
+    Compute statistics over the movie catalog (ratings, budgets, revenue, ROI, years) instantly.
+    Prefer this over graph_query + calculator for averages, totals, extremes and comparisons.
+    Syntax: agg(column) [where key = value [and ...]] [by key]
+    - agg: mean, sum, min, max, median, count
+    - column: rating, budget, revenue, year, roi, profit (or * with count)
+    - filter keys: title, director, studio, genre (=, !=, in (a, b)); numeric columns (=, >, >=, <, <=)
+    - group keys: title, director, studio, genre, year
+    - quote values containing "and" or "by": title = "Pride and Prejudice"
+    Examples:
+    - mean(rating) where director = Christopher Nolan
+    - mean(roi) where title in (The Matrix, Inception) by title
+    - count(*) where rating >= 8.5 by genre
+    """
+    args_schema: Type[BaseModel] = MovieStatsInput
+    analysis_agent: AnalysisAgent = Field(exclude=True)
+    
+    def _run(self, query: str) -> str:
+        """Run the aggregate query on the columnar snapshot"""
+        result = self.analysis_agent.analyze(query)
+        if 'error' in result:
+            return f"Stats error: {result['error']}"
+        return f"Stats results: {result}"
@@ -9,8 +9,11 @@ const api = axios.create({
     },
 });
 
+// One conversation per page load, so follow-up questions keep their context
+const SESSION_ID = crypto.randomUUID();
+
 export const askQuestion = async (query) => {
-    const response = await api.post('/ask', { query });
+    const response = await api.post('/ask', { query, session_id: SESSION_ID });
     return response.data;
 };
 
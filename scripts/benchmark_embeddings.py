@@ -0,0 +1,109 @@
+"""Benchmark: embedding backends against the sentence-transformers fp32 model.
+
+For every EMBEDDING_BACKEND it reports model load time, single-query
+latency (what HybridRetriever.retrieve pays per request), catalog batch
+throughput, peak RSS of a fresh process, and fidelity: cosine similarity of
+its catalog embeddings to the torch ones, and how many of each query's top 5
+movies agree with torch.
+
+    python scripts/export_onnx_embedder.py
+    python scripts/benchmark_embeddings.py --backends torch onnx onnx-int8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to sys.path to allow imports from 'backend'
+sys.path.append(os.getcwd())
+
+from backend.graphrag.embeddings import EMBEDDING_BACKENDS
+
+QUERIES = [
+    "mind-bending science fiction about dreams",
+    "movies about the mafia and family loyalty",
+    "a hacker discovers reality is a simulation",
+    "space travel to save humanity",
+    "prison friendship and hope",
+    "a superhero facing chaos in Gotham",
+    "life story of a simple man through American history",
+    "nonlinear crime stories in Los Angeles",
+]
+
+
+def measure(backend, texts, queries, repeats):
+    """Runs in a fresh process, so RSS only counts this backend"""
+    from backend.graphrag.embeddings import load_embedder
+
+    started = time.perf_counter()
+    model = load_embedder(backend)
+    load_seconds = time.perf_counter() - started
+    model.encode("warmup")
+
+    started = time.perf_counter()
+    catalog = np.asarray(model.encode(texts, batch_size=32), dtype=np.float32)
+    batch_seconds = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            started = time.perf_counter()
+            model.encode(query)
+            latencies.append(time.perf_counter() - started)
+    query_embeddings = np.asarray(model.encode(queries), dtype=np.float32)
+
+    return {
+        'load_seconds': load_seconds,
+        'texts_per_second': len(texts) / batch_seconds,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'catalog': catalog,
+        'queries': query_embeddings,
+    }
+
+
+def normalize(vectors):
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='data/processed/movies_with_embeddings.json')
+    parser.add_argument('--backends', nargs='+', default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--top-k', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.data, 'r') as f:
+        texts = [f"{movie['title']} {movie['overview']}" for movie in json.load(f)]
+    top_k = min(args.top_k, len(texts))
+
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for backend in dict.fromkeys(['torch', *args.backends]):
+        with context.Pool(1) as pool:
+            results[backend] = pool.apply(measure, (backend, texts, QUERIES, args.repeats))
+
+    reference = results['torch']
+    reference_top = np.argsort(-normalize(reference['queries']) @ normalize(reference['catalog']).T, axis=1)[:, :top_k]
+
+    print(f"{len(texts)} catalog texts, {len(QUERIES)} queries x {args.repeats}")
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'texts/s':>8} {'RSS MB':>7} "
+          f"{'cos mean':>9} {'cos min':>8} {'top-' + str(top_k):>6}")
+    for backend, result in results.items():
+        cosine = np.sum(normalize(result['catalog']) * normalize(reference['catalog']), axis=1)
+        top = np.argsort(-normalize(result['queries']) @ normalize(result['catalog']).T, axis=1)[:, :top_k]
+        agreement = np.mean([len(set(a) & set(b)) / top_k for a, b in zip(top, reference_top)])
+        print(f"{backend:<10} {result['load_seconds']:>7.2f} {result['p50_ms']:>7.2f} {result['p95_ms']:>7.2f} "
+              f"{result['texts_per_second']:>8.1f} {result['peak_rss_mb']:>7.0f} "
+              f"{cosine.mean():>9.4f} {cosine.min():>8.4f} {agreement:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
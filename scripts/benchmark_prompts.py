@@ -0,0 +1,67 @@
+"""Microbenchmark: per-call prompt construction in MovieAgentSystem.
+
+Compares building a ChatPromptTemplate on every call (the previous
+behaviour) against the prompts compiled once in backend/agents/prompts.py.
+
+    python scripts/benchmark_prompts.py
+"""
+import os
+import sys
+import timeit
+
+# Add the project root to sys.path to allow imports from 'backend'
+sys.path.append(os.getcwd())
+
+from langchain_core.prompts import ChatPromptTemplate
+from backend.agents.prompts import GENERATE_ANSWER_PROMPT, build_tool_prompt
+from backend.tools.calculator_tool import CalculatorTool
+from backend.tools.search_tool import WebSearchTool
+
+TOOLS = [WebSearchTool(), CalculatorTool()]
+QUERY = "Compare the ratings of The Matrix and Inception"
+CONTEXT = "The Matrix (1999); rating 8.7; Genres: Action, Science Fiction. Plot: A computer hacker learns..." * 5
+
+def per_call_templates():
+    prompt = ChatPromptTemplate.from_template("""
+        You are an AI assistant with access to these tools:
+        {tools}
+        
+        Query: {query}
+        Context from knowledge graph: {context}
+        
+        Decide which tool to use and provide the input.
+        If no tool is needed, say "NO_TOOL_NEEDED".
+        
+        Format: TOOL_NAME: input
+        """)
+    tool_descriptions = "\n".join([f"- {tool.name}: {tool.description}" for tool in TOOLS])
+    tool_prompt = prompt.format(tools=tool_descriptions, query=QUERY, context=CONTEXT)
+    
+    prompt = ChatPromptTemplate.from_template("""
+        You are a helpful movie recommendation assistant.
+        
+        User Query: {query}
+        
+        Knowledge Graph Context:
+        {graph_context}
+        
+        Tool Results:
+        {tool_results}
+        
+        Reformulate the gathered information into a natural, high-quality answer.
+        """)
+    answer_prompt = prompt.format(query=QUERY, graph_context=CONTEXT, tool_results="calculator: Result: 0.1")
+    return tool_prompt, answer_prompt
+
+TOOL_PROMPT = build_tool_prompt(TOOLS)
+
+def compiled_templates():
+    tool_prompt = TOOL_PROMPT.format(query=QUERY, context=CONTEXT)
+    answer_prompt = GENERATE_ANSWER_PROMPT.format(history="", query=QUERY, graph_context=CONTEXT, tool_results="calculator: Result: 0.1")
+    return tool_prompt, answer_prompt
+
+if __name__ == "__main__":
+    number = 2000
+    for name, fn in [("per-call ChatPromptTemplate", per_call_templates), ("compiled prompts", compiled_templates)]:
+        best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print(f"{name:<30} {best * 1e6:8.1f} µs per request")
@@ -0,0 +1,41 @@
+"""Export EMBEDDING_MODEL to ONNX, fp32 and dynamically quantized to int8.
+
+Writes ONNX_MODEL_DIR (onnx/model.onnx, onnx/model_qint8.onnx, tokenizer
+and pooling config) for EMBEDDING_BACKEND=onnx or onnx-int8. Needs the
+export extras, which the API does not:
+
+    pip install "sentence-transformers[onnx]"
+    python scripts/export_onnx_embedder.py --quantization avx2
+"""
+import argparse
+import os
+import sys
+
+# Add the project root to sys.path to allow imports from 'backend'
+sys.path.append(os.getcwd())
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+from backend import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=config.EMBEDDING_MODEL)
+    parser.add_argument('--output', default=config.ONNX_MODEL_DIR)
+    parser.add_argument(
+        '--quantization', default='avx2', choices=['arm64', 'avx2', 'avx512', 'avx512_vnni'],
+        help="int8 kernels of the API nodes' CPUs"
+    )
+    args = parser.parse_args()
+
+    print(f"Exporting {args.model} to ONNX...")
+    model = SentenceTransformer(args.model, backend="onnx")
+    model.save_pretrained(args.output)
+
+    print(f"Quantizing to int8 ({args.quantization})...")
+    export_dynamic_quantized_onnx_model(model, args.quantization, args.output, file_suffix="qint8")
+    print(f"Saved ONNX models to {os.path.join(args.output, 'onnx')}.")
+
+
+if __name__ == "__main__":
+    main()
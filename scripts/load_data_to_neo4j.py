@@ -1,8 +1,24 @@
 from neo4j import GraphDatabase
+import argparse
 import json
 import os
+import shlex
+import sys
 from dotenv import load_dotenv
 
+# Add the project root to sys.path to allow imports from 'backend'
+sys.path.append(os.getcwd())
+
+from backend.graphrag.neo4j_client import MOVIE_CONTEXT_QUERY
+from backend.graphrag.recommendations import NeighbourIndex, NEIGHBOURS_PATH
+from backend.graphrag.movie_columns import export_columnar_snapshot, COLUMNS_PATH
+from backend.graphrag.bulk_import import write_import_csvs, import_command, IMPORT_DIR
+from backend.graphrag.metadata_similarity import metadata_similarity_edges
+from backend.graphrag.vector_index import export_vector_index, VECTOR_INDEX_DIR
+from backend.graphrag.graph_snapshot import (
+    publish_snapshot, SNAPSHOT_ROOT, SNAPSHOT_NODES_QUERY, SNAPSHOT_RELATIONSHIPS_QUERY
+)
+
 # Load environment variables
 load_dotenv(dotenv_path='backend/.env')
 
@@ -144,17 +160,148 @@ class Neo4jLoader:
                 CALL db.index.vector.queryNodes('movie_embeddings', 10, m1.embedding)
                 YIELD node as m2, score
                 WHERE m1 <> m2 AND score > $threshold
-                MERGE (m1)-[r:SIMILAR_TO]->(m2)
-                SET r.similarity_score = score, r.method = 'embedding'
+                MERGE (m1)-[r:SIMILAR_TO {method: 'embedding'}]->(m2)
+                SET r.similarity_score = score
             """, threshold=threshold)
         print("Similarity edges created.")
+    
+    def create_metadata_similarity_edges(self, data_path, threshold=0.25, batch_size=1000):
+        """Create SIMILAR_TO relationships from shared genres, keywords, cast and crew.
+        
+        Candidate pairs come from MinHash LSH over each movie's metadata set and
+        are scored by weighted Jaccard, so the job scales near-linearly instead of
+        comparing every pair of movies.
+        """
+        print(f"Creating metadata similarity edges (threshold > {threshold})...")
+        with open(data_path, 'r') as f:
+            movies = json.load(f)
+        edges = [
+            {'source': source, 'target': target, 'score': score}
+            for source, target, score in metadata_similarity_edges(movies, threshold)
+        ]
+        
+        with self.driver.session() as session:
+            session.run("MATCH ()-[r:SIMILAR_TO {method: 'metadata'}]->() DELETE r")
+            for start in range(0, len(edges), batch_size):
+                session.run("""
+                    UNWIND $rows as row
+                    MATCH (m1:Movie {id: row.source}), (m2:Movie {id: row.target})
+                    MERGE (m1)-[r:SIMILAR_TO {method: 'metadata'}]->(m2)
+                    SET r.similarity_score = row.score
+                """, rows=edges[start:start + batch_size])
+        print(f"Created {len(edges)} metadata similarity edges.")
+    
+    def materialize_movie_context(self, batch_size=500):
+        """Store a ready-made context document on every Movie node.
+        
+        Retrieval reads `m.context` with a single id lookup instead of
+        expanding genres, crew, cast and similar movies per query. Must be
+        re-run whenever movies or their relationships are (re)loaded.
+        """
+        print("Materializing movie context documents...")
+        with self.driver.session() as session:
+            movie_ids = [record['id'] for record in session.run("MATCH (m:Movie) RETURN m.id as id")]
+            
+            for start in range(0, len(movie_ids), batch_size):
+                batch = movie_ids[start:start + batch_size]
+                rows = [
+                    {'id': record['id'], 'context': json.dumps(dict(record))}
+                    for record in session.run(MOVIE_CONTEXT_QUERY, ids=batch)
+                ]
+                session.run("""
+                    UNWIND $rows as row
+                    MATCH (m:Movie {id: row.id})
+                    SET m.context = row.context
+                """, rows=rows)
+        print(f"Materialized context for {len(movie_ids)} movies.")
+    
+    def build_recommendation_table(self, data_path, output_path=NEIGHBOURS_PATH, top_n=20):
+        """Precompute the top-N neighbour table served by RecommendationAgent"""
+        print("Building recommendation neighbour table...")
+        with open(data_path, 'r') as f:
+            movies = json.load(f)
+        
+        # Metadata edges are left out: the table scores shared features itself
+        with self.driver.session() as session:
+            similar_edges = [
+                (record['source'], record['target'], record['score'])
+                for record in session.run("""
+                    MATCH (m1:Movie)-[r:SIMILAR_TO {method: 'embedding'}]->(m2:Movie)
+                    RETURN m1.id as source, m2.id as target, r.similarity_score as score
+                """)
+            ]
+        
+        NeighbourIndex.from_movies(movies, similar_edges, top_n).save(output_path)
+        print(f"Saved neighbours for {len(movies)} movies to {output_path}.")
+    
+    def export_columns(self, data_path, output_path=COLUMNS_PATH):
+        """Export movie numerics and grouping keys for AnalysisAgent"""
+        with open(data_path, 'r') as f:
+            movies = json.load(f)
+        export_columnar_snapshot(movies, output_path)
+        print(f"Exported columnar snapshot of {len(movies)} movies to {output_path}.")
+    
+    def export_vectors(self, data_path, output_dir=VECTOR_INDEX_DIR):
+        """Export float32 embeddings with int8/binary codes for VECTOR_SEARCH_BACKEND"""
+        with open(data_path, 'r') as f:
+            movies = json.load(f)
+        export_vector_index(movies, output_dir)
+        print(f"Exported vector index of {len(movies)} movies to {output_dir}.")
+    
+    def export_graph_snapshot(self, root=SNAPSHOT_ROOT):
+        """Publish a CSR copy of the graph; running API workers swap to it on their next check"""
+        print("Exporting graph snapshot...")
+        with self.driver.session() as session:
+            nodes = [dict(record) for record in session.run(SNAPSHOT_NODES_QUERY)]
+            relationships = [dict(record) for record in session.run(SNAPSHOT_RELATIONSHIPS_QUERY)]
+        name = publish_snapshot(nodes, relationships, root)
+        print(f"Published {name} ({len(nodes)} nodes, {len(relationships)} relationships).")
+
+    def await_indexes(self, timeout_seconds=3600):
+        """Block until every index is online (indexes created after a bulk import populate in the background)"""
+        with self.driver.session() as session:
+            session.run("CALL db.awaitIndexes($timeout)", timeout=timeout_seconds)
+
+def export_bulk_import(data_path, import_dir):
+    """Write neo4j-admin import CSVs; the database must be stopped to import them"""
+    with open(data_path, 'r') as f:
+        movies = json.load(f)
+    counts = write_import_csvs(movies, import_dir)
+    for filename, rows in counts.items():
+        print(f"  {filename}: {rows} rows")
+    print("Import with the database stopped, then run this script with --mode post-import:")
+    print("  " + shlex.join(import_command(import_dir)))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the processed movies into Neo4j")
+    parser.add_argument(
+        '--mode', choices=['transactional', 'bulk-csv', 'post-import'], default='transactional',
+        help="transactional: load through Cypher; bulk-csv: write neo4j-admin import CSVs for a first "
+             "build of a large catalog; post-import: create indexes and derived data after that import"
+    )
+    parser.add_argument('--data', default='data/processed/movies_with_embeddings.json')
+    parser.add_argument('--import-dir', default=IMPORT_DIR)
+    args = parser.parse_args()
+
+    if args.mode == 'bulk-csv':
+        export_bulk_import(args.data, args.import_dir)
+        sys.exit(0)
+
     loader = Neo4jLoader()
     try:
+        # After a bulk import, constraints and indexes are built over the loaded graph
         loader.create_constraints()
-        loader.load_movies('data/processed/movies_with_embeddings.json')
+        if args.mode == 'transactional':
+            loader.load_movies(args.data)
+        else:
+            loader.await_indexes()
         loader.create_similarity_edges()
+        loader.create_metadata_similarity_edges(args.data)
+        loader.materialize_movie_context()
+        loader.build_recommendation_table(args.data)
+        loader.export_columns(args.data)
+        loader.export_vectors(args.data)
+        loader.export_graph_snapshot()
         print("Data loading completed successfully!")
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -1,11 +1,17 @@
 import json
 import os
-from sentence_transformers import SentenceTransformer
+import sys
 
-# Load embedding model
+# Add the project root to sys.path to allow imports from 'backend'
+sys.path.append(os.getcwd())
+
+from backend import config
+from backend.graphrag.embeddings import load_embedder, write_embedding_info
+
+# Load embedding model (EMBEDDING_MODEL on EMBEDDING_BACKEND, as used for queries)
 # This will download the model to the local cache if not already present
-print("Loading sentence-transformer model...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
+print(f"Loading embedding model ({config.EMBEDDING_BACKEND} backend)...")
+model = load_embedder()
 
 def prepare_movie_data(input_path, output_path):
     """Prepare and enrich movie data with embeddings"""
@@ -25,15 +31,16 @@ def prepare_movie_data(input_path, output_path):
     
     # Generate embeddings for movie overviews
     print("Generating embeddings...")
-    for movie in movies:
-        text = f"{movie['title']} {movie['overview']}"
-        embedding = model.encode(text).tolist()
-        movie['embedding'] = embedding
+    texts = [f"{movie['title']} {movie['overview']}" for movie in movies]
+    for movie, embedding in zip(movies, model.encode(texts, batch_size=32)):
+        movie['embedding'] = embedding.tolist()
     
     # Save processed data
     print(f"Saving processed data to {output_path}...")
     with open(output_path, 'w') as f:
         json.dump(movies, f, indent=2)
+    # The API checks its EMBEDDING_MODEL/EMBEDDING_BACKEND against this at warmup
+    write_embedding_info(os.path.join(os.path.dirname(output_path), 'embedding_info.json'))
     
     print(f"Successfully processed {len(movies)} movies")
 
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import httpx
+from fastapi.testclient import TestClient
+from backend.agents.llm_gateway import DeadlineExceeded, remaining_time
+from backend.api import main
+
+def test_ask_rejects_non_positive_request_timeouts():
+    client = TestClient(main.app)
+    
+    for timeout in ("0", "-5"):
+        response = client.post("/ask", json={"query": "q"}, headers={"X-Request-Timeout": timeout})
+        assert response.status_code == 422
+
+class SlowAgent:
+    """Answers after `seconds`, failing like the LLM gateway once its deadline passed"""
+    
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.runs = 0
+    
+    def run(self, query, session_id=None):
+        self.runs += 1
+        time.sleep(self.seconds)
+        if remaining_time() <= 0:
+            raise DeadlineExceeded("LLM call exceeded the request deadline")
+        return {"answer": "Christopher Nolan", "tool_calls": [], "reasoning": [], "context_used": 0}
+
+def test_coalesced_request_keeps_its_own_longer_deadline(monkeypatch):
+    agent = SlowAgent(0.5)
+    monkeypatch.setattr(main, "agent_system", agent)
+    
+    async def ask(timeout):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            return await client.post("/ask", json={"query": "Who directed Inception?"},
+                                     headers={"X-Request-Timeout": str(timeout)})
+    
+    async def both():
+        impatient = asyncio.create_task(ask(0.2))
+        await asyncio.sleep(0.05)
+        return await impatient, await ask(5)
+    
+    impatient, patient = asyncio.run(both())
+    
+    assert impatient.status_code == 504
+    assert patient.status_code == 200 and patient.json()['answer'] == "Christopher Nolan"
+    assert agent.runs == 1
+
+def test_timed_out_profiled_request_keeps_its_agent_slot(monkeypatch):
+    agent = SlowAgent(0.5)
+    monkeypatch.setattr(main, "agent_system", agent)
+    monkeypatch.setattr(main.config, "PROFILE_TOKEN", "secret")
+    lane = main.scheduler.lanes["agent"]
+    
+    async def profiled():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            response = await client.post("/ask", json={"query": "Who directed Inception?"},
+                                         headers={"X-Request-Timeout": "0.1", "X-Profile-Token": "secret"})
+        # The agent thread is still running, so its slot must still be taken
+        held = lane.active
+        await asyncio.sleep(0.6)
+        return response, held, lane.active
+    
+    response, held, released = asyncio.run(profiled())
+    
+    assert response.status_code == 504
+    assert held == 1
+    assert released == 0
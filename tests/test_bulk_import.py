@@ -0,0 +1,56 @@
+import csv
+from backend.graphrag.bulk_import import write_import_csvs, import_command, NODE_FILES, RELATIONSHIP_FILES
+
+
+def read(directory, filename):
+    with open(directory / filename, newline='') as f:
+        return list(csv.reader(f))
+
+
+MOVIES = [
+    {
+        'id': 'm1', 'title': 'Heat', 'year': 1995, 'rating': 8.3, 'budget': None, 'revenue': 187436818,
+        'overview': 'A group of professional bank robbers, "the crew", starts to feel the heat.',
+        'genres': ['Crime', 'Drama', 'Crime'], 'keywords': ['heist'],
+        'director': {'id': 'p1', 'name': 'Michael Mann', 'birth_year': 1943},
+        'actors': [{'id': 'p2', 'name': 'Al Pacino', 'role': 'Vincent Hanna', 'order': 1}],
+        'studio': {'id': 's1', 'name': 'Warner Bros', 'country': 'USA', 'founded_year': 1923},
+        'embedding': [0.25, -0.5],
+    },
+    {
+        'id': 'm2', 'title': 'Collateral', 'year': 2004, 'rating': 7.5,
+        'genres': ['Crime'], 'keywords': ['heist', 'taxi'],
+        'director': {'id': 'p1', 'name': 'Michael Mann', 'birth_year': 1943},
+        'actors': [{'id': 'p3', 'name': 'Tom Cruise', 'role': 'Vincent', 'order': 1}],
+        'embedding': [0.1, 0.2],
+    },
+]
+
+
+def test_csvs_are_deduplicated_with_typed_headers(tmp_path):
+    # An actor seen before they direct still gets their birth year
+    actor_first = dict(MOVIES[1], id='m3', director={'id': 'p2', 'name': 'Al Pacino', 'birth_year': 1940})
+    counts = write_import_csvs(MOVIES + [MOVIES[0], actor_first], str(tmp_path))
+
+    movies = read(tmp_path, 'movies.csv')
+    assert movies[0] == NODE_FILES['Movie'][1]
+    assert [row[0] for row in movies[1:]] == ['m1', 'm2', 'm3']
+    assert movies[1][4] == ''  # null budget leaves the property unset
+    assert movies[1][7] == '0.25;-0.5'
+
+    people = {row[0]: row for row in read(tmp_path, 'people.csv')[1:]}
+    assert people == {'p1': ['p1', 'Michael Mann', '1943'], 'p2': ['p2', 'Al Pacino', '1940'],
+                      'p3': ['p3', 'Tom Cruise', '']}
+    assert [row[0] for row in read(tmp_path, 'genres.csv')[1:]] == ['Crime', 'Drama']
+    assert [row[0] for row in read(tmp_path, 'keywords.csv')[1:]] == ['heist', 'taxi']
+    assert read(tmp_path, 'has_genre.csv')[1:3] == [['m1', 'Crime', '1.0'], ['m1', 'Drama', '1.0']]
+    assert counts == {'movies.csv': 3, 'people.csv': 3, 'genres.csv': 2, 'keywords.csv': 2,
+                      'studios.csv': 1, 'directed.csv': 3, 'acted_in.csv': 3, 'has_genre.csv': 4,
+                      'has_keyword.csv': 5, 'produced_by.csv': 1}
+
+
+def test_import_command_lists_every_file():
+    command = import_command('/data/processed/import')
+    assert command[:5] == ['neo4j-admin', 'database', 'import', 'full', 'neo4j']
+    assert '--nodes=Movie=/data/processed/import/movies.csv' in command
+    assert sum(arg.startswith('--relationships=') for arg in command) == len(RELATIONSHIP_FILES)
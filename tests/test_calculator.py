@@ -0,0 +1,62 @@
+import time
+import pytest
+from backend.tools.calculator_tool import CalculatorTool
+from backend.tools.expressions import ExpressionError, compile_expression, evaluate
+
+rows = [
+    {"m.title": "Inception", "m.rating": 8.8, "m.budget": 160000000, "m.revenue": 829895144},
+    {"m.title": "Interstellar", "m.rating": 8.6, "m.budget": 165000000, "m.revenue": 677471339},
+    {"m.title": "The Dark Knight", "m.rating": 9.0, "m.budget": 185000000, "m.revenue": None},
+]
+
+def test_scalar_arithmetic():
+    calculator = CalculatorTool()
+    
+    assert calculator._run("125000000 / 50000000") == "Result: 2.5"
+    assert calculator._run("round(sqrt(16) + 2 ** 3, 1)") == "Result: 12"
+    assert calculator._run("max(3, -4, 7)") == "Result: 7"
+
+def test_vectorized_over_query_rows():
+    calculator = CalculatorTool()
+    
+    assert calculator._run("mean(rating)", rows=rows) == "Result: 8.8"
+    assert calculator._run("count(m.revenue)", rows=rows) == "Result: 2"
+    # Missing values are skipped by the aggregates
+    assert calculator._run("round(sum(revenue) / sum(budget), 2)", rows=rows) == "Result: 2.96"
+    assert calculator._run("mean(title)", rows=rows).startswith("Calculation error: unknown variable 'title'")
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('echo hacked')",
+    "().__class__.__bases__",
+    "open('/etc/passwd')",
+    "lambda: 1",
+    "[x for x in range(10)]",
+    "mean(rating, axis=0)",
+    "'abc' * 3",
+])
+def test_rejects_unsafe_expressions(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression, {"rating": [1.0]})
+
+def test_limits(monkeypatch):
+    with pytest.raises(ExpressionError, match="exponent"):
+        evaluate("9 ** 9 ** 9")
+    with pytest.raises(ExpressionError, match="undefined"):
+        evaluate("1 / 0")
+    with pytest.raises(ExpressionError, match="longer than"):
+        evaluate(" + ".join(["1"] * 1000))
+    
+    monkeypatch.setattr("backend.tools.expressions.TIME_LIMIT_SECONDS", 0.001)
+    start = time.perf_counter()
+    with pytest.raises(ExpressionError, match="exceeded"):
+        evaluate("sum(" + " + ".join(["x * x"] * 200) + ")", {"x": [1.0] * 500000})
+    assert time.perf_counter() - start < 1
+
+def test_expressions_are_compiled_once():
+    compile_expression.cache_clear()
+    for _ in range(10):
+        evaluate("mean(rating) * 2", {"rating": [1.0, 2.0]})
+    
+    info = compile_expression.cache_info()
+    assert info.misses == 1
+    assert info.hits == 9
@@ -0,0 +1,103 @@
+import asyncio
+from backend.api.coalescing import SingleFlight, normalize_query
+
+def test_normalize_query():
+    assert normalize_query("  Who directed   Inception? ") == normalize_query("who directed inception")
+
+def test_concurrent_duplicates_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"answer": "Christopher Nolan"}
+    
+    async def main():
+        results = await asyncio.gather(*[flights.do("q", compute) for _ in range(10)])
+        other = await flights.do("other", compute)
+        return results, other
+    
+    results, _ = asyncio.run(main())
+    
+    assert len(calls) == 2
+    assert all(result == {"answer": "Christopher Nolan"} for result in results)
+    assert flights.stats == {'requests': 11, 'executions': 2, 'coalesced': 9}
+    assert flights.in_flight == 0
+
+def test_failures_reach_every_waiter_and_release_the_key():
+    flights = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+    
+    async def main():
+        return await asyncio.gather(*[flights.do("q", fail) for _ in range(3)], return_exceptions=True)
+    
+    results = asyncio.run(main())
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.in_flight == 0
+
+def test_a_waiter_timing_out_does_not_cancel_the_shared_run():
+    flights = SingleFlight()
+    
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    async def main():
+        impatient = flights.do("q", compute, timeout=0.01)
+        patient = flights.do("q", compute)
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+    
+    impatient, patient = asyncio.run(main())
+    
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "done"
+
+def test_shared_run_gets_the_latest_deadline_of_its_callers():
+    flights = SingleFlight()
+    deadlines = []
+    
+    async def compute():
+        deadlines.append(flights.deadline("q"))
+        await asyncio.sleep(0.1)
+        return deadlines[0].remaining()
+    
+    async def main():
+        short = flights.do("q", compute, timeout=0.05)
+        long = flights.do("q", compute, timeout=5)
+        return await asyncio.gather(short, long, return_exceptions=True)
+    
+    short, long = asyncio.run(main())
+    
+    # Each caller waits its own timeout; the run itself keeps the longer one
+    assert isinstance(short, asyncio.TimeoutError)
+    assert 4 < long < 5
+
+def test_followers_retry_when_the_shared_run_is_shed():
+    flights = SingleFlight()
+    attempts = []
+    
+    class Shed(Exception):
+        pass
+    
+    async def compute():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise Shed()
+        return "done"
+    
+    async def main():
+        return await asyncio.gather(
+            *[flights.do("q", compute, timeout=1, retry_on=(Shed,)) for _ in range(3)], return_exceptions=True
+        )
+    
+    first, *followers = asyncio.run(main())
+    
+    assert isinstance(first, Shed)
+    assert followers == ["done", "done"]
+    assert len(attempts) == 2
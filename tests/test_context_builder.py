@@ -0,0 +1,52 @@
+from backend.agents.context_builder import ContextBuilder, count_tokens
+
+movies = [
+    {
+        "title": "The Matrix", "year": 1999, "rating": 8.7,
+        "overview": "A computer   hacker learns about the true nature of reality.",
+        "genres": ["Action", "Science Fiction"], "directors": ["The Wachowskis"],
+        "actors": ["Keanu Reeves"], "similar_movies": ["Inception", "Tron"],
+        "relevance": 0.5
+    },
+    {
+        "title": "Inception", "year": 2010, "rating": 8.8,
+        "overview": "A thief who steals corporate secrets through dream-sharing technology. " * 10,
+        "genres": ["Science Fiction"], "directors": ["Christopher Nolan"],
+        "actors": [], "similar_movies": ["The Matrix"],
+        "relevance": 1.0
+    },
+    {"title": "Inception", "relevance": 0.1},
+]
+
+def test_context_respects_budget_and_ranks_by_relevance():
+    builder = ContextBuilder(token_budget=80)
+    context, stats = builder.build(movies)
+    
+    assert context.startswith("Inception (2010)")
+    assert stats["tokens_used"] == count_tokens(context)
+    assert stats["tokens_used"] <= 80
+    assert stats["tokens_saved"] == stats["tokens_baseline"] - stats["tokens_used"]
+
+def test_context_deduplicates_repeated_facts():
+    builder = ContextBuilder(token_budget=1000)
+    context, stats = builder.build(movies)
+    
+    assert context.count("Inception (2010)") == 1
+    # Movies already in the context are not repeated as "similar" facts
+    assert "Similar: Tron." in context
+    assert "Similar: The Matrix" not in context
+    assert "  " not in context
+    assert stats["snippets_kept"] == 2
+
+def test_tool_results_share_budget():
+    builder = ContextBuilder(tool_token_budget=100)
+    calls = [
+        {"tool": "graph_query", "output": "row " * 500},
+        {"tool": "graph_query", "output": "row " * 500},
+        {"tool": "calculator", "output": "Result: 8.75"},
+    ]
+    text, stats = builder.build_tool_results(calls)
+    
+    assert "calculator: Result: 8.75" in text
+    assert stats["snippets_kept"] == 2
+    assert stats["tokens_used"] <= 100
@@ -0,0 +1,56 @@
+from backend.graphrag.cypher_templates import CypherTemplateMatcher, EntityDictionary
+
+catalog = [
+    {"id": "m1", "title": "The Matrix", "genres": ["Action", "Science Fiction"],
+     "director": {"name": "The Wachowskis"}, "actors": [{"name": "Keanu Reeves"}]},
+    {"id": "m2", "title": "The Matrix Reloaded", "genres": ["Science Fiction"],
+     "director": {"name": "The Wachowskis"}, "actors": [{"name": "Keanu Reeves"}]},
+    {"id": "m3", "title": "Last Action Hero", "genres": ["Action"],
+     "director": {"name": "John McTiernan"}, "actors": [{"name": "Arnold Schwarzenegger"}]},
+    {"id": "m4", "title": "Up", "genres": ["Animation"],
+     "director": {"name": "Pete Docter"}, "actors": [{"name": "Ed Asner"}]},
+    {"id": "m5", "title": "Inception", "genres": ["Science Fiction"],
+     "director": {"name": "Christopher Nolan"}, "actors": [{"name": "Leonardo DiCaprio"}]},
+    {"id": "m6", "title": "Interstellar", "genres": ["Science Fiction"],
+     "director": {"name": "Christopher Nolan"}, "actors": [{"name": "Matthew McConaughey"}]},
+    {"id": "m7", "title": "The Dark Knight", "genres": ["Action"],
+     "director": {"name": "Christopher Nolan"}, "actors": [{"name": "Christian Bale"}]},
+]
+
+matcher = CypherTemplateMatcher(EntityDictionary.from_movies(catalog))
+
+def intent(query):
+    match = matcher.match(query)
+    return (match['intent'], match['params']) if match else None
+
+def test_common_intents_fill_their_slots():
+    assert intent("Who directed The Matrix Reloaded?") == ('director_of', {'title': 'The Matrix Reloaded'})
+    assert intent("who starred in the matrix") == ('cast_of', {'title': 'The Matrix'})
+    assert intent("What is the rating of Last Action Hero?") == ('rating_of', {'title': 'Last Action Hero'})
+    assert intent("Which movies did Keanu Reeves star in?") == ('movies_by_person', {'person': 'Keanu Reeves'})
+    assert intent("Sci-fi movies rated above 8.5") == (
+        'genre_above_rating', {'genre': 'Science Fiction', 'min_rating': 8.5}
+    )
+
+def test_templates_bind_parameters_instead_of_inlining_values():
+    match = matcher.match("Who directed The Matrix?")
+    
+    assert "$title" in match['cypher'] and "Matrix" not in match['cypher']
+
+def test_unmatched_queries_fall_back_to_the_llm():
+    # Unknown entity, open-ended question, a genre word inside a title, a short
+    # title used as an ordinary word
+    assert intent("Who directed Heat?") is None
+    assert intent("Why is The Matrix so influential?") is None
+    assert intent("Last Action Hero movies above 7") is None
+    assert intent("What movies come up when rated above 8?") is None
+
+def test_partial_or_aggregate_questions_fall_back_to_the_llm():
+    # A second movie would be silently dropped
+    assert intent("Who directed Inception and Interstellar?") is None
+    # "made" is about money here, not the director
+    assert intent("How much money was made by The Dark Knight?") is None
+    # The calculator or movie_stats must see every movie, not a template's list
+    assert intent("Calculate the average rating of Christopher Nolan movies") is None
+    # The same title twice is still one movie
+    assert intent("Who directed Inception? Inception, the dream one") == ('director_of', {'title': 'Inception'})
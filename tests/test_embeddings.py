@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from backend.graphrag.embeddings import OnnxEmbedder, load_embedder, mean_pool
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "space": 2, "heist": 3, "dream": 4, "prison": 5}
+
+
+class LookupSession:
+    """Stands in for an onnxruntime session: one fixed vector per token id"""
+
+    def __init__(self, dims=8):
+        self.table = np.random.default_rng(0).normal(size=(len(VOCAB), dims)).astype(np.float32)
+        self.calls = []
+
+    def run(self, output_names, inputs):
+        self.calls.append(sorted(inputs))
+        return [self.table[inputs['input_ids']]]
+
+
+def embedder():
+    tokenizer = Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+    model = OnnxEmbedder.__new__(OnnxEmbedder)
+    model.tokenizer = tokenizer
+    model.session = LookupSession()
+    model.input_names = {'input_ids', 'attention_mask'}
+    model.normalize = True
+    return model
+
+
+def test_mean_pool_ignores_padding():
+    hidden = np.array([[[1.0, 1.0], [3.0, 5.0], [100.0, 100.0]]])
+    assert mean_pool(hidden, np.array([[1, 1, 0]])).tolist() == [[2.0, 3.0]]
+
+
+def test_onnx_embedder_encodes_like_sentence_transformers():
+    model = embedder()
+    single = model.encode("heist dream")
+    batch = model.encode(["heist dream", "space prison space dream heist"], batch_size=1)
+    padded = model.encode(["heist dream", "space prison space dream heist"])
+
+    assert single.shape == (8,)
+    assert batch.shape == padded.shape == (2, 8)
+    np.testing.assert_allclose(np.linalg.norm(padded, axis=1), 1.0, rtol=1e-6)
+    # Padding to the longer sentence does not change the shorter one's embedding
+    np.testing.assert_allclose(padded, batch, rtol=1e-5)
+    np.testing.assert_allclose(single, padded[0], rtol=1e-5)
+    # Only the inputs the exported graph declares are fed to it
+    assert model.session.calls[0] == ['attention_mask', 'input_ids']
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="onnx-int8"):
+        load_embedder("tensorrt")
+
+
+def test_catalog_embedding_mismatch_is_reported(tmp_path, monkeypatch):
+    from backend import config
+    from backend.graphrag.embeddings import embedding_mismatch, write_embedding_info
+    path = str(tmp_path / "embedding_info.json")
+    assert embedding_mismatch(path) is None
+
+    write_embedding_info(path)
+    assert embedding_mismatch(path) is None
+
+    monkeypatch.setattr(config, "EMBEDDING_BACKEND", "onnx-int8")
+    assert "re-run scripts/prepare_data.py" in embedding_mismatch(path)
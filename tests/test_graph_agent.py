@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+from backend.agents.context_builder import ContextBuilder
+from backend.agents.graph_agent import MovieAgentSystem
+from backend.agents.specialist_agents import RecommendationAgent
+from backend.graphrag.cypher_templates import CypherTemplateMatcher, EntityDictionary
+from backend.graphrag.path_retriever import PathRetriever
+from backend.graphrag.recommendations import NeighbourIndex
+
+catalog = [
+    {"id": "m1", "title": "Inception", "year": 2010, "rating": 8.8, "genres": ["Science Fiction"],
+     "keywords": ["dream"], "director": {"id": "p1", "name": "Christopher Nolan"}, "actors": [{"id": "p2", "name": "Leonardo DiCaprio"}]},
+    {"id": "m2", "title": "Interstellar", "year": 2014, "rating": 8.6, "genres": ["Science Fiction"],
+     "keywords": ["space"], "director": {"id": "p1", "name": "Christopher Nolan"}, "actors": [{"id": "p3", "name": "Matthew McConaughey"}]},
+    {"id": "m3", "title": "The Dark Knight", "year": 2008, "rating": 9.0, "genres": ["Action"],
+     "keywords": ["joker"], "director": {"id": "p1", "name": "Christopher Nolan"}, "actors": [{"id": "p4", "name": "Christian Bale"}]},
+    {"id": "m4", "title": "The Matrix", "year": 1999, "rating": 8.7, "genres": ["Science Fiction", "Action"],
+     "keywords": ["dream"], "director": {"id": "p5", "name": "Lana Wachowski"}, "actors": [{"id": "p6", "name": "Keanu Reeves"}]},
+]
+
+class FakeNeo4j:
+    snapshots = SimpleNamespace(current=lambda: None)
+    
+    def get_movie_contexts(self, movie_ids):
+        movies = {movie["id"]: movie for movie in catalog}
+        return [{"id": movie_id, "title": movies[movie_id]["title"], "director": movies[movie_id]["director"]["name"]}
+                for movie_id in movie_ids]
+
+def make_agent():
+    # Only the routing components; no Neo4j, embedder or LLM
+    agent = MovieAgentSystem.__new__(MovieAgentSystem)
+    agent.neo4j = FakeNeo4j()
+    agent.recommender = RecommendationAgent(NeighbourIndex.from_movies(catalog))
+    agent.cypher_templates = CypherTemplateMatcher(EntityDictionary.from_movies(catalog))
+    return agent
+
+def test_tool_keywords_match_whole_words():
+    agent = make_agent()
+    
+    for query in ("Who is the heroine of the android movie set in Detroit?", "What is the meaning of the ending?"):
+        assert agent.should_use_tools({"query": query}) == "skip_tools"
+    for query in ("What is the ROI of the film?", "Calculate the mean budget"):
+        assert agent.should_use_tools({"query": query}) == "use_tools"
+
+def test_only_explicit_recommendation_requests_skip_the_agent():
+    agent = make_agent()
+    
+    for query in ("Movies like Inception", "Can you recommend something similar to The Matrix?",
+                  "suggest films like Interstellar"):
+        assert agent.route_query({"query": query}) == "recommend"
+    for query in ("Who directed The Matrix? I would like to know",
+                  "What is Inception like?",
+                  "Is Interstellar similar in budget to Inception? calculate the ratio",
+                  "Compare the ratings of The Matrix and Inception, I would like a table",
+                  "Movies like the one nobody has heard of"):
+        assert agent.route_query({"query": query}) == "agent"
+
+def test_graph_recommendations_are_computed_once_with_unique_seeds():
+    agent = make_agent()
+    calls = []
+    recommend_ids = agent.recommender.recommend_ids
+    agent.recommender.recommend_ids = lambda preferences: calls.append(preferences) or recommend_ids(preferences)
+    state = {"query": "films similar to Inception and Inception", "reasoning": []}
+    
+    assert agent.route_query(state) == "recommend"
+    result = agent.recommend_from_graph(state)
+    
+    assert len(calls) == 1
+    assert result["final_answer"].startswith("If you enjoyed **Inception**, you might like:")
+    assert "Inception" not in result["tool_calls"][0]["output"]
+    assert agent.recommendation_served(result) == "done"
+    # Seeds without neighbours go on to the agent
+    agent.recommender.recommend_ids = lambda preferences: []
+    assert agent.recommendation_served(agent.recommend_from_graph(state)) == "agent"
+
+def test_graph_recommendations_keep_the_seed_first_in_the_session():
+    result = make_agent().recommend_from_graph({"query": "movies like Interstellar", "reasoning": []})
+    
+    movies = result["retrieved_movies"]
+    assert movies[0] == {"id": "m2", "title": "Interstellar", "director": "Christopher Nolan"}
+    assert [movie["title"] for movie in movies[1:]] == result["tool_calls"][0]["output"]
+
+def test_graph_recommendations_keep_movies_sharing_a_title_apart():
+    agent = make_agent()
+    remake = {**catalog[3], "id": "m5", "year": 2031, "rating": 5.0}
+    agent.recommender = RecommendationAgent(NeighbourIndex.from_movies(catalog + [remake]))
+    agent.recommender.recommend_ids = lambda preferences: ["m4", "m5"]
+    
+    result = agent.recommend_from_graph({"query": "movies like Inception", "reasoning": []})
+    
+    assert "**The Matrix** (1999) rated **8.7**" in result["final_answer"]
+    assert "**The Matrix** (2031) rated **5.0**" in result["final_answer"]
+    assert result["tool_calls"][0]["output"] == ["The Matrix", "The Matrix"]
+
+class FakeRetriever:
+    def __init__(self):
+        self.queries = []
+    
+    def retrieve(self, query, top_k=5, known=None):
+        self.queries.append(query)
+        return {'vector_results': [], 'enriched_context': [{'id': 'm1', 'title': 'Inception', 'directors': ['Christopher Nolan']}]}
+
+def test_follow_up_shaped_questions_naming_a_new_movie_are_retrieved():
+    agent = make_agent()
+    agent.retriever = FakeRetriever()
+    agent.path_retriever = PathRetriever(graph=None)
+    agent.context_builder = ContextBuilder()
+    interstellar = {'id': 'm2', 'title': 'Interstellar', 'directors': ['Christopher Nolan'], 'actors': ['Matthew McConaughey']}
+    
+    def retrieve(query):
+        return agent.retrieve_context({"query": query, "session_movies": [interstellar], "reasoning": []})
+    
+    # About the session's movie: answered from the session
+    assert retrieve("Who directed it?")["retrieved_movies"][0]['id'] == 'm2'
+    assert retrieve("Did Matthew McConaughey star in the film?")["reasoning"][0].startswith("Retrieval: reused")
+    assert agent.retriever.queries == []
+    # Naming another movie: retrieved, and not anchored on the session's movie
+    assert retrieve("Who directed the movie Inception?")["retrieved_movies"][0]['id'] == 'm1'
+    retrieve("What is the rating of the film Inception?")
+    assert agent.retriever.queries == ["Who directed the movie Inception?", "What is the rating of the film Inception?"]
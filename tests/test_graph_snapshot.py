@@ -0,0 +1,74 @@
+from backend.graphrag.graph_snapshot import publish_snapshot, SnapshotHolder
+from backend.graphrag.path_retriever import PathRetriever
+
+nodes = [
+    {'key': 'm1', 'label': 'Movie', 'id': 'tt1', 'name': 'The Matrix', 'rating': 8.7, 'year': 1999, 'overview': 'A hacker learns the truth.'},
+    {'key': 'm2', 'label': 'Movie', 'id': 'tt2', 'name': 'John Wick', 'rating': 7.4, 'year': 2014, 'overview': 'An ex-hitman comes out of retirement.'},
+    {'key': 'p1', 'label': 'Person', 'id': 'p1', 'name': 'Keanu Reeves'},
+    {'key': 'p2', 'label': 'Person', 'id': 'p2', 'name': 'Carrie-Anne Moss'},
+    {'key': 'p3', 'label': 'Person', 'id': 'p3', 'name': 'Lana Wachowski'},
+    {'key': 'g1', 'label': 'Genre', 'id': None, 'name': 'Action'},
+]
+relationships = [
+    {'source': 'p2', 'type': 'ACTED_IN', 'target': 'm1', 'sort': 1},
+    {'source': 'p1', 'type': 'ACTED_IN', 'target': 'm1', 'sort': 0},
+    {'source': 'p1', 'type': 'ACTED_IN', 'target': 'm2', 'sort': 0},
+    {'source': 'p3', 'type': 'DIRECTED', 'target': 'm1', 'sort': 0.0},
+    {'source': 'm1', 'type': 'HAS_GENRE', 'target': 'g1', 'sort': 0.0},
+    {'source': 'm2', 'type': 'HAS_GENRE', 'target': 'g1', 'sort': 0.0},
+    {'source': 'm1', 'type': 'SIMILAR_TO', 'target': 'm2', 'sort': -0.82},
+]
+
+def test_snapshot_serves_movie_context(tmp_path):
+    publish_snapshot(nodes, relationships, str(tmp_path))
+    snapshot = SnapshotHolder(str(tmp_path)).get()
+    
+    assert snapshot.find_movie("matrix") == 'tt1'
+    assert snapshot.movie_context('tt1') == {
+        'id': 'tt1',
+        'title': 'The Matrix',
+        'year': 1999,
+        'overview': 'A hacker learns the truth.',
+        'rating': 8.7,
+        'genres': ['Action'],
+        'directors': ['Lana Wachowski'],
+        'actors': ['Keanu Reeves', 'Carrie-Anne Moss'],  # billing order
+        'similar_movies': ['John Wick'],
+    }
+    assert snapshot.movie_context('missing') == {}
+
+def test_snapshot_is_a_path_search_adapter(tmp_path):
+    publish_snapshot(nodes, relationships, str(tmp_path))
+    snapshot = SnapshotHolder(str(tmp_path)).get()
+    retriever = PathRetriever(None, max_hops=4, max_degree=10, expansion_budget=100)
+    
+    paths = retriever.find_paths("Lana Wachowski", "John Wick", graph=snapshot)
+    
+    assert [("Lana Wachowski", "DIRECTED", "The Matrix"), ("The Matrix", "SIMILAR_TO", "John Wick")] in paths
+
+def test_holder_swaps_to_newly_published_snapshot(tmp_path):
+    publish_snapshot(nodes[:1], [], str(tmp_path))
+    holder = SnapshotHolder(str(tmp_path), check_interval=0)
+    first = holder.get()
+    
+    publish_snapshot(nodes, relationships, str(tmp_path))
+    second = holder.get()
+    
+    assert second is not first
+    assert second.movie_context('tt2')['title'] == 'John Wick'
+    # Only the live snapshot and the one before it are kept on disk
+    publish_snapshot(nodes, relationships, str(tmp_path))
+    assert len([d for d in tmp_path.iterdir() if d.name.startswith("snapshot-")]) == 2
+
+def test_unloadable_snapshot_is_treated_as_absent(tmp_path):
+    from backend.graphrag.neo4j_client import Neo4jClient
+    (tmp_path / "CURRENT").write_text("snapshot-half-written")
+    holder = SnapshotHolder(str(tmp_path), check_interval=0)
+    
+    assert holder.current() is None
+    
+    # Movie contexts then come from Cypher, as without any snapshot
+    client = Neo4jClient.__new__(Neo4jClient)
+    client.snapshots = holder
+    client.execute_cypher = lambda query, params: [{'id': movie_id, 'context': '{"title": "Cypher"}'} for movie_id in params['ids']]
+    assert client.get_movie_contexts(['tt1']) == [{'title': 'Cypher'}]
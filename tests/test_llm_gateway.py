@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from langchain_groq import ChatGroq
+
+from backend.agents.llm_gateway import LLMGateway, DeadlineExceeded, deadline_scope
+
+class MockGroqHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat completions endpoint with scripted failures"""
+    
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.requests += 1
+            step = server.script.pop(0) if server.script else ("ok", 0)
+        kind, delay = step
+        time.sleep(delay)
+        
+        if kind == "ok":
+            body = json.dumps({
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "mock",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": f"answer {server.requests}"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+            }).encode()
+            self.send_response(200)
+        else:
+            body = json.dumps({"error": {"message": kind, "type": kind}}).encode()
+            self.send_response(int(kind))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (deadline or hedge won)
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGroqHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+def make_gateway(server, **kwargs):
+    llm = ChatGroq(
+        groq_api_key="test",
+        groq_api_base=f"http://127.0.0.1:{server.server_address[1]}",
+        model_name="mock",
+        http_client=httpx.Client(),
+        max_retries=0
+    )
+    return LLMGateway(llm, slots=threading.BoundedSemaphore(4), backoff=0.01, **kwargs)
+
+def test_retries_rate_limits_and_server_errors(mock_server):
+    mock_server.script = [("429", 0), ("503", 0)]
+    gateway = make_gateway(mock_server, max_retries=3)
+    
+    response = gateway.invoke("hello")
+    
+    assert response.content == "answer 3"
+    assert gateway.stats["retries"] == 2
+
+def test_client_errors_are_not_retried(mock_server):
+    mock_server.script = [("400", 0)]
+    gateway = make_gateway(mock_server, max_retries=3)
+    
+    with pytest.raises(Exception):
+        gateway.invoke("hello")
+    assert mock_server.requests == 1
+
+def test_deadline_bounds_slow_calls(mock_server):
+    mock_server.script = [("ok", 2.0)]
+    gateway = make_gateway(mock_server, max_retries=3)
+    
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with deadline_scope(0.3):
+            gateway.invoke("hello")
+    assert time.monotonic() - start < 1.5
+
+def test_hedged_request_beats_slow_primary(mock_server):
+    gateway = make_gateway(mock_server, hedging=True, hedge_min_samples=5)
+    for _ in range(5):
+        gateway.invoke("warm up")
+    
+    mock_server.script = [("ok", 2.0), ("ok", 0)]
+    start = time.monotonic()
+    response = gateway.invoke("hello")
+    
+    assert time.monotonic() - start < 1.5
+    assert gateway.stats["hedges"] == 1
+    assert gateway.stats["hedge_wins"] == 1
+    assert response.content == "answer 7"
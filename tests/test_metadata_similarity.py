@@ -0,0 +1,56 @@
+import random
+from backend.graphrag.metadata_similarity import (
+    MinHashLSH, metadata_set, metadata_similarity_edges, weighted_jaccard
+)
+
+
+def franchise_catalog(n=500, size=5):
+    """Movies in franchises of `size` sharing director, cast and most keywords"""
+    rng = random.Random(0)
+    movies = []
+    for i in range(n):
+        franchise = random.Random(i // size)
+        movies.append({
+            'id': f"m{i}",
+            'title': f"Movie {i}",
+            'genres': rng.sample(['Action', 'Drama', 'Comedy', 'Horror', 'Crime', 'Romance'], 2),
+            'keywords': [f"k{franchise.randrange(10**5)}" for _ in range(4)] + [f"k{rng.randrange(10**5)}"],
+            'director': {'id': f"d{i // size}"},
+            'actors': [{'id': f"a{franchise.randrange(10**6)}"} for _ in range(3)],
+        })
+    return movies
+
+
+def test_weighted_jaccard_counts_feature_weights():
+    a = metadata_set({'genres': ['Drama'], 'director': {'id': 'p1'}})
+    b = metadata_set({'genres': ['Drama', 'Crime'], 'director': {'id': 'p1'}})
+    assert a == {'genre:drama': 1.0, 'director:p1': 3.0}
+    assert weighted_jaccard(a, b) == 4.0 / 5.0
+    assert weighted_jaccard(a, {}) == 0.0
+
+
+def test_signatures_estimate_jaccard():
+    lsh = MinHashLSH(bands=64, rows=4)
+    a = {f"f{i}" for i in range(100)}
+    b = {f"f{i}" for i in range(50, 150)}
+    agreement = (lsh.signature(a) == lsh.signature(b)).mean()
+    assert abs(agreement - 1 / 3) < 0.1
+    assert (lsh.signature(a) == lsh.signature(sorted(a))).all()
+
+
+def test_lsh_edges_link_franchises_without_comparing_every_pair():
+    movies = franchise_catalog()
+    lsh = MinHashLSH()
+    signatures = [lsh.signature(metadata_set(movie)) for movie in movies]
+    assert len(lsh.candidate_pairs(signatures)) < len(movies) * (len(movies) - 1) / 2 / 20
+
+    edges = metadata_similarity_edges(movies, lsh=lsh)
+    same_franchise = {
+        (source, target) for source, target, _ in edges
+        if int(source[1:]) // 5 == int(target[1:]) // 5
+    }
+    assert len(same_franchise) == len(edges)
+    # Each movie has 4 franchise siblings
+    assert len(edges) >= 0.8 * len(movies) * 4
+    assert all(0.25 < score <= 1.0 for _, _, score in edges)
+    assert ('m1', 'm0') in same_franchise and ('m0', 'm1') in same_franchise
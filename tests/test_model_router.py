@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from backend.agents.model_router import ModelRouter
+
+class FakeLLM:
+    def __init__(self, name, reply):
+        self.name = name
+        self.reply = reply
+        self.calls = 0
+    
+    def invoke(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content=self.reply)
+
+def make_router(fast_reply):
+    llms = {
+        "small": FakeLLM("small", fast_reply),
+        "large": FakeLLM("large", "graph_query: MATCH (m:Movie) RETURN m.title")
+    }
+    router = ModelRouter(
+        node_models={"reason_with_tools": "small", "generate_answer": "large"},
+        escalation_model="large",
+        llm_factory=lambda name: llms[name]
+    )
+    return router, llms
+
+def test_cheap_nodes_use_fast_model():
+    router, llms = make_router("NO_TOOL_NEEDED")
+    
+    response = router.invoke("reason_with_tools", "prompt", validate=lambda c: "NO_TOOL_NEEDED" in c)
+    
+    assert response.content == "NO_TOOL_NEEDED"
+    assert llms["small"].calls == 1
+    assert llms["large"].calls == 0
+    assert router.escalations == 0
+
+def test_invalid_output_escalates_to_large_model():
+    router, llms = make_router("I think you should query the graph")
+    
+    response = router.invoke("reason_with_tools", "prompt", validate=lambda c: c.startswith("graph_query:"))
+    
+    assert response.content.startswith("graph_query:")
+    assert llms["small"].calls == 1
+    assert llms["large"].calls == 1
+    assert router.escalations == 1
+
+def test_unconfigured_nodes_use_large_model():
+    router, llms = make_router("unused")
+    
+    router.invoke("generate_answer", "prompt")
+    router.invoke("unknown_node", "prompt")
+    
+    assert llms["small"].calls == 0
+    assert llms["large"].calls == 2
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from backend.graphrag.path_retriever import Neo4jGraphAdapter, PathRetriever, format_path
+
+class InMemoryGraph:
+    """Adapter over a plain edge list: (subject, relationship, object)"""
+    
+    def __init__(self, triples):
+        self.edges = {}
+        for subject, rel, obj in triples:
+            self.edges.setdefault(subject, []).append((obj, rel, True))
+            self.edges.setdefault(obj, []).append((subject, rel, False))
+        self.expansions = 0
+    
+    def resolve(self, name):
+        matches = sorted(node for node in self.edges if name.lower() in node.lower())
+        return (matches[0], matches[0]) if matches else None
+    
+    def expand(self, keys, max_degree):
+        self.expansions += 1
+        edges = {
+            key: [edge for edge in self.edges.get(key, []) if len(self.edges[edge[0]]) <= max_degree]
+            for key in keys
+        }
+        return edges, {neighbour: neighbour for key in keys for neighbour, _, _ in edges[key]}
+
+triples = [
+    ("Keanu Reeves", "ACTED_IN", "The Matrix"),
+    ("Carrie-Anne Moss", "ACTED_IN", "The Matrix"),
+    ("Carrie-Anne Moss", "ACTED_IN", "Memento"),
+    ("Christopher Nolan", "DIRECTED", "Memento"),
+    ("Christopher Nolan", "DIRECTED", "Inception"),
+] + [
+    (movie, "HAS_GENRE", "Action")
+    for movie in ["The Matrix", "Inception", "Memento", "A", "B", "C"]
+]
+
+def test_finds_shortest_path_as_directed_triples():
+    retriever = PathRetriever(InMemoryGraph(triples), max_hops=4, max_degree=3, expansion_budget=100)
+    
+    paths = retriever.retrieve_for_query("How is Keanu Reeves connected to Christopher Nolan?")
+    
+    assert paths == [[
+        ("Keanu Reeves", "ACTED_IN", "The Matrix"),
+        ("Carrie-Anne Moss", "ACTED_IN", "The Matrix"),
+        ("Carrie-Anne Moss", "ACTED_IN", "Memento"),
+        ("Christopher Nolan", "DIRECTED", "Memento"),
+    ]]
+    assert format_path(paths[0]).startswith("(Keanu Reeves)-[ACTED_IN]->(The Matrix); ")
+
+def test_hub_nodes_and_hop_limit_bound_the_search():
+    # Through the Action hub the path would only be 4 hops
+    graph = InMemoryGraph(triples + [("Keanu Reeves", "ACTED_IN", "A")])
+    retriever = PathRetriever(graph, max_hops=4, max_degree=3, expansion_budget=100)
+    assert all(rel != "HAS_GENRE" for rel in
+               (t[1] for t in retriever.find_paths("Keanu Reeves", "Christopher Nolan")[0]))
+    
+    assert PathRetriever(graph, max_hops=3, max_degree=3, expansion_budget=100).find_paths(
+        "Keanu Reeves", "Christopher Nolan") == []
+
+def test_paths_are_cached():
+    graph = InMemoryGraph(triples)
+    retriever = PathRetriever(graph, max_hops=4, max_degree=3, expansion_budget=100)
+    
+    first = retriever.find_paths("keanu", "nolan")
+    expansions = graph.expansions
+    
+    assert retriever.find_paths("Keanu", "Nolan") == first
+    assert graph.expansions == expansions
+
+def test_cached_paths_expire_when_a_new_snapshot_is_published():
+    snapshots = SimpleNamespace(snapshot=None)
+    snapshots.current = lambda: snapshots.snapshot
+    adapter = Neo4jGraphAdapter(SimpleNamespace(snapshots=snapshots))
+    assert adapter.version is None
+    snapshots.snapshot = SimpleNamespace(version="snapshot-2")
+    assert adapter.version == "snapshot-2"
+    
+    graph = InMemoryGraph(triples)
+    retriever = PathRetriever(graph, max_hops=4, max_degree=3, expansion_budget=100)
+    graph.version = "snapshot-1"
+    retriever.find_paths("Keanu", "Nolan")
+    expansions = graph.expansions
+    graph.version = "snapshot-2"
+    retriever.find_paths("Keanu", "Nolan")
+    assert graph.expansions > expansions
+
+def test_cache_is_safe_across_threads():
+    retriever = PathRetriever(InMemoryGraph(triples), max_hops=4, max_degree=3, expansion_budget=100, cache_size=2)
+    names = ["Keanu", "Carrie", "Nolan", "Memento", "Inception"]
+    
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: retriever.find_paths(names[i % 5], names[(i + 2) % 5]), range(2000)))
+    
+    assert len(retriever._cache) <= 2
+
+def test_non_connection_queries_are_ignored():
+    assert PathRetriever.extract_endpoints("Who directed Inception?") is None
+    assert PathRetriever.extract_endpoints("What is the connection between Inception and Memento?") == ("Inception", "Memento")
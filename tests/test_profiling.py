@@ -0,0 +1,72 @@
+import time
+from fastapi.testclient import TestClient
+from backend import config
+from backend.api import main
+from backend.profiling import Profiler, exclusive_profiler
+
+
+def slow_sum():
+    total = 0
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(2000)]
+
+
+def test_profiler_collapses_stacks_and_traces_allocations(tmp_path):
+    profiler = Profiler(interval=0.002)
+    with profiler.profile():
+        slow_sum()
+        kept = allocate()
+    
+    report = profiler.report(profiler.save("test", str(tmp_path)))
+    assert report['samples'] > 20
+    lines = (tmp_path / "test.folded").read_text().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any(line.rsplit(" ", 1)[0].endswith(":slow_sum") for line in lines)
+    assert not stack.split(";")[0].endswith(":slow_sum")  # root frame first
+    assert report['peak_bytes'] >= 2000 * 1024
+    assert any("test_profiling.py" in allocation['location'] for allocation in report['allocations'])
+    assert len(kept) == 2000
+
+
+def test_only_one_profile_runs_at_a_time():
+    with exclusive_profiler() as first:
+        with exclusive_profiler() as second:
+            assert first is not None and second is None
+    with exclusive_profiler() as again:
+        assert again is not None
+
+
+class StubAgent:
+    def run(self, query, session_id=None):
+        slow_sum()
+        return {"answer": "42", "tool_calls": [], "reasoning": [], "context_used": 0}
+
+
+def test_ask_is_profiled_only_with_the_admin_token(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(main, "agent_system", StubAgent())
+    monkeypatch.setattr(main, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr("backend.profiling.PROFILE_DIR", str(tmp_path))
+    client = TestClient(main.app)
+    
+    assert client.post("/ask", json={"query": "q"}).json()['profile'] is None
+    assert client.post("/ask", json={"query": "q"}, headers={"X-Profile-Token": "guess"}).status_code == 403
+    # Non-ASCII header bytes are a wrong token, not a server error
+    assert client.post("/ask", json={"query": "q"}, headers={"X-Profile-Token": b"\xe9"}).status_code == 403
+    
+    profiled = client.post("/ask", json={"query": "q"}, headers={"X-Profile-Token": "secret"}).json()
+    assert profiled['answer'] == "42"
+    assert profiled['profile']['samples'] > 0
+    assert any("slow_sum" in entry['function'] for entry in profiled['profile']['top_functions'])
+    
+    name = profiled['profile']['name']
+    folded = client.get(f"/profiles/{name}", headers={"X-Profile-Token": "secret"})
+    assert "StubAgent.run" in folded.text
+    assert client.get(f"/profiles/{name}", headers={"X-Profile-Token": "guess"}).status_code == 403
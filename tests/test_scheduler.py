@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from backend.api.scheduler import AdmissionScheduler, Lane, Overloaded
+
+def make_scheduler(capacity=2, agent_limit=1, agent_queue=8):
+    return AdmissionScheduler(capacity, [
+        Lane('lookup', priority=0, limit=capacity, max_queue=8, service_time=0.01),
+        Lane('agent', priority=1, limit=agent_limit, max_queue=agent_queue, service_time=0.05),
+    ])
+
+async def hold(scheduler, lane, seconds, order, timeout=1.0):
+    async with scheduler.slot(lane, timeout):
+        order.append(lane)
+        await asyncio.sleep(seconds)
+
+def test_agent_runs_are_capped_and_lookups_get_priority():
+    scheduler = make_scheduler(capacity=2, agent_limit=1)
+    order = []
+    
+    async def main():
+        first = asyncio.create_task(hold(scheduler, 'agent', 0.05, order))
+        second = asyncio.create_task(hold(scheduler, 'lookup', 0.05, order))
+        await asyncio.sleep(0.01)
+        # Both slots are busy: an agent run queues first, then a lookup
+        queued = [
+            asyncio.create_task(hold(scheduler, 'agent', 0.01, order)),
+            asyncio.create_task(hold(scheduler, 'lookup', 0.01, order)),
+        ]
+        await asyncio.sleep(0.01)
+        assert scheduler.lanes['agent'].active == 1
+        await asyncio.gather(first, second, *queued)
+    
+    asyncio.run(main())
+    
+    # The lookup that arrived last starts before the queued agent run
+    assert order == ['agent', 'lookup', 'lookup', 'agent']
+    assert scheduler.active == 0
+
+def test_sheds_when_the_expected_wait_exceeds_the_deadline():
+    scheduler = make_scheduler(capacity=1, agent_limit=1)
+    
+    async def main():
+        running = asyncio.create_task(hold(scheduler, 'agent', 0.1, []))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as shed:
+            async with scheduler.slot('agent', timeout=0.01):
+                pass
+        await running
+        return shed.value
+    
+    error = asyncio.run(main())
+    
+    assert error.retry_after >= 1
+    assert scheduler.lanes['agent'].stats['shed'] == 1
+
+def test_full_queue_and_expired_waiters_are_rejected():
+    scheduler = make_scheduler(capacity=1, agent_limit=1, agent_queue=1)
+    scheduler.lanes['agent'].service_time = 0.001  # optimistic estimate, so waiters queue
+    
+    async def main():
+        running = asyncio.create_task(hold(scheduler, 'agent', 0.1, []))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(hold(scheduler, 'agent', 0.0, [], timeout=0.02))
+        await asyncio.sleep(0.005)
+        with pytest.raises(Overloaded):
+            async with scheduler.slot('agent', timeout=1.0):
+                pass
+        with pytest.raises(Overloaded):
+            await waiter
+        await running
+    
+    asyncio.run(main())
+    
+    stats = scheduler.lanes['agent'].stats
+    assert (stats['shed'], stats['expired']) == (1, 1)
+    assert scheduler.active == 0 and scheduler.lanes['agent'].queued == 0
@@ -0,0 +1,60 @@
+from backend.agents.session_store import SessionStore, is_follow_up, answerable_from_session
+
+matrix = {'id': 'tt1', 'title': 'The Matrix', 'year': 1999, 'directors': ['Lana Wachowski']}
+wick = {'id': 'tt2', 'title': 'John Wick', 'year': 2014, 'directors': ['Chad Stahelski']}
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def test_follow_up_detection():
+    assert is_follow_up("What about its sequel?")
+    assert is_follow_up("Who directed it?")
+    assert not is_follow_up("Tell me about The Matrix")
+    
+    assert answerable_from_session("Who directed it?")
+    assert not answerable_from_session("What about its sequel?")
+    assert not answerable_from_session("Who directed Inception?")
+
+def test_session_keeps_movies_and_a_bounded_summary():
+    store = SessionStore(max_sessions=10, ttl_seconds=60, max_turns=2, max_movies=10)
+    store.record("s1", "Tell me about The Matrix", "**The Matrix** is a 1999 sci-fi film.", [matrix])
+    store.record("s1", "And John Wick?", "**John Wick** is a 2014 action film. " * 50, [wick, matrix])
+    
+    context = store.context("s1")
+    
+    # Movies of the latest turn come first, in their rank order
+    assert [movie['id'] for movie in context['movies']] == ['tt2', 'tt1']
+    assert context['summary'].startswith("User: Tell me about The Matrix | Movies: The Matrix")
+    assert len(context['summary'].split()) < 250  # the long answer is truncated
+    assert [message['role'] for message in context['messages']] == ['user', 'assistant', 'user', 'assistant']
+    assert store.context("unknown") is None
+
+def test_top_ranked_movie_of_the_latest_turn_comes_first():
+    store = SessionStore(max_sessions=10, ttl_seconds=60, max_turns=2, max_movies=10)
+    store.record("s1", "Tell me about The Matrix", "answer", [matrix])
+    store.record("s1", "Nolan movies", "answer", [
+        {'id': 'tt3', 'title': 'Inception'}, {'id': 'tt4', 'title': 'Interstellar'}, {'id': 'tt5', 'title': 'The Dark Knight'}
+    ])
+    
+    titles = [movie['title'] for movie in store.context("s1")['movies']]
+    assert titles == ['Inception', 'Interstellar', 'The Dark Knight', 'The Matrix']
+
+def test_sessions_expire_and_evict_least_recently_used():
+    clock = Clock()
+    store = SessionStore(max_sessions=2, ttl_seconds=60, clock=clock)
+    store.record("a", "q", "answer", [matrix])
+    store.record("b", "q", "answer", [matrix])
+    store.context("a")  # "b" becomes the least recently used
+    store.record("c", "q", "answer", [matrix])
+    
+    assert store.context("b") is None
+    assert store.context("a") is not None
+    
+    clock.now = 61
+    assert store.context("a") is None
+    store.record("d", "q", "answer", [])
+    assert len(store) == 1
@@ -1,4 +1,17 @@
 from backend.agents.specialist_agents import RecommendationAgent, AnalysisAgent, OrchestratorAgent
+from backend.graphrag.recommendations import NeighbourIndex
+from backend.graphrag.movie_columns import MovieColumns, export_columnar_snapshot
+
+catalog = [
+    {"id": "m1", "title": "The Matrix", "year": 1999, "rating": 8.7, "genres": ["Science Fiction"],
+     "keywords": ["simulation"], "director": {"id": "p1"}, "actors": [{"id": "p2"}]},
+    {"id": "m2", "title": "The Matrix Reloaded", "year": 2003, "rating": 7.2, "genres": ["Science Fiction"],
+     "keywords": ["simulation"], "director": {"id": "p1"}, "actors": [{"id": "p2"}]},
+    {"id": "m3", "title": "John Wick", "year": 2014, "rating": 7.4, "genres": ["Action"],
+     "keywords": ["revenge"], "director": {"id": "p9"}, "actors": [{"id": "p2"}]},
+    {"id": "m4", "title": "Amelie", "year": 2001, "rating": 8.3, "genres": ["Romance"],
+     "keywords": ["paris"], "director": {"id": "p7"}, "actors": [{"id": "p8"}]},
+]
 
 def test_specialists():
     print("🧪 Testing Specialist Agents...\n")
@@ -20,5 +33,50 @@ def test_specialists():
     result = orch_agent.coordinate("Find me a complex sci-fi movie")
     print(f"✅ OrchestratorAgent: {result}")
 
+def test_recommendations_merge_graph_neighbours():
+    agent = RecommendationAgent(NeighbourIndex.from_movies(catalog, similar_edges=[("m4", "m3", 0.9)]))
+    
+    # Shared director, cast, genre and keyword outrank a shared actor alone
+    assert agent.recommend({"movies": ["The Matrix"]}) == ["The Matrix Reloaded", "John Wick"]
+    # Longest title match wins and seeds are never recommended back
+    assert agent.recommend({"query": "something like The Matrix Reloaded"})[0] == "The Matrix"
+    # SIMILAR_TO edges connect otherwise unrelated movies
+    assert agent.recommend({"movies": ["Amelie"]}) == ["John Wick"]
+    # Without seeds, genre preferences fall back to the best rated movies
+    assert agent.recommend({"genre": "Sci-Fi"}) == ["The Matrix", "The Matrix Reloaded"]
+
+def test_analysis_aggregates_columnar_snapshot(tmp_path):
+    movies = [
+        {**movie, "budget": 100, "revenue": 100 * (i + 2), "director": {**movie["director"], "name": name}}
+        for i, (movie, name) in enumerate(zip(catalog, ["Wachowski", "Wachowski", "Stahelski", "Jeunet"]))
+    ]
+    export_columnar_snapshot(movies, str(tmp_path / "columns.npz"))
+    agent = AnalysisAgent(MovieColumns.load(str(tmp_path / "columns.npz")))
+    
+    assert agent.analyze("mean(rating) where director = wachowski")["value"] == 7.95
+    assert agent.analyze("max(roi) where title in (Matrix, Wick) by title")["groups"] == {
+        "The Matrix": 2.0, "The Matrix Reloaded": 3.0, "John Wick": 4.0
+    }
+    assert agent.analyze("count(*) where rating > 8 by genre")["groups"] == {"Romance": 1, "Science Fiction": 1}
+    assert agent.analyze("mean(rating) where rating < 8.5 by director")["groups"] == {
+        "Wachowski": 7.2, "Stahelski": 7.4, "Jeunet": 8.3
+    }
+    assert agent.analyze("count(*) where year > 2000 by year")["groups"] == {"2001": 1, "2003": 1, "2014": 1}
+    assert "error" in agent.analyze("Why is Inception so popular?")
+
+def test_analysis_keeps_quoted_values_whole(tmp_path):
+    movies = [
+        {**catalog[0], "title": "Pride and Prejudice", "budget": 100, "revenue": 300, "director": {"name": "Joe Wright"}},
+        {**catalog[1], "title": "Stand by Me", "budget": 100, "revenue": 500, "director": {"name": "Rob Reiner"}},
+    ]
+    export_columnar_snapshot(movies, str(tmp_path / "columns.npz"))
+    agent = AnalysisAgent(MovieColumns.load(str(tmp_path / "columns.npz")))
+    
+    assert agent.analyze('max(roi) where title = "Pride and Prejudice" and year > 1990')["value"] == 3.0
+    assert agent.analyze("max(roi) where title = 'Stand by Me' by director")["groups"] == {"Rob Reiner": 5.0}
+    # Unquoted, the keywords are ambiguous and rejected with a hint
+    assert "Quote values" in agent.analyze("max(roi) where title = Pride and Prejudice")["error"]
+    assert "quote values" in agent.analyze("max(roi) where title = Stand by Me")["error"]
+
 if __name__ == "__main__":
     test_specialists()
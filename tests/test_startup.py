@@ -0,0 +1,92 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from fastapi.testclient import TestClient
+from backend.api.warmup import Warmup
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "langgraph", "langchain_groq", "neo4j"]
+
+def test_api_imports_quickly_without_heavy_modules():
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import backend.api.main\n"
+        "print('seconds', time.perf_counter() - start)\n"
+        f"print('loaded', *[m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    results = {line.split()[0]: line.split()[1:] for line in output if line.split()}
+    
+    seconds, loaded = float(results['seconds'][0]), results['loaded']
+    
+    assert loaded == []
+    # Importing torch alone takes several seconds
+    assert seconds < 3.0
+
+def test_warmup_retries_failed_steps_until_ready():
+    attempts = []
+    
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise ConnectionError("Neo4j is starting")
+    
+    warmup = Warmup([("model", lambda: None), ("neo4j", flaky)], retry_seconds=0.01)
+    warmup.start()
+    
+    assert warmup.wait(timeout=5)
+    report = warmup.report()
+    assert report['status'] == 'ready'
+    assert report['steps']['neo4j'] == {'status': 'ok', 'attempts': 3, 'seconds': report['steps']['neo4j']['seconds']}
+
+def test_liveness_and_readiness_endpoints():
+    from backend.api.main import app
+    # Without the context manager startup events do not run, so warmup never starts
+    client = TestClient(app)
+    
+    assert client.get("/healthz").json() == {"status": "alive"}
+    readiness = client.get("/readyz")
+    assert readiness.status_code == 503
+    assert readiness.json()['status'] == 'warming_up'
+    assert client.post("/ask", json={"query": "Who directed Inception?"}).status_code == 503
+
+def test_connection_budgets_are_split_between_workers():
+    script = ("from backend import config; print(config.NEO4J_MAX_CONNECTIONS, config.LLM_MAX_CONCURRENCY,"
+              " config.SCHEDULER_MAX_CONCURRENCY, config.AGENT_MAX_CONCURRENCY)")
+    env = {**os.environ, "WEB_CONCURRENCY": "4", "NEO4J_MAX_CONNECTIONS": "100", "LLM_MAX_CONCURRENCY": "2",
+           "SCHEDULER_MAX_CONCURRENCY": "16", "AGENT_MAX_CONCURRENCY": "4"}
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+    assert output.stdout.split() == ["25", "1", "4", "1"]
+
+def test_prefork_server_serves_from_workers_and_stops_them():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    # Offline, the model cannot load: workers start anyway and keep retrying in warmup
+    env = {**os.environ, "HF_HUB_OFFLINE": "1"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "backend.serve", "--workers", "2", "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                    assert json.load(response) == {"status": "alive"}
+                    break
+            except OSError:
+                assert time.monotonic() < deadline and server.poll() is None
+                time.sleep(0.5)
+        
+        workers = subprocess.run(["pgrep", "-P", str(server.pid)], capture_output=True, text=True).stdout.split()
+        assert len(workers) == 2
+    finally:
+        server.terminate()
+        assert server.wait(timeout=30) == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from backend.graphrag.vector_index import (
+    QuantizedVectorIndex, QUANTIZATION_MODES, export_vector_index, quantize_binary
+)
+
+
+def catalog(n=2000, dims=384, seed=0):
+    # Clusters of 10 similar movies, like neighbourhoods of real embeddings
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n // 10, dims))
+    vectors = np.repeat(centers, 10, axis=0) + rng.normal(0, 0.5, (n, dims))
+    return [
+        {'id': i, 'title': f"Movie {i}", 'overview': "", 'rating': 7.0, 'embedding': vector.tolist()}
+        for i, vector in enumerate(vectors)
+    ]
+
+
+@pytest.mark.parametrize('mode', QUANTIZATION_MODES)
+def test_two_stage_search_recovers_exact_neighbours(mode):
+    movies = catalog()
+    exact = QuantizedVectorIndex.from_movies(movies, 'float32')
+    index = QuantizedVectorIndex.from_movies(movies, mode)
+
+    rng = np.random.default_rng(1)
+    recall = []
+    for i in rng.integers(len(movies), size=20):
+        query = np.array(movies[i]['embedding']) + rng.normal(0, 0.3, 384)
+        expected = [movie['id'] for movie in exact.search(query, 5)]
+        found = index.search(query, 5)
+        assert set(found[0]) == {'id', 'title', 'overview', 'rating', 'score'}
+        assert [movie['score'] for movie in found] == sorted((movie['score'] for movie in found), reverse=True)
+        recall.append(len(set(expected) & {movie['id'] for movie in found}) / 5)
+
+    assert np.mean(recall) >= 0.9
+    assert index.search(movies[3]['embedding'], 1)[0]['id'] == 3
+
+
+def test_first_stage_memory_shrinks():
+    movies = catalog(n=100)
+    sizes = {mode: QuantizedVectorIndex.from_movies(movies, mode).memory_bytes() for mode in QUANTIZATION_MODES}
+    assert sizes['int8'] < sizes['float32'] / 3.5
+    assert sizes['binary'] == sizes['float32'] / 32
+    assert quantize_binary(np.ones((2, 384))).shape == (2, 6)
+
+
+def test_exported_index_loads_memory_mapped(tmp_path):
+    movies = catalog(n=50)
+    export_vector_index(movies, str(tmp_path / 'index'))
+    export_vector_index(movies[:40], str(tmp_path / 'index'))
+
+    index = QuantizedVectorIndex.load(str(tmp_path / 'index'), 'binary')
+    assert len(index) == 40
+    assert isinstance(index.vectors, np.memmap)
+    assert index.search(movies[7]['embedding'], 3)[0]['title'] == "Movie 7"
+    with pytest.raises(ValueError):
+        QuantizedVectorIndex.load(str(tmp_path / 'index'), 'int4')